@@ -0,0 +1,73 @@
+"""Compara o saldo corrente e os totais diários calculados linha a linha (dicionários)
+com o motor vetorizado de services.agregacao, e confere o saldo contra um saldo
+bancário sintético.
+
+Uso: python benchmarks/bench_agregacao.py [linhas por extrato] [extratos]
+"""
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(RAIZ, 'src'))
+
+from sinteticos import gerar_plano, gerar_extrato
+from services.layouts import identificar_colunas
+from services.agregacao import extratos_para_dataframe, saldo_corrente, totais_diarios, conferir_saldo
+
+
+def totais_em_laco(extratos):
+    saldos = []
+    diarios = defaultdict(lambda: [0.0, 0.0])
+    for arquivo, dados_extrato in extratos.items():
+        colunas = identificar_colunas(dados_extrato['dados'][0].keys())
+        saldo = 0.0
+        for linha in dados_extrato['dados']:
+            entrada = linha[colunas['entradas']] or 0.0
+            saida = linha[colunas['saidas']] or 0.0
+            saldo += entrada - saida
+            saldos.append(saldo)
+            diario = diarios[(arquivo, linha[colunas['data']])]
+            diario[0] += entrada
+            diario[1] += saida
+    return saldos, diarios
+
+
+def totais_vetorizados(movimento):
+    return saldo_corrente(movimento), totais_diarios(movimento)
+
+
+def medir(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    quantidade = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    plano = gerar_plano(5000)
+    extratos = {f'Extrato {i}.json': gerar_extrato(plano, linhas, i) for i in range(quantidade)}
+    print(f"{quantidade} extratos de {linhas} linhas")
+
+    tempo_laco, (saldos_laco, diarios_laco) = medir(totais_em_laco, extratos)
+    tempo_montagem, movimento = medir(extratos_para_dataframe, extratos)
+    tempo_vetor, (saldos, diarios) = medir(totais_vetorizados, movimento)
+    # Somas em ordens diferentes: compara com tolerância relativa
+    iguais = np.allclose(saldos.to_numpy(), saldos_laco, rtol=1e-9, atol=1e-6) and len(diarios) == len(diarios_laco)
+    print(f"laço:        {tempo_laco:.3f}s")
+    print(f"vetorizado:  {tempo_vetor:.3f}s (+ {tempo_montagem:.3f}s para montar o DataFrame)  "
+          f"resultados iguais: {'sim' if iguais else 'NÃO'}")
+
+    movimento['saldo_banco'] = saldo_corrente(movimento, 1000.0).round(2)
+    movimento.loc[len(movimento) // 3 + 1, 'valor'] += 10
+    tempo, (conferidas, divergentes) = medir(conferir_saldo, movimento)
+    print(f"conferência: {tempo:.3f}s, {conferidas} linhas, quebras em {divergentes['posicao'].tolist()}")
+
+
+if __name__ == "__main__":
+    main()
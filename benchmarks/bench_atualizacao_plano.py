@@ -0,0 +1,100 @@
+"""Mede a atualização incremental de um plano de contas sintético.
+
+A nova versão renomeia 1% das contas analíticas, reclassifica 0,5%,
+acrescenta 1% no fim e uma conta logo no início (que desloca todas as
+seguintes na ordem do plano). Compara o hash join com a comparação de cada conta
+nova contra a lista inteira, a regravação só das contas alteradas no banco
+com a reimportação do plano e o cache migrado com um cache vazio (acertos
+na classificação de um extrato, e se os lançamentos saem iguais).
+
+Uso: python benchmarks/bench_atualizacao_plano.py [contas] [linhas do extrato]
+"""
+import copy
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from sinteticos import gerar_plano, gerar_extrato
+from services.atualizacao_plano import comparar_planos, entradas_invalidas, resumo_diferenca
+from services.cache_classificacao import CacheClassificacao
+from services.lancamentos import IndiceContas, gerar_lancamentos
+from services.repositorio import Repositorio
+
+
+def nova_versao(plano, semente=3):
+    rng = random.Random(semente)
+    novo = copy.deepcopy(plano)
+    analiticas = [conta for conta in novo['contas'] if conta['tipo'] != 'S']
+    quantidade = max(1, len(analiticas) // 100)
+    for conta in rng.sample(analiticas, quantidade):
+        conta['nome'] += ' Filial'
+    for conta in rng.sample(analiticas, max(1, quantidade // 2)):
+        conta['classificacao'] += '1'
+    for i in range(quantidade):
+        modelo = rng.choice(analiticas)
+        novo['contas'].append(dict(modelo, codigo=str(900000 + i), nome=f"Fornecedor Novo {i} Ltda"))
+    novo['contas'].insert(1, dict(analiticas[0], codigo='899999', nome="Caixa Filial"))
+    return novo
+
+
+def comparar_em_lista(antigas, novas):
+    """Para cada conta nova, procura o código percorrendo a lista antiga"""
+    return [next((antiga for antiga in antigas if antiga['codigo'] == nova['codigo']), None) for nova in novas]
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    linhas = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    plano = gerar_plano(quantidade)
+    novo = nova_versao(plano)
+    tempo_hash, diferenca = cronometrar(lambda: comparar_planos(plano['contas'], novo['contas']))
+    print(f"{len(novo['contas'])} contas: {resumo_diferenca(diferenca)}")
+    print(f"hash join:           {tempo_hash:.3f}s")
+    if quantidade <= 20000:
+        tempo_lista, _ = cronometrar(lambda: comparar_em_lista(plano['contas'], novo['contas']))
+        print(f"busca em lista:      {tempo_lista:.3f}s ({tempo_lista / tempo_hash:.0f}x)")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        with Repositorio(os.path.join(diretorio, 'contabil.db')) as repositorio:
+            repositorio.importar_plano('plano.json', plano, 'antigo')
+            tempo_completo, _ = cronometrar(lambda: repositorio.importar_plano('plano.json', novo, 'novo'))
+            repositorio.importar_plano('plano.json', plano, 'antigo')
+            tempo_incremental, alteradas = cronometrar(
+                lambda: repositorio.atualizar_plano('plano.json', novo, 'novo', diferenca)
+            )
+            iguais = repositorio.carregar_plano('plano.json')['contas'] == novo['contas']
+        print(f"banco, reimportação: {tempo_completo:.3f}s")
+        print(f"banco, incremental:  {tempo_incremental:.3f}s ({alteradas} linhas, banco igual: {'sim' if iguais else 'NÃO'})")
+
+        extratos = {'extrato.json': gerar_extrato(plano, linhas, 1)}
+        cache = CacheClassificacao('plano.json', 'antigo', diretorio=diretorio)
+        gerar_lancamentos(plano, extratos, cache=cache)
+        tempo_migracao, descartadas = cronometrar(
+            lambda: cache.migrar('novo', entradas_invalidas(diferenca, novo['contas']))
+        )
+        mantidas = len(cache)
+        indice = IndiceContas(novo['contas'])
+        cache.acertos = cache.falhas = 0
+        tempo_migrado, migrado = cronometrar(lambda: gerar_lancamentos(novo, extratos, indice=indice, cache=cache))
+        vazio = CacheClassificacao('plano.json', 'vazio', diretorio=diretorio)
+        tempo_vazio, sem_cache = cronometrar(lambda: gerar_lancamentos(novo, extratos, indice=indice, cache=vazio))
+        print(f"cache migrado:       {tempo_migracao:.3f}s, {mantidas} mantidas, "
+              f"{descartadas} descartadas")
+        print(f"classificação:       {tempo_migrado:.3f}s com o cache migrado "
+              f"({cache.estatisticas()['taxa_acerto']:.0%} de acertos), {tempo_vazio:.3f}s com cache vazio; "
+              f"lançamentos iguais: {'sim' if migrado == sem_cache else 'NÃO'}")
+
+
+if __name__ == "__main__":
+    main()
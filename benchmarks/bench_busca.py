@@ -0,0 +1,109 @@
+"""Mede a busca das janelas de detalhes (services.busca) contra a varredura de todas as linhas.
+
+Gera um plano e um extrato sintéticos, monta os índices e, para uma
+sequência de consultas como digitadas letra a letra (cada prefixo é uma
+consulta), compara o tempo de resposta do índice com o de percorrer as
+contas/linhas testando cada uma. Os resultados têm de ser iguais.
+
+Uso: python benchmarks/bench_busca.py [contas] [linhas do extrato]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from sinteticos import gerar_extrato, gerar_plano
+from services.busca import IndiceExtrato, IndicePlano, termos
+from services.layouts import identificar_colunas
+
+
+def casa_prefixos(palavras, consulta):
+    return all(any(palavra.startswith(termo) for palavra in palavras) for termo in consulta)
+
+
+def varrer_plano(contas, texto):
+    resultado = []
+    for posicao, conta in enumerate(contas):
+        nome = termos(conta['nome'])
+        if all(str(conta['codigo']).startswith(termo) or str(conta['classificacao']).startswith(termo)
+               or (termos(termo) and casa_prefixos(nome, termos(termo))) for termo in texto.split()):
+            resultado.append(posicao)
+    return resultado
+
+
+def varrer_extrato(linhas, texto='', data_inicial=None, data_final=None, valor_minimo=None, valor_maximo=None):
+    colunas = identificar_colunas(linhas[0].keys())
+    consulta = termos(texto)
+    resultado = []
+    for posicao, linha in enumerate(linhas):
+        data = linha[colunas['data']]
+        valor = abs(linha[colunas['entradas']] or linha[colunas['saidas']])
+        if consulta and not casa_prefixos(termos(linha[colunas['descricao']]), consulta):
+            continue
+        if (data_inicial and data < data_inicial) or (data_final and data > data_final):
+            continue
+        if (valor_minimo is not None and valor < valor_minimo) or (valor_maximo is not None and valor > valor_maximo):
+            continue
+        resultado.append(posicao)
+    return resultado
+
+
+def digitacao(texto):
+    """Prefixos do texto, como a busca os recebe enquanto é digitado"""
+    return [texto[:tamanho] for tamanho in range(1, len(texto) + 1) if not texto[:tamanho].endswith(' ')]
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def comparar(descricao, consultas, indice, varredura):
+    """Pior tempo por consulta do índice e da varredura, e se todos os resultados batem"""
+    pior_indice = pior_varredura = 0.0
+    iguais = True
+    for consulta in consultas:
+        tempo_indice, encontrados = cronometrar(lambda: indice(consulta))
+        tempo_varredura, esperados = cronometrar(lambda: varredura(consulta))
+        pior_indice, pior_varredura = max(pior_indice, tempo_indice), max(pior_varredura, tempo_varredura)
+        iguais = iguais and list(encontrados) == esperados
+    print(f"{descricao:38} {len(consultas):3} consultas  índice {pior_indice * 1000:8.2f}ms  "
+          f"varredura {pior_varredura * 1000:9.1f}ms  iguais: {'sim' if iguais else 'NÃO'}")
+    return iguais
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    total_linhas = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+
+    plano = gerar_plano(quantidade)
+    contas = plano['contas']
+    tempo, indice_plano = cronometrar(lambda: IndicePlano(contas))
+    print(f"Plano: {len(contas)} contas, índice em {tempo:.2f}s (tempos: pior consulta)")
+    resultados = [
+        comparar(f"'{texto}'", digitacao(texto), indice_plano.buscar, lambda consulta: varrer_plano(contas, consulta))
+        for texto in (contas[len(contas) // 2]['classificacao'], 'forneced banco', 'caixa 1')
+    ]
+
+    linhas = gerar_extrato(plano, total_linhas, 1)['dados']
+    tempo, indice_extrato = cronometrar(lambda: IndiceExtrato(linhas))
+    print(f"\nExtrato: {len(linhas)} linhas, índice em {tempo:.2f}s")
+    filtros = [
+        ("texto", [{'texto': consulta} for consulta in digitacao('pgto banco')]),
+        ("período", [{'data_inicial': '2024-03-01', 'data_final': '2024-03-31'}, {'data_final': '2024-01-15'}]),
+        ("valor", [{'valor_minimo': 100, 'valor_maximo': 200}, {'valor_minimo': 10000}]),
+        ("texto + período + valor", [{'texto': consulta, 'data_inicial': '2024-02-01', 'data_final': '2024-06-30',
+                                      'valor_minimo': 500} for consulta in digitacao('ted')]),
+    ]
+    resultados += [
+        comparar(descricao, consultas, lambda filtro: indice_extrato.filtrar(**filtro),
+                 lambda filtro: varrer_extrato(linhas, **filtro))
+        for descricao, consultas in filtros
+    ]
+    return 0 if all(resultados) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
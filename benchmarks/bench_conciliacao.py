@@ -0,0 +1,115 @@
+"""Compara a conciliação por ordenação (services.conciliacao) com a comparação
+de todos os pares de linhas, em extratos sintéticos de várias contas.
+
+Cada conta recebe transferências vindas das outras (uma saída em um extrato
+e a entrada de mesmo valor em outro, até dois dias depois), e o primeiro
+extrato ganha uma reexportação sobreposta com o último terço das linhas. A
+comparação de pares só roda até LIMITE_PARES linhas no total.
+
+Uso: python benchmarks/bench_conciliacao.py [linhas por extrato] [extratos] [transferências]
+"""
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from sinteticos import COLUNA_DATA, COLUNA_DESCRICAO, COLUNA_ENTRADAS, COLUNA_SAIDAS, gerar_extrato, gerar_plano
+from services.agregacao import extratos_para_dataframe
+from services.conciliacao import JANELA_DIAS, _centavos, _dias, _lado, conciliar
+
+LIMITE_PARES = 20000
+
+
+def gerar_contas(linhas, quantidade, transferencias, semente=7):
+    plano = gerar_plano(2000)
+    extratos = {f'Conta {i}.json': gerar_extrato(plano, linhas, i) for i in range(quantidade)}
+    arquivos = list(extratos)
+    rng = random.Random(semente)
+    saidas = {arquivo: [linha for linha in extratos[arquivo]['dados'] if linha[COLUNA_SAIDAS]] for arquivo in arquivos}
+    for _ in range(transferencias):
+        origem, destino = rng.sample(arquivos, 2)
+        saida = rng.choice(saidas[origem])
+        data = datetime.date.fromisoformat(saida[COLUNA_DATA]) + datetime.timedelta(days=rng.randint(0, 2))
+        extratos[destino]['dados'].append({
+            COLUNA_DATA: data.isoformat(),
+            COLUNA_ENTRADAS: saida[COLUNA_SAIDAS],
+            COLUNA_SAIDAS: 0.0,
+            COLUNA_DESCRICAO: f"Transferência recebida de {origem}".ljust(65),
+        })
+    primeiro = extratos[arquivos[0]]['dados']
+    extratos['Conta 0 (reexportado).json'] = {'dados': [dict(linha) for linha in primeiro[len(primeiro) * 2 // 3:]]}
+    return extratos
+
+
+def conciliar_em_pares(movimento, janela=JANELA_DIAS):
+    """Mesmas regras de conciliar, comparando cada linha com todas as outras"""
+    linhas = movimento.assign(
+        dia=_dias(movimento['data']),
+        entrada=_centavos(movimento['entradas']),
+        saida=_centavos(movimento['saidas']),
+        texto=[' '.join(str(texto).split()).lower() for texto in movimento['descricao']],
+    ).to_dict('records')
+    ordem_extrato = {extrato: i for i, extrato in enumerate(dict.fromkeys(movimento['extrato']))}
+    duplicadas, usadas = set(), set()
+    for i, linha in enumerate(linhas):
+        for j in range(i):
+            anterior = linhas[j]
+            if (j not in usadas and ordem_extrato[anterior['extrato']] < ordem_extrato[linha['extrato']]
+                    and (anterior['dia'], anterior['entrada'], anterior['saida'], anterior['texto'])
+                    == (linha['dia'], linha['entrada'], linha['saida'], linha['texto'])):
+                # Só pareia a n-ésima ocorrência com a n-ésima: a anterior usada não casa de novo
+                usadas.add(j)
+                duplicadas.add((linha['extrato'], linha['posicao']))
+                break
+    restantes = movimento[[(extrato, posicao) not in duplicadas
+                           for extrato, posicao in zip(movimento['extrato'], movimento['posicao'])]]
+
+    saidas, valores_saida, dias_saida = _lado(restantes, 'saidas')
+    entradas, valores_entrada, dias_entrada = _lado(restantes, 'entradas')
+    extratos_saida, extratos_entrada = saidas['extrato'].tolist(), entradas['extrato'].tolist()
+    pares, usada = set(), set()
+    for i in range(len(valores_saida)):
+        for k in range(len(valores_entrada)):
+            if (k not in usada and valores_entrada[k] == valores_saida[i]
+                    and abs(dias_entrada[k] - dias_saida[i]) <= janela
+                    and extratos_entrada[k] != extratos_saida[i]):
+                usada.add(k)
+                pares.add((extratos_saida[i], saidas['posicao'].iloc[i], extratos_entrada[k], entradas['posicao'].iloc[k]))
+                break
+    return duplicadas, pares
+
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    quantidade = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    transferencias = int(sys.argv[3]) if len(sys.argv) > 3 else linhas // 10
+
+    extratos = gerar_contas(linhas, quantidade, transferencias)
+    movimento = extratos_para_dataframe(extratos)
+    print(f"{len(extratos)} extratos, {len(movimento)} linhas, {transferencias} transferências inseridas")
+
+    inicio = time.perf_counter()
+    resultado = conciliar(movimento)
+    tempo = time.perf_counter() - inicio
+    print(f"ordenação:  {tempo:.3f}s  {len(resultado['transferencias'])} transferências, "
+          f"{len(resultado['duplicadas'])} duplicadas")
+
+    if len(movimento) > LIMITE_PARES:
+        print(f"pares:      não medido (mais de {LIMITE_PARES} linhas)")
+        return
+    inicio = time.perf_counter()
+    duplicadas, pares = conciliar_em_pares(movimento)
+    tempo_pares = time.perf_counter() - inicio
+    iguais = (
+        duplicadas == set(zip(resultado['duplicadas']['extrato'], resultado['duplicadas']['posicao']))
+        and pares == set(zip(*(resultado['transferencias'][coluna] for coluna in
+                               ('extrato_saida', 'posicao_saida', 'extrato_entrada', 'posicao_entrada'))))
+    )
+    print(f"pares:      {tempo_pares:.3f}s ({tempo_pares / tempo:.0f}x)  resultados iguais: {'sim' if iguais else 'NÃO'}")
+
+
+if __name__ == "__main__":
+    main()
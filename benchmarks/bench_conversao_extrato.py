@@ -0,0 +1,50 @@
+"""Compara a conversão antiga (iterrows) com a conversão coluna a coluna de extratos.
+
+Uso: python benchmarks/bench_conversao_extrato.py [linhas]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from sinteticos import gerar_planilha_extrato
+from services.extratos import converter_para_serializavel, dataframe_para_registros, limpar_extrato
+
+
+def converter_iterrows(df):
+    dados = []
+    for _, row in df.iterrows():
+        linha = {}
+        for coluna in df.columns:
+            linha[str(coluna)] = converter_para_serializavel(row[coluna])
+        dados.append(linha)
+    return dados
+
+
+def medir(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    df = limpar_extrato(gerar_planilha_extrato(linhas))
+
+    antigo, tempo_antigo = medir(converter_iterrows, df)
+    novo, tempo_novo = medir(dataframe_para_registros, df)
+
+    identico = (json.dumps(antigo, ensure_ascii=False, indent=4)
+                == json.dumps(novo, ensure_ascii=False, indent=4))
+
+    print(f"Linhas convertidas: {len(novo)}")
+    print(f"iterrows:           {tempo_antigo:.3f}s")
+    print(f"coluna a coluna:    {tempo_novo:.3f}s ({tempo_antigo / tempo_novo:.1f}x)")
+    print(f"JSON idêntico:      {'sim' if identico else 'NÃO'}")
+    return 0 if identico else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
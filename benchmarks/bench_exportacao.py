@@ -0,0 +1,81 @@
+"""Mede a exportação de lançamentos para os layouts de importação (services.exportacao).
+
+Gera um plano e extratos sintéticos (um ano de movimento de uma empresa
+grande, por padrão) e compara, para cada layout em LAYOUTS:
+
+- montar o arquivo inteiro em memória e gravá-lo de uma vez;
+- exportar a lista já gerada lote a lote;
+- exportar direto de iterar_lancamentos, sem a lista.
+
+O tempo é medido sem o tracemalloc, que deixa o Python várias vezes mais
+lento; o pico de memória vem de uma segunda execução com ele (inclui os
+lançamentos gerados no caminho sem lista, não a lista já pronta dos outros).
+Os três arquivos gravados têm de ser iguais.
+
+Uso: python benchmarks/bench_exportacao.py [linhas de extrato] [extratos]
+"""
+import filecmp
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from sinteticos import gerar_extrato, gerar_plano
+from services.cache_classificacao import CacheClassificacao
+from services.exportacao import LAYOUTS, exportar_lancamentos
+from services.lancamentos import IndiceContas, gerar_lancamentos, iterar_lancamentos
+
+
+def exportar_em_memoria(lancamentos, caminho, layout):
+    """Texto do arquivo inteiro montado antes de gravar"""
+    texto = layout.cabecalho() + layout.formatar(lancamentos)
+    with open(caminho, 'w', encoding=layout.codificacao, errors='replace', newline='') as f:
+        f.write(texto)
+
+
+def medir(funcao):
+    """(tempo, pico de memória em MB), de duas execuções"""
+    inicio = time.perf_counter()
+    funcao()
+    tempo = time.perf_counter() - inicio
+    tracemalloc.start()
+    funcao()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return tempo, pico / 1024 / 1024
+
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    quantidade = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    plano = gerar_plano(5000)
+    extratos = {f'Conta {i}.json': gerar_extrato(plano, linhas, i) for i in range(quantidade)}
+    indice = IndiceContas(plano['contas'])
+    with tempfile.TemporaryDirectory() as diretorio:
+        # Cache aquecido: a classificação não domina o caminho sem lista
+        cache = CacheClassificacao('plano.json', 'bench', diretorio=diretorio)
+        lancamentos = gerar_lancamentos(plano, extratos, indice=indice, cache=cache)
+        print(f"{len(lancamentos)} lançamentos de {linhas * quantidade} linhas em {quantidade} extratos\n")
+        print(f"{'':36} {'tempo':>8} {'pico':>10} {'lanç./s':>10}")
+
+        for nome, layout in LAYOUTS.items():
+            caminhos = [os.path.join(diretorio, f'{modo}{layout.extensao}') for modo in ('memoria', 'lista', 'gerador')]
+            medicoes = [
+                ("arquivo inteiro em memória", medir(lambda: exportar_em_memoria(lancamentos, caminhos[0], layout))),
+                ("lote a lote, da lista", medir(lambda: exportar_lancamentos(lancamentos, caminhos[1], layout))),
+                ("lote a lote, de iterar_lancamentos", medir(lambda: exportar_lancamentos(
+                    iterar_lancamentos(plano, extratos, indice=indice, cache=cache), caminhos[2], layout))),
+            ]
+            iguais = all(filecmp.cmp(caminhos[0], caminho, shallow=False) for caminho in caminhos[1:])
+            tamanho = os.path.getsize(caminhos[0]) / 1024 / 1024
+            print(f"{nome} ({tamanho:.0f}MB, arquivos iguais: {'sim' if iguais else 'NÃO'})")
+            for descricao, (tempo, pico) in medicoes:
+                print(f"  {descricao:34} {tempo:7.2f}s {pico:8.1f}MB {len(lancamentos) / tempo:10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compara o JSON dos extratos com o formato compacto (colunas em mmap).
+
+Para cada extrato de extratos/ e para um extrato sintético grande: tamanho em
+disco, tempo de json.load, tempo para abrir o compacto e somar Entradas/Saídas
+(sem cópia), tempo para ler uma página de 100 linhas, tempo para remontar o
+extrato inteiro e se o JSON regravado a partir do compacto é idêntico ao original.
+
+Uso: python benchmarks/bench_extrato_compacto.py [linhas do extrato sintético]
+"""
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(RAIZ, 'src'))
+
+from sinteticos import gerar_plano, gerar_extrato
+from services.extrato_compacto import ExtratoCompacto, compactar_json, exportar_json
+from services.layouts import identificar_colunas
+
+
+def medir(funcao, repeticoes=5):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def somar_valores(caminho):
+    with ExtratoCompacto(caminho) as extrato:
+        colunas = identificar_colunas(extrato.colunas)
+        return float(extrato.coluna(colunas['entradas']).sum() - extrato.coluna(colunas['saidas']).sum())
+
+
+def pagina(caminho):
+    with ExtratoCompacto(caminho) as extrato:
+        meio = len(extrato) // 2
+        return extrato.registros(meio, meio + 100)
+
+
+def remontar(caminho):
+    with ExtratoCompacto(caminho) as extrato:
+        return extrato.para_dict()
+
+
+def ler_json(caminho):
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def comparar(json_filepath, diretorio):
+    compacto = compactar_json(json_filepath, os.path.join(diretorio, 'extrato.extrato'))
+    regravado = os.path.join(diretorio, 'regravado.json')
+    exportar_json(compacto, regravado)
+    with open(json_filepath, 'rb') as original, open(regravado, 'rb') as copia:
+        identico = original.read() == copia.read()
+
+    repeticoes = 5 if os.path.getsize(json_filepath) < 10 * 1024 * 1024 else 2
+    return {
+        'json': os.path.getsize(json_filepath),
+        'compacto': os.path.getsize(compacto),
+        'json.load': medir(lambda: ler_json(json_filepath), repeticoes),
+        'somar': medir(lambda: somar_valores(compacto), repeticoes),
+        'pagina': medir(lambda: pagina(compacto), repeticoes),
+        'remontar': medir(lambda: remontar(compacto), repeticoes),
+        'identico': identico,
+    }
+
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivos = sorted(glob.glob(os.path.join(RAIZ, 'extratos', '*.json')))
+        sintetico = os.path.join(diretorio, f'Sintético {linhas}.json')
+        with open(sintetico, 'w', encoding='utf-8') as f:
+            json.dump(gerar_extrato(gerar_plano(5000), linhas, 1), f, ensure_ascii=False, indent=4)
+        arquivos.append(sintetico)
+
+        print(f"{'extrato':<28} {'JSON':>9} {'compacto':>9} {'json.load':>10} {'somar':>8} "
+              f"{'página':>8} {'remontar':>9}  idêntico")
+        for arquivo in arquivos:
+            r = comparar(arquivo, diretorio)
+            print(f"{os.path.basename(arquivo)[:28]:<28} {r['json'] / 1024:>7.0f}KB {r['compacto'] / 1024:>7.0f}KB "
+                  f"{r['json.load'] * 1000:>8.1f}ms {r['somar'] * 1000:>6.2f}ms {r['pagina'] * 1000:>6.2f}ms "
+                  f"{r['remontar'] * 1000:>7.1f}ms  {'sim' if r['identico'] else 'NÃO'}")
+
+
+if __name__ == "__main__":
+    main()
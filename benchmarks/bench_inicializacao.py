@@ -0,0 +1,77 @@
+"""Mede a abertura do programa em interpretadores novos, um por repetição.
+
+Compara a importação da janela principal com as bibliotecas carregadas de
+imediato (como antes: numpy, pandas e openpyxl importados junto com
+views.main_window) e adiadas, e o custo da primeira importação de plano,
+que passa a carregar as bibliotecas. Com um display disponível, mede também
+o tempo até a janela principal ser desenhada. Os tempos incluem a partida do
+interpretador; o cache de disco do sistema operacional não é esvaziado, então
+a primeira repetição costuma ser a mais lenta.
+
+Uso: python benchmarks/bench_inicializacao.py [repetições]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SRC = os.path.join(RAIZ, 'src')
+sys.path.insert(0, SRC)
+
+from sinteticos import gerar_plano, gravar_planilha_plano
+
+REPETICOES = 7
+
+IMEDIATO = "import numpy, pandas, openpyxl\nimport views.main_window\n"
+ADIADO = "import views.main_window\n"
+PRIMEIRO_USO = ADIADO + "from services.planos import processar_plano\nprocessar_plano(sys.argv[1])\n"
+JANELA = """import tkinter as tk
+from views.main_window import MainWindow
+root = tk.Tk()
+MainWindow(root)
+root.update()
+root.destroy()
+"""
+
+
+def medir(codigo, *args, repeticoes=REPETICOES):
+    """Mediana do tempo de parede de python -c codigo, com src no caminho"""
+    script = f"import sys\nsys.path.insert(0, {SRC!r})\n{codigo}"
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, '-c', script, *args], cwd=RAIZ, check=True,
+                       stdout=subprocess.DEVNULL)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos), max(tempos)
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else REPETICOES
+    medicoes = [
+        ("interpretador vazio", medir("pass", repeticoes=repeticoes)),
+        ("janela principal, bibliotecas imediatas", medir(IMEDIATO, repeticoes=repeticoes)),
+        ("janela principal, bibliotecas adiadas", medir(ADIADO, repeticoes=repeticoes)),
+    ]
+    with tempfile.TemporaryDirectory() as diretorio:
+        planilha = os.path.join(diretorio, 'plano.xlsx')
+        plano = gerar_plano(500)
+        gravar_planilha_plano(plano['empresa'], plano['contas'], 500, planilha)
+        medicoes.append(("adiadas + primeira importação de plano",
+                         medir(PRIMEIRO_USO, planilha, repeticoes=repeticoes)))
+
+    if os.environ.get('DISPLAY') or sys.platform in ('win32', 'darwin'):
+        medicoes.append(("janela principal desenhada", medir(JANELA, repeticoes=repeticoes)))
+    else:
+        print("Sem display: o tempo até a janela ser desenhada não foi medido\n")
+
+    print(f"{'':42} {'mediana':>10} {'pior':>10}")
+    for nome, (mediana, pior) in medicoes:
+        print(f"{nome:42} {mediana * 1000:8.0f}ms {pior * 1000:8.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Mede a vazão (linhas/s) da geração de lançamentos com o índice invertido.
+
+Monta um plano sintético com o número de contas pedido a partir de um plano de
+data/ e vários extratos cujos históricos citam contas desse plano. Para
+comparação, uma amostra das linhas também é classificada por varredura linear
+das contas.
+
+Uso: python benchmarks/bench_lancamentos.py [contas] [extratos] [linhas por extrato]
+"""
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(RAIZ, 'src'))
+
+from sinteticos import gerar_plano, gerar_extrato
+from services.cache_classificacao import CacheClassificacao
+from services.lancamentos import IndiceContas, gerar_lancamentos, tokenizar
+
+def buscar_linear(contas, descricao):
+    """Referência sem índice: compara o histórico com todas as contas"""
+    tokens = set(tokenizar(descricao))
+    melhor, pontos_melhor = None, 0
+    for conta in contas:
+        pontos = len(tokens & set(tokenizar(conta['nome'])))
+        if pontos > pontos_melhor:
+            melhor, pontos_melhor = conta, pontos
+    return melhor
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_extratos = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    linhas = int(sys.argv[3]) if len(sys.argv) > 3 else 25000
+
+    plano = gerar_plano(quantidade)
+    extratos = {f'Extrato {i}.json': gerar_extrato(plano, linhas, i) for i in range(n_extratos)}
+    total_linhas = n_extratos * linhas
+
+    inicio = time.perf_counter()
+    indice = IndiceContas(plano['contas'])
+    tempo_indice = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    lancamentos = gerar_lancamentos(plano, extratos, indice=indice)
+    tempo_geracao = time.perf_counter() - inicio
+    identificados = sum(1 for l in lancamentos if l['debito'] and l['credito'])
+
+    # Mesma geração com o cache de classificação: primeira execução (fria) e reabertura (quente)
+    with tempfile.TemporaryDirectory() as diretorio:
+        tempos_cache = []
+        for _ in range(2):
+            cache = CacheClassificacao('sintetico.json', 'hash', diretorio=diretorio)
+            inicio = time.perf_counter()
+            com_cache = gerar_lancamentos(plano, extratos, indice=indice, cache=cache)
+            tempos_cache.append(time.perf_counter() - inicio)
+            cache.salvar()
+        estatisticas = cache.estatisticas()
+    assert com_cache == lancamentos
+
+    amostra = [linha['Descrição                                                        ']
+               for linha in extratos['Extrato 0.json']['dados'][:200]]
+    inicio = time.perf_counter()
+    for descricao in amostra:
+        buscar_linear(indice.contas, descricao)
+    tempo_linear = (time.perf_counter() - inicio) / len(amostra)
+
+    print(f"Plano: {quantidade} contas; {n_extratos} extratos x {linhas} linhas")
+    print(f"Índice construído em:    {tempo_indice * 1000:.1f}ms ({len(indice.postagens)} tokens)")
+    print(f"Geração com índice:      {tempo_geracao:.2f}s ({total_linhas / tempo_geracao:,.0f} linhas/s)")
+    print(f"Com cache (fria):        {tempos_cache[0]:.2f}s ({total_linhas / tempos_cache[0]:,.0f} linhas/s)")
+    print(f"Com cache (quente):      {tempos_cache[1]:.2f}s ({total_linhas / tempos_cache[1]:,.0f} linhas/s, "
+          f"{estatisticas['taxa_acerto']:.1%} acertos, {estatisticas['tamanho']} chaves)")
+    print(f"Varredura linear (est.): {tempo_linear * total_linhas:.2f}s ({1 / tempo_linear:,.0f} linhas/s)")
+    print(f"Contrapartida encontrada em {identificados / len(lancamentos):.1%} dos lançamentos")
+
+
+if __name__ == "__main__":
+    main()
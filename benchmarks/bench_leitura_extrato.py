@@ -0,0 +1,84 @@
+"""Compara a importação com pd.read_excel com a leitura em streaming (openpyxl read-only).
+
+Gera uma planilha sintética e importa em um processo separado por caminho,
+medindo o tempo e o pico de memória (RSS, lido de /proc; só Linux) de cada
+um, e confere se os dois JSON gravados têm as mesmas linhas.
+
+Uso: python benchmarks/bench_leitura_extrato.py [linhas...]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from sinteticos import gerar_planilha_extrato, gravar_planilha_extrato
+from services.extratos import processar_extrato, gravar_extrato, importar_extrato
+
+
+def importar_pandas(filepath, json_filepath):
+    gravar_extrato(processar_extrato(filepath), json_filepath)
+
+
+def medir_processo(modo, filepath, json_filepath):
+    """Roda a importação em um processo novo e devolve (tempo, pico de memória em MB)"""
+    saida = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--medir', modo, filepath, json_filepath],
+        check=True, capture_output=True, text=True
+    ).stdout
+    tempo, memoria = saida.split()
+    return float(tempo), float(memoria)
+
+
+def pico_memoria():
+    """Pico de RSS do processo em KB (VmHWM; ru_maxrss herdaria o pico do processo pai)"""
+    with open('/proc/self/status') as f:
+        for linha in f:
+            if linha.startswith('VmHWM:'):
+                return int(linha.split()[1])
+    return 0
+
+
+def medir(modo, filepath, json_filepath):
+    # Processo filho: importa e informa o tempo e o acréscimo no pico de RSS
+    base = pico_memoria()
+    inicio = time.perf_counter()
+    if modo == 'pandas':
+        importar_pandas(filepath, json_filepath)
+    else:
+        importar_extrato(filepath, json_filepath)
+    tempo = time.perf_counter() - inicio
+    pico = pico_memoria()
+    print(tempo, max(pico - base, 0) / 1024)
+
+
+def main():
+    tamanhos = [int(t) for t in sys.argv[1:]] or [50000, 200000]
+
+    print(f"{'linhas':>8} {'pandas':>9} {'memória':>9} {'streaming':>10} {'memória':>9}  iguais")
+    with tempfile.TemporaryDirectory() as diretorio:
+        for linhas in tamanhos:
+            planilha = os.path.join(diretorio, f'extrato_{linhas}.xlsx')
+            gravar_planilha_extrato(gerar_planilha_extrato(linhas), planilha)
+
+            destinos = {modo: os.path.join(diretorio, f'{modo}_{linhas}.json') for modo in ('pandas', 'streaming')}
+            medicoes = {modo: medir_processo(modo, planilha, destino) for modo, destino in destinos.items()}
+
+            dados = {}
+            for modo, destino in destinos.items():
+                with open(destino, 'r', encoding='utf-8') as f:
+                    dados[modo] = json.load(f)['dados']
+
+            print(f"{linhas:>8} {medicoes['pandas'][0]:>8.2f}s {medicoes['pandas'][1]:>7.0f}MB "
+                  f"{medicoes['streaming'][0]:>9.2f}s {medicoes['streaming'][1]:>7.0f}MB  "
+                  f"{dados['pandas'] == dados['streaming']}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == '--medir':
+        medir(*sys.argv[2:])
+    else:
+        main()
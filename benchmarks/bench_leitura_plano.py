@@ -0,0 +1,84 @@
+"""Compara a leitura do plano de contas em duas passadas (pd.read_excel com
+nrows=1 para a empresa e de novo com skiprows=3 para o corpo) com a leitura
+única da pasta (services.planos.processar_planos).
+
+A planilha sintética é gerada a partir de um plano em data/ replicado até o
+número de contas pedido. Uma segunda pasta com várias abas (uma empresa por
+aba) mede a leitura de todas de uma vez contra uma leitura dupla por aba.
+
+Uso: python benchmarks/bench_leitura_plano.py [contas] [abas] [arquivo em data/]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(RAIZ, 'src'))
+
+import openpyxl
+import pandas as pd
+
+from sinteticos import gravar_planilha_plano, linhas_planilha_plano
+from services.planos import extrair_contas, extrair_empresa, processar_planos
+
+
+def ler_duas_vezes(filepath, aba=0):
+    """Leitura anterior: o arquivo é aberto uma vez para a empresa e outra para o corpo"""
+    empresa = extrair_empresa(pd.read_excel(filepath, sheet_name=aba, nrows=1, header=None))
+    contas = extrair_contas(pd.read_excel(filepath, sheet_name=aba, skiprows=3, header=None))
+    return {'empresa': empresa, 'contas': contas}
+
+
+def gravar_pasta_abas(contas, quantidade, abas, caminho):
+    pasta = openpyxl.Workbook(write_only=True)
+    for i in range(abas):
+        planilha = pasta.create_sheet(f'Empresa {i}')
+        planilha.append(['Empresa:', None, f'Sintética {i}'])
+        planilha.append(['Plano de Contas'])
+        planilha.append([])
+        for linha in linhas_planilha_plano(contas, quantidade):
+            planilha.append(linha)
+    pasta.save(caminho)
+
+
+def medir(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    abas = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    arquivo = sys.argv[3] if len(sys.argv) > 3 else 'Plano De Contas JF.json'
+    with open(os.path.join(RAIZ, 'data', arquivo), 'r', encoding='utf-8') as f:
+        contas = json.load(f)['contas']
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        planilha = os.path.join(diretorio, 'plano.xlsx')
+        gravar_planilha_plano('Sintética', contas, quantidade, planilha)
+        antigo, tempo_antigo = medir(lambda: ler_duas_vezes(planilha))
+        novo, tempo_novo = medir(lambda: processar_planos(planilha))
+        iguais = list(novo.values()) == [antigo]
+        print(f"{quantidade} contas, uma aba")
+        print(f"duas leituras:      {tempo_antigo:.3f}s")
+        print(f"leitura única:      {tempo_novo:.3f}s ({tempo_antigo / tempo_novo:.1f}x)  mesmo plano: "
+              f"{'sim' if iguais else 'NÃO'}")
+
+        pasta = os.path.join(diretorio, 'abas.xlsx')
+        gravar_pasta_abas(contas, quantidade, abas, pasta)
+        nomes = [f'Empresa {i}' for i in range(abas)]
+        antigos, tempo_antigo = medir(lambda: [ler_duas_vezes(pasta, aba) for aba in nomes])
+        novos, tempo_novo = medir(lambda: processar_planos(pasta))
+        iguais_abas = list(novos.values()) == antigos
+        print(f"\n{quantidade} contas em cada uma de {abas} abas")
+        print(f"duas leituras/aba:  {tempo_antigo:.3f}s")
+        print(f"leitura única:      {tempo_novo:.3f}s ({tempo_antigo / tempo_novo:.1f}x)  mesmos planos: "
+              f"{'sim' if iguais_abas else 'NÃO'}")
+    return 0 if iguais and iguais_abas else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
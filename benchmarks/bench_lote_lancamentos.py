@@ -0,0 +1,87 @@
+"""Compara a geração de lançamentos de várias empresas em sequência com o
+EscalonadorLancamentos (pool de processos).
+
+Monta, em um diretório temporário, um plano sintético por empresa em data/ e
+alguns extratos por empresa em extratos/. A referência é o fluxo da tela com
+um extrato por vez: relê o plano e remonta os índices para cada arquivo. O
+escalonador carrega cada plano uma vez por processo. Confere que os
+lançamentos saem idênticos e na mesma ordem.
+
+Uso: python benchmarks/bench_lote_lancamentos.py [empresas] [extratos por empresa] [linhas] [processos]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(RAIZ, 'src'))
+
+from sinteticos import gerar_plano, gerar_extrato
+from services.cache_classificacao import CacheClassificacao
+from services.lancamentos import gerar_lancamentos
+from services.lote_lancamentos import gerar_lote
+from services.trigramas import IndiceTrigramas
+
+
+def montar_diretorio(empresas, extratos, linhas):
+    os.makedirs('data')
+    os.makedirs('extratos')
+    trabalhos = []
+    for empresa in range(empresas):
+        plano = gerar_plano(5000, semente=empresa)
+        arquivo_plano = f'Plano {empresa}.json'
+        with open(os.path.join('data', arquivo_plano), 'w', encoding='utf-8') as f:
+            json.dump(dict(plano, empresa=f'Empresa {empresa}'), f, ensure_ascii=False)
+        for numero in range(extratos):
+            arquivo_extrato = f'Extrato {empresa}-{numero}.json'
+            with open(os.path.join('extratos', arquivo_extrato), 'w', encoding='utf-8') as f:
+                json.dump(gerar_extrato(plano, linhas, empresa * 100 + numero), f, ensure_ascii=False)
+            trabalhos.append((arquivo_plano, arquivo_extrato))
+    return trabalhos
+
+
+def sequencial(trabalhos, diretorio_cache):
+    resultados = []
+    for arquivo_plano, arquivo_extrato in trabalhos:
+        with open(os.path.join('data', arquivo_plano), 'r', encoding='utf-8') as f:
+            plano = json.load(f)
+        with open(os.path.join('extratos', arquivo_extrato), 'r', encoding='utf-8') as f:
+            dados_extrato = json.load(f)
+        cache = CacheClassificacao(arquivo_plano, '', diretorio=diretorio_cache)
+        resultados.append(gerar_lancamentos(plano, {arquivo_extrato: dados_extrato}, cache=cache,
+                                            trigramas=IndiceTrigramas(plano['contas'])))
+        cache.salvar()
+    return resultados
+
+
+def main():
+    empresas = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    extratos = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    linhas = int(sys.argv[3]) if len(sys.argv) > 3 else 20000
+    processos = int(sys.argv[4]) if len(sys.argv) > 4 else os.cpu_count()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.chdir(diretorio)
+        trabalhos = montar_diretorio(empresas, extratos, linhas)
+        print(f"{empresas} empresas, {len(trabalhos)} extratos de {linhas} linhas")
+
+        inicio = time.perf_counter()
+        referencia = sequencial(trabalhos, os.path.join(diretorio, 'cache_sequencial'))
+        print(f"sequencial:              {time.perf_counter() - inicio:7.2f}s")
+
+        for quantidade in sorted({1, processos}):
+            inicio = time.perf_counter()
+            resultados = gerar_lote(trabalhos, quantidade)
+            tempo = time.perf_counter() - inicio
+            iguais = [resultado.get('lancamentos') for resultado in resultados] == referencia
+            print(f"escalonador {quantidade:>2} processos: {tempo:7.2f}s  idênticos: {'sim' if iguais else 'NÃO'}")
+            # Segunda rodada do mesmo escalonador não deve se beneficiar do cache gravado pela primeira
+            for arquivo in os.listdir(os.path.join('cache', 'classificacao')):
+                os.remove(os.path.join('cache', 'classificacao', arquivo))
+        os.chdir(RAIZ)
+
+
+if __name__ == "__main__":
+    main()
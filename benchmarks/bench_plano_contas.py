@@ -0,0 +1,88 @@
+"""Compara o parser antigo (iterrows) com o extrator de contas por colunas.
+
+A planilha sintética é gerada a partir de um plano em data/ replicado até o
+número de contas pedido, no mesmo layout lido por novo_plano.
+
+Uso: python benchmarks/bench_plano_contas.py [contas] [arquivo em data/]
+"""
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(RAIZ, 'src'))
+
+from sinteticos import gerar_planilha_plano
+from services.planos import extrair_contas
+
+def extrair_iterrows(df):
+    df = df.dropna(axis=1, how='all')
+    df = df.iloc[1:]
+
+    dados = []
+    for idx, row in df.iterrows():
+        codigo = row[0]
+        if pd.notna(codigo):
+            tipo = str(row[3]).strip() if pd.notna(row[3]) else ''
+            classificacao = str(row[7]).strip() if pd.notna(row[7]) else ''
+
+            nome = None
+            for col in [col for col in df.columns if col > 7]:
+                valor = row[col]
+                if pd.notna(valor) and isinstance(valor, str) and valor.strip():
+                    nome = valor.strip()
+                    break
+
+            if not nome:
+                continue
+
+            try:
+                grau = None
+                for col in reversed(df.columns):
+                    valor = row[col]
+                    if pd.notna(valor) and isinstance(valor, (int, float)):
+                        grau = int(valor)
+                        break
+                if grau is None:
+                    grau = 0
+            except (ValueError, TypeError):
+                grau = 0
+
+            dados.append({
+                'codigo': str(codigo).strip(),
+                'tipo': tipo,
+                'classificacao': classificacao,
+                'nome': nome,
+                'grau': grau
+            })
+    return dados
+
+
+def medir(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    arquivo = sys.argv[2] if len(sys.argv) > 2 else 'Plano De Contas JF.json'
+    with open(os.path.join(RAIZ, 'data', arquivo), 'r', encoding='utf-8') as f:
+        contas = json.load(f)['contas']
+
+    df = gerar_planilha_plano(contas, quantidade)
+    antigo, tempo_antigo = medir(extrair_iterrows, df)
+    novo, tempo_novo = medir(extrair_contas, df)
+
+    print(f"Contas extraídas:   {len(novo)}")
+    print(f"iterrows:           {tempo_antigo:.3f}s")
+    print(f"por colunas:        {tempo_novo:.3f}s ({tempo_antigo / tempo_novo:.1f}x)")
+    print(f"Mesmas contas:      {'sim' if antigo == novo else 'NÃO'}")
+    return 0 if antigo == novo else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
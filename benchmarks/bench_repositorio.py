@@ -0,0 +1,73 @@
+"""Compara consultas no banco SQLite com a leitura do JSON inteiro.
+
+Grava um plano e um extrato sintéticos como JSON (indent=4, como a aplicação)
+e no banco, e mede: carregar o JSON completo, uma página de 100 linhas, uma
+semana de datas, uma faixa de valores e a busca de uma conta pelo código.
+
+Uso: python benchmarks/bench_repositorio.py [linhas do extrato] [contas]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from sinteticos import gerar_plano, gerar_extrato
+from services.repositorio import Repositorio
+
+REPETICOES = 20
+
+
+def medir(funcao, repeticoes=REPETICOES):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = funcao()
+    return (time.perf_counter() - inicio) / repeticoes, resultado
+
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    quantidade_contas = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    plano = gerar_plano(quantidade_contas)
+    extrato = gerar_extrato(plano, linhas, 1)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho_json = os.path.join(diretorio, 'extrato.json')
+        with open(caminho_json, 'w', encoding='utf-8') as f:
+            json.dump(extrato, f, ensure_ascii=False, indent=4)
+
+        repositorio = Repositorio(os.path.join(diretorio, 'contabil.db'))
+        inicio = time.perf_counter()
+        repositorio.importar_plano('plano.json', plano, '')
+        repositorio.importar_extrato('extrato.json', extrato, '')
+        tempo_importacao = time.perf_counter() - inicio
+
+        def ler_json():
+            with open(caminho_json, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        meio = linhas // 2
+        codigo = plano['contas'][-1]['codigo']
+        medicoes = [
+            ("JSON completo", medir(ler_json, 3)),
+            ("página de 100 linhas", medir(lambda: repositorio.linhas('extrato.json', meio, meio + 100))),
+            ("uma semana (data)", medir(lambda: repositorio.linhas_por_periodo('extrato.json', '2024-06-01', '2024-06-07'))),
+            ("faixa de valores", medir(lambda: repositorio.linhas_por_valor('extrato.json', 19990, 20000))),
+            ("conta por código", medir(lambda: repositorio.conta_por_codigo('plano.json', codigo))),
+            ("contas do grupo 1.1", medir(lambda: repositorio.contas_por_classificacao('plano.json', '1.1'))),
+        ]
+        repositorio.fechar()
+
+    print(f"{linhas} linhas, {quantidade_contas} contas; importação no banco: {tempo_importacao:.2f}s\n")
+    print(f"{'consulta':<24} {'tempo':>10} {'resultado':>10}")
+    for nome, (tempo, resultado) in medicoes:
+        tamanho = len(resultado['dados']) if isinstance(resultado, dict) and 'dados' in resultado else (
+            len(resultado) if isinstance(resultado, list) else 1)
+        print(f"{nome:<24} {tempo * 1000:>8.2f}ms {tamanho:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Mede como o índice de trigramas escala com o tamanho do plano de contas.
+
+Para cada tamanho de plano: tempo de construção, latência por consulta
+(média e p95), vazão da busca em lote sobre um extrato e, para comparação,
+a latência da comparação por força bruta com todas as contas.
+
+Uso: python benchmarks/bench_trigramas.py [linhas do extrato] [tamanhos...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from sinteticos import gerar_plano, gerar_extrato
+from services.trigramas import IndiceTrigramas, ngramas
+
+COLUNA_DESCRICAO = 'Descrição                                                        '
+
+
+def buscar_forca_bruta(contas, descricao, k=5):
+    """Referência sem índice: Jaccard do histórico com cada conta"""
+    consulta = ngramas(descricao)
+    similaridades = []
+    for conta in contas:
+        gramas = ngramas(conta['nome'])
+        uniao = len(consulta | gramas)
+        similaridades.append((len(consulta & gramas) / uniao if uniao else 0.0, conta['codigo']))
+    return sorted(similaridades, reverse=True)[:k]
+
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    tamanhos = [int(t) for t in sys.argv[2:]] or [1000, 5000, 20000, 50000]
+
+    print(f"{'contas':>8} {'constr.':>9} {'consulta':>10} {'p95':>9} {'lote (linhas/s)':>16} {'força bruta':>12}")
+    for tamanho in tamanhos:
+        plano = gerar_plano(tamanho)
+        descricoes = [linha[COLUNA_DESCRICAO] for linha in gerar_extrato(plano, linhas, 1)['dados']]
+
+        inicio = time.perf_counter()
+        indice = IndiceTrigramas(plano['contas'])
+        tempo_construcao = time.perf_counter() - inicio
+
+        latencias = []
+        for descricao in descricoes[:2000]:
+            inicio = time.perf_counter()
+            indice.buscar(descricao)
+            latencias.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        indice.buscar_lote(descricoes)
+        tempo_lote = time.perf_counter() - inicio
+
+        amostra = descricoes[:20]
+        inicio = time.perf_counter()
+        for descricao in amostra:
+            buscar_forca_bruta(indice.contas, descricao)
+        tempo_bruta = (time.perf_counter() - inicio) / len(amostra)
+
+        print(f"{tamanho:>8} {tempo_construcao * 1000:>7.0f}ms {np.mean(latencias) * 1000:>8.3f}ms "
+              f"{np.percentile(latencias, 95) * 1000:>7.3f}ms {linhas / tempo_lote:>16,.0f} "
+              f"{tempo_bruta * 1000:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Dados sintéticos para os benchmarks: planos de contas e extratos.
+
+Gera os dicionários no formato de data/ e extratos/ e as planilhas de origem
+no mesmo layout das exportações reais (plano com "Empresa:" na primeira linha e
+o corpo a partir da quarta; extrato com as colunas do banco, incluindo Código,
+Doc. e Saldo dia). As planilhas são escritas com openpyxl em modo write-only,
+então tamanhos de até 1M de linhas cabem em memória.
+
+Uso: python benchmarks/sinteticos.py <diretório> [linhas...]
+"""
+import datetime
+import json
+import os
+import random
+import sys
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+PLANO_BASE = os.path.join(RAIZ, 'data', 'Plano De Contas JF.json')
+
+SUFIXOS = ['Comercio', 'Industria', 'Servicos', 'Distribuidora', 'Transportes', 'Papeis',
+           'Grafica', 'Alimentos', 'Farmacia', 'Engenharia', 'Consultoria', 'Veiculos']
+CIDADES = ['Curitiba', 'Blumenau', 'Campo Largo', 'Pinhais', 'Araucaria', 'Joinville',
+           'Londrina', 'Maringa', 'Cascavel', 'Colombo', 'Piraquara', 'Guarapuava']
+
+# Nomes de coluna com os espaços de preenchimento das exportações do banco
+COLUNA_DATA = 'Data    '
+COLUNA_ENTRADAS = '        Entradas'
+COLUNA_SAIDAS = '          Saídas'
+COLUNA_DESCRICAO = 'Descrição                                                        '
+
+# Planilha do plano: colunas do corpo (lido com skiprows=3, header=None)
+LARGURA_PLANO = 20
+
+
+def gerar_plano(quantidade, semente=42):
+    """Plano com o número de contas pedido, replicando as contas analíticas de um plano de data/"""
+    with open(PLANO_BASE, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    rng = random.Random(semente)
+    contas = list(base['contas'])
+    analiticas = [conta for conta in base['contas'] if conta['tipo'] != 'S']
+    proximo = 100000
+    while len(contas) < quantidade:
+        modelo = rng.choice(analiticas)
+        contas.append(dict(
+            modelo,
+            codigo=str(proximo),
+            classificacao=f"{modelo['classificacao'].rsplit('.', 1)[0]}.{proximo}",
+            nome=f"{modelo['nome']} {rng.choice(SUFIXOS)} {rng.choice(CIDADES)}",
+        ))
+        proximo += 1
+    return {'empresa': base['empresa'], 'contas': contas[:quantidade]}
+
+
+def _historico(rng, nome, entrada):
+    if entrada:
+        return f"Rec.doc : {rng.randint(10000000, 99999999)}/0{rng.randint(1, 9)} - {nome}/Boleto"
+    return f"Pgto.doc : {rng.randint(100000, 999999):09d}/{rng.randint(1, 9)} - {nome} (NFFO0{rng.randint(10000, 99999)})"
+
+
+def gerar_extrato(plano, linhas, semente):
+    """Extrato no formato gravado em extratos/, com históricos que citam contas do plano"""
+    rng = random.Random(semente)
+    analiticas = [conta for conta in plano['contas'] if conta['tipo'] != 'S']
+    dados = []
+    for i in range(linhas):
+        nome = ' '.join(rng.choice(analiticas)['nome'].split()[:3])
+        entrada = rng.random() < 0.4
+        valor = round(rng.uniform(10, 20000), 2)
+        dados.append({
+            COLUNA_DATA: f"2024-{i * 12 // linhas + 1:02d}-{i % 28 + 1:02d}",
+            COLUNA_ENTRADAS: valor if entrada else 0.0,
+            COLUNA_SAIDAS: 0.0 if entrada else valor,
+            COLUNA_DESCRICAO: _historico(rng, nome, entrada).ljust(65),
+        })
+    return {'arquivo_origem': f'Extrato {semente}.xlsx', 'data_processamento': '', 'dados': dados}
+
+
+def gerar_planilha_extrato(linhas, semente=42, plano=None):
+    """DataFrame com o mesmo formato de um extrato bancário exportado para Excel.
+
+    Com um plano, os históricos citam nomes das contas analíticas dele (para
+    medir a classificação); sem plano, usam alguns favorecidos fixos. 1% das
+    linhas ficam sem descrição, como nas exportações reais.
+    """
+    rng = np.random.default_rng(semente)
+    datas = pd.Timestamp('2024-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 365, linhas)), unit='D')
+    entradas = np.where(rng.random(linhas) < 0.5, np.round(rng.random(linhas) * 5000, 2), 0.0)
+    saidas = np.where(entradas == 0, np.round(rng.random(linhas) * 3000, 2), 0.0)
+    if plano is None:
+        contrapartes = ['Drogavet Campo Largo', 'Drogavet Manipulação', 'Copel', 'Sanepar', 'Simples Nacional']
+        descricoes = [
+            f"Rec.doc : {rng.integers(10000000, 99999999)}/0{i % 9 + 1} - {contrapartes[i % len(contrapartes)]}/Boleto".ljust(65)
+            for i in range(linhas)
+        ]
+    else:
+        gerador = random.Random(semente)
+        nomes = [' '.join(conta['nome'].split()[:3]) for conta in plano['contas'] if conta['tipo'] != 'S']
+        descricoes = [_historico(gerador, gerador.choice(nomes), entrada > 0).ljust(65) for entrada in entradas]
+    df = pd.DataFrame({
+        COLUNA_DATA: datas,
+        'Código': rng.integers(1, 999, linhas),
+        COLUNA_ENTRADAS: entradas,
+        COLUNA_SAIDAS: saidas,
+        COLUNA_DESCRICAO: descricoes,
+        'Doc.': rng.integers(1, 99999, linhas),
+        'Saldo dia': np.round(np.cumsum(entradas - saidas), 2),
+    })
+    df.loc[df.sample(frac=0.01, random_state=semente).index, COLUNA_DESCRICAO] = np.nan
+    return df
+
+
+def gravar_planilha_extrato(df, caminho):
+    """Grava o DataFrame do extrato em .xlsx, linha a linha"""
+    pasta = openpyxl.Workbook(write_only=True)
+    planilha = pasta.create_sheet()
+    planilha.append(list(df.columns))
+    colunas = []
+    for nome in df.columns:
+        serie = df[nome]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            colunas.append(serie.dt.to_pydatetime().tolist())
+        else:
+            colunas.append([None if valor is None or valor != valor else valor for valor in serie.tolist()])
+    for linha in zip(*colunas):
+        planilha.append(linha)
+    pasta.save(caminho)
+
+
+def linhas_planilha_plano(contas, quantidade):
+    """Corpo da planilha do plano (o que pd.read_excel(skiprows=3, header=None) devolve).
+
+    As contas são repetidas até a quantidade pedida, com códigos deslocados a
+    cada volta; a cada 50 contas entram uma linha de quebra de página e uma em
+    branco, como no relatório do sistema contábil.
+    """
+    cabecalho = [None] * LARGURA_PLANO
+    cabecalho[0], cabecalho[3], cabecalho[7], cabecalho[8], cabecalho[LARGURA_PLANO - 1] = (
+        'Código', 'T', 'Classificação', 'Nome', 'Grau'
+    )
+    linhas = [cabecalho]
+    for i in range(quantidade):
+        conta = contas[i % len(contas)]
+        linha = [None] * LARGURA_PLANO
+        codigo = conta['codigo']
+        linha[0] = int(codigo) + (i // len(contas)) * 100000 if codigo.isdigit() else codigo
+        linha[3] = conta['tipo'] or None
+        linha[7] = conta['classificacao']
+        linha[8 + min(conta['grau'], 6) - 1] = conta['nome'] + '  '
+        linha[LARGURA_PLANO - 1] = conta['grau']
+        linhas.append(linha)
+        if i % 50 == 0:
+            linhas.append([i] + [None] * 6 + ['Página', '   '] + [None] * (LARGURA_PLANO - 9))
+            linhas.append([None] * LARGURA_PLANO)
+    return linhas
+
+
+def gerar_planilha_plano(contas, quantidade):
+    """DataFrame do corpo da planilha do plano, como lido por processar_plano"""
+    df = pd.DataFrame(linhas_planilha_plano(contas, quantidade), dtype=object)
+    df[2] = np.nan
+    return df
+
+
+def gravar_planilha_plano(empresa, contas, quantidade, caminho):
+    """Grava a planilha completa do plano: empresa na primeira linha, duas de título e o corpo"""
+    pasta = openpyxl.Workbook(write_only=True)
+    planilha = pasta.create_sheet()
+    planilha.append(['Empresa:', None, empresa])
+    planilha.append(['Plano de Contas'])
+    planilha.append([f"Emitido em {datetime.date(2024, 1, 1):%d/%m/%Y}"])
+    for linha in linhas_planilha_plano(contas, quantidade):
+        planilha.append(linha)
+    pasta.save(caminho)
+
+
+def gerar_planilhas(diretorio, linhas, semente=42):
+    """Grava o plano e o extrato sintéticos de um tamanho; devolve (planilha do plano, planilha do extrato)"""
+    os.makedirs(diretorio, exist_ok=True)
+    plano = gerar_plano(min(linhas, 5000), semente)
+    caminho_plano = os.path.join(diretorio, f'Plano De Contas Sintético {linhas}.xlsx')
+    caminho_extrato = os.path.join(diretorio, f'Extrato Sintético {linhas}.xlsx')
+    if not os.path.exists(caminho_plano):
+        gravar_planilha_plano(f'Sintética {linhas}', plano['contas'], linhas, caminho_plano)
+    if not os.path.exists(caminho_extrato):
+        gravar_planilha_extrato(gerar_planilha_extrato(linhas, semente, plano), caminho_extrato)
+    return caminho_plano, caminho_extrato
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip().splitlines()[-1], file=sys.stderr)
+        return 2
+    for linhas in [int(valor) for valor in sys.argv[2:]] or [1000, 10000, 100000]:
+        for caminho in gerar_planilhas(sys.argv[1], linhas):
+            print(f"{caminho} ({os.path.getsize(caminho) / 1024:.0f}KB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""Suíte de benchmarks da importação e da geração de lançamentos.
+
+Para cada tamanho, gera (uma vez, em cache/sinteticos/) a planilha de um plano
+e de um extrato sintéticos e mede cada etapa em um processo separado: tempo
+(melhor de algumas repetições) e, em outra execução com tracemalloc, o pico de
+memória alocada pela etapa. Os resultados vão para um JSON em
+benchmarks/resultados/ (ou --saida), que pode ser comparado com outra
+execução por --comparar.
+
+Etapas: leitura do Excel, conversão das linhas, gravação do JSON, carga da
+tela de lista (catálogo sem cache), carga da tela de detalhes, importação do
+extrato em streaming e classificação das linhas nas contas do plano.
+
+Uso:
+  python benchmarks/suite.py [--tamanhos 1000 10000 ...] [--etapas prefixo ...] [--saida arquivo.json]
+  python benchmarks/suite.py --comparar antes.json depois.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(RAIZ, 'src'))
+
+from sinteticos import gerar_plano, gerar_planilhas
+
+VERSAO_RESULTADOS = 1
+TAMANHOS_PADRAO = [1000, 10000, 100000]
+DIRETORIO_DADOS = os.path.join(RAIZ, 'cache', 'sinteticos')
+DIRETORIO_RESULTADOS = os.path.join(RAIZ, 'benchmarks', 'resultados')
+
+# Acima deste tamanho cada etapa é medida uma vez só
+LIMITE_REPETICOES = 100000
+REPETICOES = 3
+
+# Tamanho da página da tela de detalhes (linhas formatadas ao abrir)
+LINHAS_PAGINA = 100
+
+
+# Etapas: cada função recebe (planilha do plano, planilha do extrato, tamanho), faz
+# o preparo fora da medição e devolve a função medida e a quantidade de itens.
+
+def plano_leitura_excel(planilha_plano, planilha_extrato, tamanho):
+    from services.planos import ler_pasta_plano
+    return lambda: ler_pasta_plano(planilha_plano), tamanho
+
+
+def plano_conversao(planilha_plano, planilha_extrato, tamanho):
+    from services.planos import extrair_contas, ler_pasta_plano, separar_plano
+    _, df = separar_plano(next(iter(ler_pasta_plano(planilha_plano).values())))
+    return lambda: extrair_contas(df), tamanho
+
+
+def plano_gravacao_json(planilha_plano, planilha_extrato, tamanho):
+    from services.planos import gravar_plano, processar_plano
+    plano = processar_plano(planilha_plano)
+    return lambda: gravar_plano(plano, os.path.join('data', 'plano.json')), tamanho
+
+
+def plano_tela_lista(planilha_plano, planilha_extrato, tamanho):
+    from services.catalogo import catalogo_planos, NOME_CATALOGO
+    from services.planos import gravar_plano, processar_plano
+    gravar_plano(processar_plano(planilha_plano), os.path.join('data', 'plano.json'))
+
+    def executar():
+        if os.path.exists(os.path.join('data', NOME_CATALOGO)):
+            os.remove(os.path.join('data', NOME_CATALOGO))
+        return catalogo_planos().listar()
+    return executar, tamanho
+
+
+def plano_tela_detalhes(planilha_plano, planilha_extrato, tamanho):
+    from services.arvore_contas import ArvoreContas
+    from services.planos import gravar_plano, processar_plano
+    gravar_plano(processar_plano(planilha_plano), os.path.join('data', 'plano.json'))
+
+    def executar():
+        with open(os.path.join('data', 'plano.json'), 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+        arvore = ArvoreContas(dados['contas'])
+        return [dados['contas'][no] for no in arvore.raizes]
+    return executar, tamanho
+
+
+def extrato_leitura_excel(planilha_plano, planilha_extrato, tamanho):
+    from services.extratos import ler_cabecalho, ler_planilha_extrato
+    from services.layouts import layout_do_cabecalho
+    layout = layout_do_cabecalho(ler_cabecalho(planilha_extrato))
+    return lambda: ler_planilha_extrato(planilha_extrato, layout), tamanho
+
+
+def extrato_conversao(planilha_plano, planilha_extrato, tamanho):
+    from services.extratos import aplicar_layout, dataframe_para_registros, ler_cabecalho, ler_planilha_extrato
+    from services.layouts import layout_do_cabecalho
+    layout = layout_do_cabecalho(ler_cabecalho(planilha_extrato))
+    df = ler_planilha_extrato(planilha_extrato, layout)
+    return lambda: dataframe_para_registros(aplicar_layout(df, layout)), tamanho
+
+
+def extrato_gravacao_json(planilha_plano, planilha_extrato, tamanho):
+    from services.extratos import gravar_extrato, processar_extrato
+    dados_extrato = processar_extrato(planilha_extrato)
+    return lambda: gravar_extrato(dados_extrato, os.path.join('extratos', 'extrato.json')), tamanho
+
+
+def extrato_importacao(planilha_plano, planilha_extrato, tamanho):
+    from services.extratos import importar_extrato
+    return lambda: importar_extrato(planilha_extrato, os.path.join('extratos', 'extrato.json')), tamanho
+
+
+def extrato_tela_lista(planilha_plano, planilha_extrato, tamanho):
+    from services.catalogo import catalogo_extratos, NOME_CATALOGO
+    from services.extratos import importar_extrato
+    importar_extrato(planilha_extrato, os.path.join('extratos', 'extrato.json'))
+
+    def executar():
+        if os.path.exists(os.path.join('extratos', NOME_CATALOGO)):
+            os.remove(os.path.join('extratos', NOME_CATALOGO))
+        return catalogo_extratos().listar()
+    return executar, tamanho
+
+
+def extrato_tela_detalhes(planilha_plano, planilha_extrato, tamanho):
+    from services.extratos import importar_extrato
+    importar_extrato(planilha_extrato, os.path.join('extratos', 'extrato.json'))
+
+    def executar():
+        with open(os.path.join('extratos', 'extrato.json'), 'r', encoding='utf-8') as f:
+            linhas = json.load(f)['dados']
+        return [list(linha.values()) for linha in linhas[:LINHAS_PAGINA]]
+    return executar, tamanho
+
+
+def classificacao(planilha_plano, planilha_extrato, tamanho):
+    from services.cache_classificacao import CacheClassificacao
+    from services.extratos import processar_extrato
+    from services.lancamentos import IndiceContas, gerar_lancamentos
+    from services.trigramas import IndiceTrigramas
+    # O mesmo plano usado para gerar os históricos do extrato
+    plano = gerar_plano(min(tamanho, 5000))
+    extratos = {'extrato.json': processar_extrato(planilha_extrato)}
+    linhas = len(extratos['extrato.json']['dados'])
+
+    def executar():
+        cache = CacheClassificacao('plano.json', 'sintetico', diretorio=tempfile.mkdtemp(dir='.'))
+        return gerar_lancamentos(plano, extratos, indice=IndiceContas(plano['contas']), cache=cache,
+                                 trigramas=IndiceTrigramas(plano['contas']))
+    return executar, linhas
+
+
+ETAPAS = {
+    'plano.leitura_excel': plano_leitura_excel,
+    'plano.conversao': plano_conversao,
+    'plano.gravacao_json': plano_gravacao_json,
+    'plano.tela_lista': plano_tela_lista,
+    'plano.tela_detalhes': plano_tela_detalhes,
+    'extrato.leitura_excel': extrato_leitura_excel,
+    'extrato.conversao': extrato_conversao,
+    'extrato.gravacao_json': extrato_gravacao_json,
+    'extrato.importacao': extrato_importacao,
+    'extrato.tela_lista': extrato_tela_lista,
+    'extrato.tela_detalhes': extrato_tela_detalhes,
+    'classificacao': classificacao,
+}
+
+
+def executar_etapa(etapa, planilha_plano, planilha_extrato, tamanho, memoria, repeticoes):
+    """Roda no processo filho, dentro de um diretório temporário com data/ e extratos/ vazios"""
+    os.makedirs('data')
+    os.makedirs('extratos')
+    funcao, itens = ETAPAS[etapa](planilha_plano, planilha_extrato, tamanho)
+    if memoria:
+        tracemalloc.start()
+        funcao()
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return {'memoria_mb': pico / 1024 / 1024, 'itens': itens}
+
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return {'tempo': min(tempos), 'tempos': tempos, 'itens': itens}
+
+
+def medir_em_processo(etapa, planilhas, tamanho, memoria):
+    repeticoes = 1 if tamanho >= LIMITE_REPETICOES else REPETICOES
+    with tempfile.TemporaryDirectory() as diretorio:
+        processo = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--filho', etapa, *planilhas, str(tamanho),
+             '1' if memoria else '0', str(repeticoes)],
+            cwd=diretorio, capture_output=True, text=True
+        )
+    if processo.returncode != 0:
+        return {'erro': processo.stderr.strip().splitlines()[-1] if processo.stderr.strip() else 'falhou'}
+    return json.loads(processo.stdout.strip().splitlines()[-1])
+
+
+def versao_codigo():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def rodar(tamanhos, etapas, saida):
+    resultados = []
+    print(f"{'etapa':<24} {'tamanho':>9} {'tempo':>9} {'itens/s':>12} {'memória':>9}")
+    for tamanho in tamanhos:
+        planilhas = gerar_planilhas(DIRETORIO_DADOS, tamanho)
+        for etapa in etapas:
+            tempo = medir_em_processo(etapa, planilhas, tamanho, memoria=False)
+            memoria = medir_em_processo(etapa, planilhas, tamanho, memoria=True)
+            resultado = {'etapa': etapa, 'tamanho': tamanho}
+            if 'erro' in tempo or 'erro' in memoria:
+                resultado['erro'] = tempo.get('erro') or memoria.get('erro')
+                print(f"{etapa:<24} {tamanho:>9} ERRO: {resultado['erro']}")
+            else:
+                resultado.update(
+                    tempo=tempo['tempo'],
+                    tempos=tempo['tempos'],
+                    itens=tempo['itens'],
+                    itens_por_segundo=tempo['itens'] / tempo['tempo'] if tempo['tempo'] else None,
+                    memoria_mb=memoria['memoria_mb']
+                )
+                print(f"{etapa:<24} {tamanho:>9} {resultado['tempo']:>8.3f}s "
+                      f"{resultado['itens_por_segundo'] or 0:>12,.0f} {resultado['memoria_mb']:>7.1f}MB")
+            resultados.append(resultado)
+
+    conteudo = {
+        'versao': VERSAO_RESULTADOS,
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': versao_codigo(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'processadores': os.cpu_count(),
+        'resultados': resultados,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(conteudo, f, ensure_ascii=False, indent=4)
+    print(f"\nResultados gravados em {saida}")
+    return 1 if any('erro' in resultado for resultado in resultados) else 0
+
+
+def comparar(antes, depois):
+    execucoes = []
+    for caminho in (antes, depois):
+        with open(caminho, 'r', encoding='utf-8') as f:
+            conteudo = json.load(f)
+        execucoes.append({(r['etapa'], r['tamanho']): r for r in conteudo['resultados'] if 'erro' not in r})
+
+    print(f"{'etapa':<24} {'tamanho':>9} {'antes':>9} {'depois':>9} {'tempo':>7} {'memória':>8}")
+    for chave in sorted(set(execucoes[0]) & set(execucoes[1]), key=lambda chave: (chave[1], chave[0])):
+        a, d = execucoes[0][chave], execucoes[1][chave]
+        razao_memoria = d['memoria_mb'] / a['memoria_mb'] if a['memoria_mb'] else float('nan')
+        print(f"{chave[0]:<24} {chave[1]:>9} {a['tempo']:>8.3f}s {d['tempo']:>8.3f}s "
+              f"{d['tempo'] / a['tempo']:>6.2f}x {razao_memoria:>7.2f}x")
+    return 0
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--filho':
+        etapa, planilha_plano, planilha_extrato, tamanho, memoria, repeticoes = sys.argv[2:8]
+        resultado = executar_etapa(etapa, planilha_plano, planilha_extrato, int(tamanho),
+                                   memoria == '1', int(repeticoes))
+        print(json.dumps(resultado))
+        return 0
+
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks da importação e da geração de lançamentos.")
+    parser.add_argument('--tamanhos', nargs='+', type=int, default=TAMANHOS_PADRAO, metavar='LINHAS',
+                        help="linhas das planilhas sintéticas (padrão: 1000 10000 100000)")
+    parser.add_argument('--etapas', nargs='+', default=[], metavar='PREFIXO',
+                        help=f"só as etapas que começam com o prefixo ({', '.join(ETAPAS)})")
+    parser.add_argument('--saida', metavar='ARQUIVO', help="arquivo JSON dos resultados")
+    parser.add_argument('--comparar', nargs=2, metavar=('ANTES', 'DEPOIS'),
+                        help="compara dois arquivos de resultados em vez de medir")
+    args = parser.parse_args()
+
+    if args.comparar:
+        return comparar(*args.comparar)
+
+    etapas = [etapa for etapa in ETAPAS if not args.etapas or any(etapa.startswith(p) for p in args.etapas)]
+    saida = args.saida or os.path.join(DIRETORIO_RESULTADOS, f"{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    return rodar(args.tamanhos, etapas, saida)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+import argparse
+import os
+import sys
+import time
+
+from services.lote import TIPO_PLANO, TIPO_EXTRATO, listar_planilhas, importar_lote
+from services.repositorio import CAMINHO_BANCO, Repositorio
+
+# Códigos de saída
+SUCESSO = 0
+FALHA_PARCIAL = 1
+SEM_ARQUIVOS = 2
+
+
+def inteiro_positivo(texto):
+    """Tipo do argparse para --processos: inteiro maior que zero"""
+    try:
+        valor = int(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"valor inválido: {texto!r}")
+    if valor < 1:
+        raise argparse.ArgumentTypeError(f"deve ser pelo menos 1: {valor}")
+    return valor
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        description="Importa em lote planilhas de planos de contas e extratos, sem abrir a interface gráfica."
+    )
+    parser.add_argument('--planos', nargs='+', default=[], metavar='DIR',
+                        help="diretórios com planilhas de plano de contas (.xls/.xlsx)")
+    parser.add_argument('--extratos', nargs='+', default=[], metavar='DIR',
+                        help="diretórios com planilhas de extrato (.xlsx)")
+    parser.add_argument('-p', '--processos', type=inteiro_positivo, default=None,
+                        help="número de processos (padrão: número de núcleos)")
+    parser.add_argument('--substituir', action='store_true',
+                        help="substitui planos/extratos já existentes em vez de reportar erro")
+    parser.add_argument('--banco', action='store_true',
+                        help=f"importa os JSON de data/ e extratos/ para o banco SQLite ({CAMINHO_BANCO})")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+
+    tarefas = []
+    for tipo, diretorios in ((TIPO_PLANO, args.planos), (TIPO_EXTRATO, args.extratos)):
+        for diretorio in diretorios:
+            if not os.path.isdir(diretorio):
+                print(f"Diretório não encontrado: {diretorio}", file=sys.stderr)
+                return SEM_ARQUIVOS
+            tarefas.extend((tipo, filepath) for filepath in listar_planilhas(diretorio, tipo))
+
+    if not tarefas:
+        if args.banco:
+            return sincronizar_banco()
+        print("Nenhuma planilha encontrada.", file=sys.stderr)
+        return SEM_ARQUIVOS
+
+    inicio = time.perf_counter()
+    falhas = 0
+    for resultado in importar_lote(tarefas, args.processos, args.substituir):
+        if 'erro' in resultado:
+            falhas += 1
+            print(f"ERRO {resultado['tempo']:8.2f}s  {resultado['origem']}: {resultado['erro']}", file=sys.stderr)
+        else:
+            print(f"OK   {resultado['tempo']:8.2f}s  {resultado['linhas']:>8} linhas  "
+                  f"{resultado['origem']} -> {', '.join(resultado['destinos'])}")
+
+    total = time.perf_counter() - inicio
+    print(f"\n{len(tarefas) - falhas} de {len(tarefas)} planilhas importadas em {total:.2f}s ({falhas} com erro)")
+    if args.banco:
+        sincronizar_banco()
+    return FALHA_PARCIAL if falhas else SUCESSO
+
+
+def sincronizar_banco():
+    inicio = time.perf_counter()
+    with Repositorio() as repositorio:
+        alterados = repositorio.sincronizar()
+    print(f"Banco {CAMINHO_BANCO}: {alterados} arquivos sincronizados em {time.perf_counter() - inicio:.2f}s")
+    return SUCESSO
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,17 @@
 import tkinter as tk
 from tkinter import ttk
 from views.main_window import MainWindow
+from services.bibliotecas import precarregar_em_segundo_plano
+
+# Espera (ms) antes de carregar pandas/numpy/openpyxl, para a janela ser desenhada primeiro
+ATRASO_PRECARGA = 200
 
 def main():
     root = tk.Tk()
     root.title("Automação de Lançamentos Contábeis")
     app = MainWindow(root)
+    root.after(ATRASO_PRECARGA, precarregar_em_segundo_plano)
     root.mainloop()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
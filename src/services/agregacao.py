@@ -0,0 +1,161 @@
+from services.bibliotecas import np, pd
+from services.layouts import coluna_de_descricao, identificar_colunas
+
+# Diferença máxima aceita entre o saldo calculado e o informado pelo banco
+TOLERANCIA_SALDO = 0.005
+
+COLUNAS_MOVIMENTO = ['extrato', 'posicao', 'data', 'entradas', 'saidas', 'valor', 'descricao']
+
+
+def _numeros(serie):
+    return pd.to_numeric(serie, errors='coerce').fillna(0.0).astype('float64')
+
+
+def _movimento(df, colunas, extrato):
+    """DataFrame no formato padrão (COLUNAS_MOVIMENTO) a partir das colunas identificadas"""
+    entradas = _numeros(df[colunas['entradas']]) if colunas['entradas'] is not None else 0.0
+    saidas = _numeros(df[colunas['saidas']]) if colunas['saidas'] is not None else 0.0
+    movimento = pd.DataFrame({
+        'extrato': extrato,
+        'posicao': np.arange(len(df)),
+        'data': pd.to_datetime(df[colunas['data']], errors='coerce').to_numpy(),
+        'entradas': np.asarray(entradas, dtype='float64') + np.zeros(len(df)),
+        'saidas': np.asarray(saidas, dtype='float64') + np.zeros(len(df)),
+        'descricao': df[colunas['descricao']].to_numpy() if colunas['descricao'] is not None else '',
+    })
+    movimento['valor'] = movimento['entradas'] - movimento['saidas']
+    return movimento[COLUNAS_MOVIMENTO]
+
+
+def extratos_para_dataframe(extratos):
+    """Junta as linhas de {arquivo: dados do extrato} em um DataFrame com colunas padronizadas"""
+    partes = []
+    for arquivo, dados_extrato in extratos.items():
+        linhas = dados_extrato['dados']
+        if not linhas:
+            continue
+        df = pd.DataFrame.from_records(linhas)
+        partes.append(_movimento(df, identificar_colunas(df.columns), arquivo))
+    if not partes:
+        return pd.DataFrame({coluna: pd.Series(dtype='float64') for coluna in COLUNAS_MOVIMENTO})
+    return pd.concat(partes, ignore_index=True)
+
+
+def saldo_corrente(movimento, saldo_inicial=0.0):
+    """Saldo após cada linha, acumulado por extrato na ordem do arquivo.
+
+    saldo_inicial pode ser um número ou um dicionário {extrato: saldo}.
+    """
+    if isinstance(saldo_inicial, dict):
+        inicial = movimento['extrato'].map(saldo_inicial).fillna(0.0)
+    else:
+        inicial = saldo_inicial
+    return movimento.groupby('extrato', sort=False)['valor'].cumsum() + inicial
+
+
+def totais_por_periodo(movimento, frequencia='D', saldo_inicial=0.0):
+    """Entradas, saídas, líquido, quantidade e saldo final por extrato e período.
+
+    frequencia segue os períodos do pandas: 'D' (dia), 'M' (mês), 'Y' (ano).
+    """
+    periodo = movimento['data'].dt.to_period(frequencia)
+    totais = (
+        movimento.assign(periodo=periodo)
+        .groupby(['extrato', 'periodo'], sort=True)
+        .agg(entradas=('entradas', 'sum'), saidas=('saidas', 'sum'), liquido=('valor', 'sum'),
+             quantidade=('valor', 'size'))
+        .reset_index()
+    )
+    totais['saldo_final'] = saldo_corrente(totais.rename(columns={'liquido': 'valor'}), saldo_inicial)
+    return totais
+
+
+def totais_diarios(movimento, saldo_inicial=0.0):
+    return totais_por_periodo(movimento, 'D', saldo_inicial)
+
+
+def totais_mensais(movimento, saldo_inicial=0.0):
+    return totais_por_periodo(movimento, 'M', saldo_inicial)
+
+
+def resumo_extratos(movimento):
+    """Resumo de entradas e saídas por extrato"""
+    return (
+        movimento.groupby('extrato', sort=True)
+        .agg(linhas=('valor', 'size'),
+             primeira_data=('data', 'min'), ultima_data=('data', 'max'),
+             entradas=('entradas', 'sum'), saidas=('saidas', 'sum'), liquido=('valor', 'sum'),
+             qtd_entradas=('entradas', lambda serie: int((serie > 0).sum())),
+             qtd_saidas=('saidas', lambda serie: int((serie > 0).sum())),
+             maior_entrada=('entradas', 'max'), maior_saida=('saidas', 'max'))
+        .reset_index()
+    )
+
+
+def totais_por_conta(lancamentos):
+    """Débitos, créditos e saldo (débito - crédito) por código de conta a partir dos lançamentos"""
+    df = pd.DataFrame.from_records(lancamentos, columns=['debito', 'credito', 'valor'])
+    debitos = df.groupby('debito')['valor'].agg(['sum', 'size'])
+    creditos = df.groupby('credito')['valor'].agg(['sum', 'size'])
+    totais = pd.DataFrame({
+        'debitos': debitos['sum'],
+        'creditos': creditos['sum'],
+        'lancamentos': debitos['size'].add(creditos['size'], fill_value=0),
+    }).fillna(0.0)
+    totais['saldo'] = totais['debitos'] - totais['creditos']
+    totais.index.name = 'conta'
+    return totais.reset_index().astype({'lancamentos': 'int64'})
+
+
+def ler_movimento_com_saldo(filepath, progresso=None):
+    """Lê a planilha original do banco mantendo a coluna de saldo (descartada na importação).
+
+    Devolve o movimento padrão de todas as linhas não vazias, com as colunas
+    'saldo_banco' e 'importada' (False para as linhas sem descrição, que a
+    importação descarta), ou None se a planilha não tiver coluna de saldo.
+    """
+    if progresso is not None:
+        progresso(0.05, "Lendo planilha")
+    df = pd.read_excel(filepath)
+    saldos = [coluna for coluna in df.columns if 'saldo' in str(coluna).lower()]
+    if not saldos:
+        return None
+    descricao = coluna_de_descricao(df.columns)
+    df = df.dropna(how='all').reset_index(drop=True)
+
+    colunas = identificar_colunas([coluna for coluna in df.columns if coluna not in saldos])
+    colunas['descricao'] = descricao
+    movimento = _movimento(df, colunas, filepath)
+    movimento['saldo_banco'] = pd.to_numeric(df[saldos[0]], errors='coerce').to_numpy()
+    movimento['importada'] = (df[descricao].notna() & (df[descricao].astype(str).str.strip() != '')).to_numpy()
+    return movimento
+
+
+def movimento_descartado(movimento):
+    """Linhas com valor que a importação descarta por não terem descrição"""
+    return movimento[~movimento['importada'] & (movimento['valor'] != 0)]
+
+
+def conferir_saldo(movimento, tolerancia=TOLERANCIA_SALDO):
+    """Compara o saldo corrente calculado com a coluna saldo_banco.
+
+    O saldo inicial de cada extrato é deduzido da primeira linha com saldo
+    (saldo_banco - saldo acumulado até ela). Linhas sem saldo informado (ex.:
+    banco que só mostra o saldo no fim do dia) não são comparadas. Uma linha
+    errada desloca o saldo de todas as seguintes, então só são devolvidas as
+    linhas em que a diferença muda ('salto'). Devolve (quantidade de linhas
+    conferidas, DataFrame com essas linhas).
+    """
+    acumulado = movimento.groupby('extrato', sort=False)['valor'].cumsum()
+    informado = movimento['saldo_banco'].notna()
+    diferenca_inicial = (movimento['saldo_banco'] - acumulado)[informado]
+    saldo_inicial = diferenca_inicial.groupby(movimento.loc[informado, 'extrato'], sort=False).first()
+
+    calculado = acumulado + movimento['extrato'].map(saldo_inicial).fillna(0.0)
+    diferenca = (calculado - movimento['saldo_banco']).round(2)[informado]
+    anterior = diferenca.groupby(movimento.loc[informado, 'extrato'], sort=False).shift(fill_value=0.0)
+    salto = (diferenca - anterior).round(2)
+    quebras = salto.index[salto.abs() > tolerancia]
+    divergentes = movimento.loc[quebras].assign(saldo_calculado=calculado[quebras], diferenca=diferenca[quebras],
+                                                salto=salto[quebras])
+    return int(informado.sum()), divergentes
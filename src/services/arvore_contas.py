@@ -0,0 +1,95 @@
+RAIZ = -1
+
+
+def classificacao_pai(classificacao):
+    """'1.1.01' -> '1.1'; '' para contas do primeiro nível"""
+    return classificacao.rsplit('.', 1)[0] if '.' in classificacao else ''
+
+
+class ArvoreContas:
+    """Hierarquia do plano de contas montada a partir da classificação ('1.1.01').
+
+    Os nós são as posições das contas na lista do plano. Cada nó guarda o pai e
+    os filhos (na ordem do plano); uma numeração em pré-ordem faz com que a
+    subárvore de um nó seja a faixa ordem[entrada[no]:saida[no]]. Assim:
+    ancestrais em O(profundidade), filhos em O(filhos) e a subárvore inteira em
+    uma fatia. Contas cujo pai não existe no plano ficam ligadas ao ancestral
+    mais próximo que existir (ou à raiz).
+    """
+
+    def __init__(self, contas):
+        self.contas = contas
+        self.por_classificacao = {}
+        for posicao, conta in enumerate(contas):
+            self.por_classificacao.setdefault(conta['classificacao'], posicao)
+
+        self.pai = [RAIZ] * len(contas)
+        self.filhos = [[] for _ in contas]
+        self.raizes = []
+        for posicao, conta in enumerate(contas):
+            pai = self._pai_existente(conta['classificacao'], posicao)
+            self.pai[posicao] = pai
+            (self.raizes if pai == RAIZ else self.filhos[pai]).append(posicao)
+
+        self._numerar()
+
+    def _pai_existente(self, classificacao, posicao):
+        classificacao = classificacao_pai(classificacao)
+        while classificacao:
+            pai = self.por_classificacao.get(classificacao)
+            if pai is not None and pai != posicao:
+                return pai
+            classificacao = classificacao_pai(classificacao)
+        return RAIZ
+
+    def _numerar(self):
+        """Pré-ordem iterativa: ordem, entrada/saída de cada nó e profundidade"""
+        self.ordem = []
+        self.entrada = [0] * len(self.contas)
+        self.saida = [0] * len(self.contas)
+        self.profundidade = [0] * len(self.contas)
+        pilha = [(no, 0, False) for no in reversed(self.raizes)]
+        while pilha:
+            no, profundidade, fechando = pilha.pop()
+            if fechando:
+                self.saida[no] = len(self.ordem)
+                continue
+            self.entrada[no] = len(self.ordem)
+            self.profundidade[no] = profundidade
+            self.ordem.append(no)
+            pilha.append((no, profundidade, True))
+            pilha.extend((filho, profundidade + 1, False) for filho in reversed(self.filhos[no]))
+
+    def __len__(self):
+        return len(self.contas)
+
+    def no(self, classificacao):
+        """Posição da conta com a classificação, ou None"""
+        return self.por_classificacao.get(classificacao)
+
+    def ancestrais(self, no):
+        """Do pai até a conta do primeiro nível"""
+        resultado = []
+        no = self.pai[no]
+        while no != RAIZ:
+            resultado.append(no)
+            no = self.pai[no]
+        return resultado
+
+    def tem_filhos(self, no):
+        return bool(self.filhos[no])
+
+    def descendentes(self, no):
+        """Todos os nós abaixo de no, em pré-ordem (sem incluir no)"""
+        return self.ordem[self.entrada[no] + 1:self.saida[no]]
+
+    def subarvore(self, classificacao):
+        """Contas da classificação e de todas as suas filhas, na ordem da árvore"""
+        no = self.no(classificacao)
+        if no is None:
+            return []
+        return [self.contas[posicao] for posicao in self.ordem[self.entrada[no]:self.saida[no]]]
+
+    def contem(self, ancestral, no):
+        """Indica se no está na subárvore de ancestral, em O(1)"""
+        return self.entrada[ancestral] <= self.entrada[no] < self.saida[ancestral]
@@ -0,0 +1,277 @@
+import hashlib
+import json
+import os
+import shutil
+from collections import Counter
+
+from services.diagnostico import etapa
+from services.extratos import cabecalho_json, formatar_cabecalho, formatar_registro, ler_registros
+from services.layouts import identificar_colunas
+
+DIRETORIO_INDICES = os.path.join('cache', 'linhas')
+VERSAO_INDICE = 1
+
+# Início de 'dados' e final de um JSON de extrato gravado com indent=4 e pelo menos uma linha
+INICIO_DADOS = b'    "dados": ['
+FIM_DADOS = b'\n    ]\n}'
+
+
+def _texto(valor):
+    return ' '.join(str(valor).split()) if valor is not None else ''
+
+
+def _quantia(valor):
+    try:
+        return round(float(valor), 2) if valor else 0.0
+    except (TypeError, ValueError):
+        return _texto(valor)
+
+
+def normalizar_linha(linha, colunas):
+    """(data, entrada, saída, descrição) da linha, sem diferenças de espaços, tipo ou arredondamento"""
+    return (
+        _texto(linha.get(colunas['data'])),
+        _quantia(linha.get(colunas['entradas'])),
+        _quantia(linha.get(colunas['saidas'])),
+        _texto(linha.get(colunas['descricao'])),
+    )
+
+
+def hash_linha(normalizada):
+    """Chave 'data:hash' da linha normalizada; a data à frente permite saber o período de cada chave"""
+    resumo = hashlib.blake2b(repr(normalizada).encode('utf-8'), digest_size=8).hexdigest()
+    return f'{normalizada[0]}:{resumo}'
+
+
+class IndiceLinhas:
+    """Hashes das linhas já gravadas em um extrato, para a atualização incremental.
+
+    Guarda quantas vezes cada linha normalizada aparece (um extrato pode ter
+    duas linhas idênticas legítimas), a última data e as colunas do JSON. Fica
+    em cache/linhas/ e vale enquanto o tamanho e o mtime do JSON não mudarem;
+    caso contrário é refeito a partir do arquivo.
+    """
+
+    def __init__(self, json_filepath, diretorio=DIRETORIO_INDICES):
+        self.json_filepath = json_filepath
+        nome = os.path.splitext(os.path.basename(json_filepath))[0]
+        self.caminho = os.path.join(diretorio, nome + '.json')
+        self.contagem = Counter()
+        self.colunas = []
+        self.ultima_data = ''
+        self.linhas = 0
+        self.arquivo_origem = None
+        self.aba = None
+        if not self._ler():
+            self.reconstruir()
+
+    def _assinatura(self):
+        info = os.stat(self.json_filepath)
+        return [info.st_size, info.st_mtime_ns]
+
+    def _ler(self):
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                conteudo = json.load(f)
+            if conteudo.get('versao') != VERSAO_INDICE or conteudo.get('assinatura') != self._assinatura():
+                return False
+            self.contagem = Counter(conteudo['contagem'])
+            self.colunas = conteudo['colunas']
+            self.ultima_data = conteudo['ultima_data']
+            self.linhas = conteudo['linhas']
+            self.arquivo_origem = conteudo['arquivo_origem']
+            self.aba = conteudo.get('aba')
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def reconstruir(self):
+        """Lê o JSON inteiro uma vez para montar o índice"""
+        with open(self.json_filepath, 'r', encoding='utf-8') as f:
+            dados_extrato = json.load(f)
+        linhas = dados_extrato['dados']
+        self.colunas = list(linhas[0].keys()) if linhas else []
+        self.arquivo_origem = dados_extrato.get('arquivo_origem')
+        self.aba = dados_extrato.get('aba')
+        self.contagem = Counter()
+        self.ultima_data = ''
+        self.linhas = 0
+        self.adicionar(linhas)
+
+    def adicionar(self, linhas):
+        mapa = identificar_colunas(self.colunas)
+        for linha in linhas:
+            normalizada = normalizar_linha(linha, mapa)
+            self.contagem[hash_linha(normalizada)] += 1
+            self.ultima_data = max(self.ultima_data, normalizada[0])
+            self.linhas += 1
+
+    def salvar(self):
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        temporario = self.caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({
+                'versao': VERSAO_INDICE,
+                'assinatura': self._assinatura(),
+                'contagem': self.contagem,
+                'colunas': self.colunas,
+                'ultima_data': self.ultima_data,
+                'linhas': self.linhas,
+                'arquivo_origem': self.arquivo_origem,
+                'aba': self.aba
+            }, f, ensure_ascii=False)
+        os.replace(temporario, self.caminho)
+
+
+def _mapear_colunas(colunas_novas, colunas_gravadas):
+    """{coluna da planilha: coluna do JSON gravado}, pelo papel (data, valores, descrição) ou pelo nome sem espaços"""
+    mapa_novo = identificar_colunas(colunas_novas)
+    mapa_gravado = identificar_colunas(colunas_gravadas)
+    destino = {
+        mapa_novo[papel]: mapa_gravado[papel]
+        for papel in mapa_novo
+        if mapa_novo[papel] is not None and mapa_gravado[papel] is not None
+    }
+    por_nome = {str(coluna).strip(): coluna for coluna in colunas_gravadas}
+    for coluna in colunas_novas:
+        if coluna not in destino and str(coluna).strip() in por_nome:
+            destino[coluna] = por_nome[str(coluna).strip()]
+    return destino
+
+
+def _ajustar_chaves(registro, destino, colunas_gravadas):
+    """Linha nova com as mesmas chaves (e ordem) das linhas já gravadas"""
+    ajustado = dict.fromkeys(colunas_gravadas)
+    for origem, coluna in destino.items():
+        ajustado[coluna] = registro.get(origem)
+    return ajustado
+
+
+def _acrescentar(json_filepath, cabecalho, registros):
+    """Copia o JSON trocando o cabeçalho, acrescenta as linhas antes do fechamento de 'dados' e troca o arquivo de uma vez"""
+    temporario = json_filepath + '.tmp'
+    try:
+        with open(json_filepath, 'rb') as origem, open(temporario, 'w+b') as f:
+            if origem.readline() != b'{\n':
+                raise ValueError("formato inesperado")
+            # O cabeçalho antigo são as poucas linhas antes de 'dados'
+            for linha in origem:
+                if linha.startswith(INICIO_DADOS):
+                    break
+            else:
+                raise ValueError("formato inesperado")
+            f.write(b'{\n')
+            for chave, valor in cabecalho.items():
+                f.write(formatar_cabecalho(chave, valor).encode('utf-8'))
+            f.write(linha)
+            shutil.copyfileobj(origem, f)
+            if registros:
+                f.seek(-len(FIM_DADOS), os.SEEK_END)
+                if f.read() != FIM_DADOS:
+                    raise ValueError("formato inesperado")
+                f.seek(-len(FIM_DADOS), os.SEEK_END)
+                f.truncate()
+                for registro in registros:
+                    f.write((',\n' + formatar_registro(registro)).encode('utf-8'))
+                f.write(FIM_DADOS)
+        os.replace(temporario, json_filepath)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def _regravar(json_filepath, cabecalho, registros):
+    """Caminho lento para JSON fora do formato padrão (ex.: sem linhas ou editado à mão)"""
+    with open(json_filepath, 'r', encoding='utf-8') as f:
+        dados_extrato = json.load(f)
+    dados_extrato = {**cabecalho, 'dados': dados_extrato['dados'] + registros}
+    temporario = json_filepath + '.tmp'
+    try:
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(dados_extrato, f, ensure_ascii=False, indent=4)
+        os.replace(temporario, json_filepath)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def atualizar_extrato_incremental(filepath, json_filepath, progresso=None, indice=None):
+    """Acrescenta ao extrato em json_filepath só as linhas da planilha que ainda não estão nele.
+
+    Cada linha é comparada pelo hash de (data, entrada, saída, descrição); linhas
+    repetidas contam tantas vezes quantas aparecem. Linhas novas a partir da
+    última data gravada são acrescentadas no fim do JSON. Linhas novas com data
+    anterior indicam que o banco alterou o histórico: não são gravadas e voltam
+    em 'conflitos' para o usuário decidir; 'ausentes' conta as linhas gravadas,
+    no período da planilha, que não vieram nela. O JSON é trocado de uma vez
+    (cópia + os.replace), mesmo sem linhas novas, com o cabeçalho apontando
+    para a nova planilha. Extratos importados de uma aba que não é a primeira
+    são comparados com a aba de mesmo nome.
+
+    Devolve um resumo com arquivo_origem, aba, data_processamento, linhas
+    (total), novas, existentes, conflitos e ausentes.
+    """
+    if indice is None:
+        with etapa('indice'):
+            indice = IndiceLinhas(json_filepath)
+    restantes = Counter(indice.contagem)
+    novas, conflitos, existentes = [], [], 0
+    colunas_novas = None
+    primeira_data = ultima_data = None
+
+    with etapa('leitura_comparacao') as medicao:
+        for registro in ler_registros(filepath, progresso, indice.aba):
+            if colunas_novas is None:
+                colunas_novas = list(registro.keys())
+                mapa = identificar_colunas(colunas_novas)
+            normalizada = normalizar_linha(registro, mapa)
+            data = normalizada[0]
+            primeira_data = data if primeira_data is None else min(primeira_data, data)
+            ultima_data = data if ultima_data is None else max(ultima_data, data)
+            chave = hash_linha(normalizada)
+            if restantes[chave] > 0:
+                restantes[chave] -= 1
+                existentes += 1
+            elif indice.linhas and data < indice.ultima_data:
+                # O último dia gravado pode ter sido exportado pela metade; antes dele, é alteração
+                conflitos.append(registro)
+            else:
+                novas.append(registro)
+        medicao.linhas = existentes + len(conflitos) + len(novas)
+
+    # Linhas gravadas no período coberto pela planilha que não vieram nela
+    ausentes = sum(
+        quantidade for chave, quantidade in restantes.items()
+        if quantidade > 0 and primeira_data is not None and primeira_data <= chave.rsplit(':', 1)[0] <= ultima_data
+    )
+
+    if novas:
+        if progresso is not None:
+            progresso(0.95, f"Gravando {len(novas)} linhas novas")
+        if indice.colunas:
+            destino = _mapear_colunas(colunas_novas, indice.colunas)
+            novas = [_ajustar_chaves(registro, destino, indice.colunas) for registro in novas]
+        else:
+            indice.colunas = colunas_novas
+    cabecalho = cabecalho_json(filepath, indice.aba)
+    with etapa('gravacao', len(novas)):
+        try:
+            _acrescentar(json_filepath, cabecalho, novas)
+        except ValueError:
+            _regravar(json_filepath, cabecalho, novas)
+    indice.adicionar(novas)
+    indice.arquivo_origem = cabecalho['arquivo_origem']
+    indice.salvar()
+
+    return {
+        'arquivo_origem': indice.arquivo_origem,
+        'aba': indice.aba,
+        'data_processamento': cabecalho['data_processamento'],
+        'linhas': indice.linhas,
+        'novas': len(novas),
+        'existentes': existentes,
+        'conflitos': conflitos,
+        'ausentes': ausentes
+    }
@@ -0,0 +1,164 @@
+import json
+import os
+
+from services.bibliotecas import pd
+from services.cache_classificacao import CacheClassificacao
+from services.catalogo import DIRETORIO_PLANOS, catalogo_planos
+from services.diagnostico import etapa
+from services.lancamentos import IndiceContas, tokenizar
+from services.planos import gravar_plano
+from services.repositorio import CAMINHO_BANCO, Repositorio, chaves_contas
+
+TIPOS_ALTERACAO = ('adicionadas', 'removidas', 'renomeadas', 'reclassificadas')
+
+
+def ler_plano_gravado(arquivo):
+    with open(os.path.join(DIRETORIO_PLANOS, arquivo), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def escolher_plano(planos, plano_antigo):
+    """Plano de processar_planos que corresponde ao gravado: o único, ou o da mesma empresa"""
+    if len(planos) == 1:
+        return next(iter(planos.values()))
+    for plano in planos.values():
+        if plano['empresa'] == plano_antigo['empresa']:
+            return plano
+    raise ValueError(f"A planilha tem {len(planos)} planos de contas e nenhum da empresa {plano_antigo['empresa']}")
+
+
+def comparar_planos(antigas, novas):
+    """Diferença entre duas listas de contas por hash join no código.
+
+    As contas gravadas formam a tabela de hash; cada conta da planilha nova é
+    procurada nela uma vez, e o que sobra na tabela foi removido. Uma conta
+    com nome novo é renomeada; com classificação, tipo ou grau novos,
+    reclassificada (pode estar nas duas listas). Renomeadas e reclassificadas
+    vêm como pares (antiga, nova).
+    """
+    tabela = dict(chaves_contas(antigas))
+    diferenca = {tipo: [] for tipo in TIPOS_ALTERACAO}
+    diferenca['inalteradas'] = 0
+    for chave, nova in chaves_contas(novas):
+        antiga = tabela.pop(chave, None)
+        if antiga is None:
+            diferenca['adicionadas'].append(nova)
+            continue
+        renomeada = antiga['nome'] != nova['nome']
+        reclassificada = any(antiga[campo] != nova[campo] for campo in ('classificacao', 'tipo', 'grau'))
+        if renomeada:
+            diferenca['renomeadas'].append((antiga, nova))
+        if reclassificada:
+            diferenca['reclassificadas'].append((antiga, nova))
+        if not renomeada and not reclassificada:
+            diferenca['inalteradas'] += 1
+    diferenca['removidas'] = list(tabela.values())
+    return diferenca
+
+
+def plano_alterado(diferenca):
+    return any(diferenca[tipo] for tipo in TIPOS_ALTERACAO)
+
+
+def resumo_diferenca(diferenca):
+    """Texto curto com a quantidade de cada tipo de alteração"""
+    partes = [f"{len(diferenca[tipo])} {tipo}" for tipo in TIPOS_ALTERACAO if diferenca[tipo]]
+    partes.append(f"{diferenca['inalteradas']} inalteradas")
+    return ", ".join(partes)
+
+
+def tabelas_diferenca(diferenca):
+    """Um DataFrame por tipo de alteração, para exibir em JanelaTabelas"""
+    colunas = ['codigo', 'classificacao', 'tipo', 'nome', 'grau']
+    tabelas = {
+        'Adicionadas': pd.DataFrame(diferenca['adicionadas'], columns=colunas),
+        'Removidas': pd.DataFrame(diferenca['removidas'], columns=colunas),
+    }
+    for tipo, titulo, campos in (('renomeadas', 'Renomeadas', ('nome',)),
+                                 ('reclassificadas', 'Reclassificadas', ('classificacao', 'tipo', 'grau'))):
+        colunas_tipo = ['codigo'] + ([] if 'nome' in campos else ['nome'])
+        colunas_tipo += [f'{campo}_{versao}' for campo in campos for versao in ('anterior', 'novo')]
+        linhas = []
+        for antiga, nova in diferenca[tipo]:
+            linha = {'codigo': nova['codigo'], 'nome': nova['nome']}
+            for campo in campos:
+                linha[f'{campo}_anterior'] = antiga[campo]
+                linha[f'{campo}_novo'] = nova[campo]
+            linhas.append(linha)
+        tabelas[titulo] = pd.DataFrame(linhas, columns=colunas_tipo)
+    return tabelas
+
+
+def entradas_invalidas(diferenca, contas):
+    """Critério para CacheClassificacao.migrar: quais classificações guardadas podem mudar com o plano novo.
+
+    Saem as entradas que apontam para contas removidas, renomeadas ou
+    reclassificadas e as que têm algum token do nome (antigo ou novo) de uma
+    conta alterada. Se entraram nomes novos, saem também as entradas sem
+    nenhum token indexado, que foram resolvidas por trigramas ou ficaram sem
+    conta. As demais continuam valendo, com uma aproximação: as contas
+    candidatas e seus tokens são os mesmos, mas os pesos IDF dependem do
+    número total de contas e mudam um pouco.
+    """
+    alteradas = list(diferenca['adicionadas']) + list(diferenca['removidas'])
+    for tipo in ('renomeadas', 'reclassificadas'):
+        for antiga, nova in diferenca[tipo]:
+            alteradas.extend((antiga, nova))
+    codigos = {conta['codigo'] for conta in diferenca['removidas']}
+    codigos.update(antiga['codigo'] for tipo in ('renomeadas', 'reclassificadas') for antiga, _ in diferenca[tipo])
+    tokens = set()
+    for conta in alteradas:
+        tokens.update(tokenizar(conta['nome']))
+    nomes_novos = bool(diferenca['adicionadas'] or diferenca['renomeadas'])
+    indexados = set(IndiceContas(contas).pesos) if nomes_novos else set()
+
+    def invalida(chave, codigo):
+        if codigo in codigos:
+            return True
+        tokens_chave = chave[2:].split()
+        if not tokens.isdisjoint(tokens_chave):
+            return True
+        return nomes_novos and indexados.isdisjoint(tokens_chave)
+
+    return invalida
+
+
+def aplicar_atualizacao(arquivo, plano_novo, diferenca, progresso=None):
+    """Grava a nova versão do plano arquivo (em data/) e atualiza o que depende dele.
+
+    diferenca é a de comparar_planos entre o plano gravado e plano_novo.
+    O cache de classificação é migrado para o novo hash perdendo só as
+    entradas afetadas, e o banco SQLite, se existir e estiver em dia com a
+    versão anterior, recebe só as contas que mudaram. Devolve um resumo com
+    as entradas do cache mantidas e descartadas e as linhas alteradas no banco.
+    """
+    json_filepath = os.path.join(DIRETORIO_PLANOS, arquivo)
+    catalogo = catalogo_planos()
+    catalogo.atualizar()
+    hash_antigo = catalogo.entradas[arquivo]['hash']
+
+    if progresso is not None:
+        progresso(0.1, "Gravando plano")
+    gravar_plano(plano_novo, json_filepath, catalogo)
+    hash_novo = catalogo.entradas[arquivo]['hash']
+    resumo = {'cache_mantidas': 0, 'cache_descartadas': 0, 'linhas_banco': None}
+
+    if progresso is not None:
+        progresso(0.5, "Atualizando cache de classificação")
+    with etapa('cache_classificacao') as medicao:
+        cache = CacheClassificacao(arquivo, hash_antigo)
+        medicao.linhas = len(cache)
+        if len(cache):
+            resumo['cache_descartadas'] = cache.migrar(hash_novo, entradas_invalidas(diferenca, plano_novo['contas']))
+            resumo['cache_mantidas'] = len(cache)
+            cache.salvar()
+
+    if os.path.exists(CAMINHO_BANCO):
+        if progresso is not None:
+            progresso(0.8, "Atualizando banco")
+        with etapa('banco'), Repositorio(CAMINHO_BANCO) as repositorio:
+            # Banco desatualizado é ressincronizado por inteiro na próxima abertura
+            if repositorio.hash_plano(arquivo) == hash_antigo:
+                resumo['linhas_banco'] = repositorio.atualizar_plano(arquivo, plano_novo, hash_novo, diferenca)
+    return resumo
+
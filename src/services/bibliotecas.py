@@ -0,0 +1,59 @@
+import importlib
+import threading
+
+from services.diagnostico import execucao
+
+
+class ModuloAdiado:
+    """Módulo importado só no primeiro acesso a um atributo.
+
+    pandas, numpy e openpyxl levam a maior parte do tempo de abertura do
+    programa; os serviços os usam por meio destes objetos, de modo que a
+    janela principal aparece antes de qualquer um deles ser carregado.
+    """
+
+    def __init__(self, nome):
+        self._nome = nome
+        self._modulo = None
+
+    def carregar(self):
+        # import_module já serializa importações simultâneas do mesmo módulo
+        if self._modulo is None:
+            modulo = importlib.import_module(self._nome)
+            # Copia os atributos para o próprio objeto: depois da carga, pd.isna e np.int64
+            # são encontrados sem passar por __getattr__, o que pesa nos laços por linha
+            vars(self).update(vars(modulo))
+            self._modulo = modulo
+        return self._modulo
+
+    def __getattr__(self, atributo):
+        return getattr(self.carregar(), atributo)
+
+    def __repr__(self):
+        situacao = 'carregado' if self._modulo is not None else 'não carregado'
+        return f"<módulo adiado {self._nome} ({situacao})>"
+
+
+np = ModuloAdiado('numpy')
+pd = ModuloAdiado('pandas')
+openpyxl = ModuloAdiado('openpyxl')
+
+
+def carregadas():
+    return all(modulo._modulo is not None for modulo in (np, pd, openpyxl))
+
+
+def precarregar():
+    """Importa as bibliotecas pesadas agora, em vez de no primeiro uso"""
+    with execucao('precarregar_bibliotecas'):
+        for modulo in (np, pd, openpyxl):
+            modulo.carregar()
+
+
+def precarregar_em_segundo_plano():
+    """Importa as bibliotecas em uma thread, para que a primeira importação de planilha não espere por elas"""
+    if carregadas():
+        return None
+    thread = threading.Thread(target=precarregar, name='precarregar_bibliotecas', daemon=True)
+    thread.start()
+    return thread
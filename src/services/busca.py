@@ -0,0 +1,274 @@
+import re
+import unicodedata
+from bisect import bisect_left
+
+from services.bibliotecas import np
+from services.layouts import identificar_colunas
+from services.repositorio import Repositorio
+
+# Maior caractere possível: prefixo + SENTINELA fica depois de toda chave com o prefixo
+SENTINELA = '\U0010ffff'
+
+# Linha sem data: depois de qualquer 'AAAA-MM-DD'
+SEM_DATA = '9999-99-99'
+
+# Descrições encontradas acima das quais as linhas são marcadas em vez de juntar as faixas de cada uma
+LIMITE_FAIXAS = 256
+
+# Linhas indexadas entre duas chamadas do callback de progresso
+INTERVALO_PROGRESSO = 20000
+
+_PADRAO_TERMO = re.compile(r'\w+')
+
+
+def termos(texto):
+    """Palavras do texto sem acento e em minúsculas, números incluídos (nº de documento, NF)"""
+    texto = unicodedata.normalize('NFKD', str(texto).lower()).encode('ascii', 'ignore').decode('ascii')
+    return _PADRAO_TERMO.findall(texto)
+
+
+def _faixa(chaves, prefixo):
+    """(início, fim) das chaves ordenadas que começam com prefixo"""
+    return bisect_left(chaves, prefixo), bisect_left(chaves, prefixo + SENTINELA)
+
+
+def _vazio():
+    # Função, não constante: numpy só é carregado quando a busca é usada
+    return np.zeros(0, dtype=np.int64)
+
+
+def _uniao(conjuntos):
+    if not conjuntos:
+        return _vazio()
+    if len(conjuntos) == 1:
+        return conjuntos[0]
+    return np.unique(np.concatenate(conjuntos))
+
+
+def _conjunto(posicoes, total):
+    """Posições (entre 0 e total) ordenadas e sem repetição"""
+    if len(posicoes) > total // 32:
+        # Muitas posições (prefixo curto, faixa larga): marcar é mais barato que ordenar
+        marcados = np.zeros(total, dtype=bool)
+        marcados[posicoes] = True
+        return np.flatnonzero(marcados)
+    return np.unique(posicoes)
+
+
+def _intersecao(conjuntos):
+    """Interseção de arrays ordenados e sem repetição, começando pelo menor"""
+    conjuntos = sorted(conjuntos, key=len)
+    resultado = conjuntos[0]
+    for conjunto in conjuntos[1:]:
+        if not len(resultado):
+            break
+        resultado = np.intersect1d(resultado, conjunto, assume_unique=True)
+    return resultado
+
+
+class IndicePrefixo:
+    """Chaves ordenadas (código, classificação) para busca por prefixo com bisect"""
+
+    def __init__(self, chaves):
+        ordem = sorted(range(len(chaves)), key=chaves.__getitem__)
+        self.chaves = [chaves[posicao] for posicao in ordem]
+        self.posicoes = np.array(ordem, dtype=np.int64)
+
+    def buscar(self, prefixo):
+        """Posições (ordenadas) das chaves que começam com prefixo"""
+        inicio, fim = _faixa(self.chaves, prefixo)
+        return np.sort(self.posicoes[inicio:fim])
+
+
+class IndiceTermos:
+    """Índice invertido das palavras de uma lista de textos, com busca por prefixo de palavra.
+
+    O vocabulário fica ordenado e as listas de textos de cada palavra ficam
+    em um único array, na mesma ordem: as palavras que começam com um
+    prefixo (o termo ainda sendo digitado) são uma faixa do vocabulário, e os
+    seus textos, uma fatia contígua do array.
+    """
+
+    def __init__(self, textos):
+        vocabulario, ids_termos, posicoes = {}, [], []
+        for posicao, texto in enumerate(textos):
+            for termo in set(termos(texto)):
+                ids_termos.append(vocabulario.setdefault(termo, len(vocabulario)))
+                posicoes.append(posicao)
+        self.total = len(textos)
+        self.vocabulario = sorted(vocabulario)
+
+        # Ids na ordem de chegada -> posição no vocabulário ordenado
+        ordem = np.empty(len(vocabulario), dtype=np.int64)
+        ordem[[vocabulario[termo] for termo in self.vocabulario]] = np.arange(len(vocabulario))
+        ids_termos = ordem[np.array(ids_termos, dtype=np.int64)]
+        posicoes = np.array(posicoes, dtype=np.int64)
+        arranjo = np.lexsort((posicoes, ids_termos))
+        self.textos = posicoes[arranjo]
+        self.inicio = np.concatenate(([0], np.cumsum(np.bincount(ids_termos, minlength=len(vocabulario)))))
+
+    def buscar(self, prefixo):
+        """Posições (ordenadas) dos textos com alguma palavra que começa com prefixo"""
+        inicio, fim = _faixa(self.vocabulario, prefixo)
+        encontrados = self.textos[self.inicio[inicio]:self.inicio[fim]]
+        if fim - inicio <= 1:
+            return encontrados
+        return _conjunto(encontrados, self.total)
+
+
+class IndicePlano:
+    """Busca no plano de contas por prefixo de código ou classificação e por palavras do nome.
+
+    Cada termo da consulta casa com as contas cujo código ou classificação
+    começam com ele ou com alguma palavra do nome que começa com ele; a conta
+    tem de casar com todos os termos.
+    """
+
+    def __init__(self, contas):
+        self.codigos = IndicePrefixo([str(conta['codigo']) for conta in contas])
+        self.classificacoes = IndicePrefixo([str(conta['classificacao']) for conta in contas])
+        self.nomes = IndiceTermos([conta['nome'] for conta in contas])
+
+    def buscar(self, texto):
+        """Posições das contas (na ordem do plano) que casam com texto; None se a consulta é vazia"""
+        consulta = str(texto).split()
+        if not consulta:
+            return None
+        conjuntos = []
+        for termo in consulta:
+            # Código e classificação como digitados; o nome pelas palavras normalizadas
+            encontrados = [self.codigos.buscar(termo), self.classificacoes.buscar(termo)]
+            palavras = termos(termo)
+            if palavras:
+                encontrados.append(_intersecao([self.nomes.buscar(palavra) for palavra in palavras]))
+            conjuntos.append(_uniao([conjunto for conjunto in encontrados if len(conjunto)]))
+        return _intersecao(conjuntos)
+
+
+def _numeros(valores):
+    resultado = np.full(len(valores), np.nan)
+    for posicao, valor in enumerate(valores):
+        try:
+            resultado[posicao] = float(valor) if valor not in (None, '') else np.nan
+        except (TypeError, ValueError):
+            pass
+    return resultado
+
+
+class IndiceExtrato:
+    """Busca nas linhas de um extrato por palavras da descrição e por faixas de data e valor.
+
+    As descrições iguais (comuns em extratos: tarifas, o mesmo fornecedor)
+    são indexadas uma vez só; cada uma aponta para a faixa das suas linhas em
+    uma ordenação por descrição. Datas e valores ficam ordenados, e uma faixa
+    vira um searchsorted. O valor de uma linha é a entrada ou a saída, sem
+    sinal. Os filtros informados são combinados por interseção. O índice
+    guarda a lista de linhas (sem copiar) para a tabela mostrar as filtradas.
+    """
+
+    def __init__(self, linhas, progresso=None):
+        colunas = identificar_colunas(linhas[0].keys()) if linhas else {}
+        self.linhas = linhas
+        self.total = len(linhas)
+
+        descricoes, codigos, datas, entradas, saidas = {}, [], [], [], []
+        for posicao, linha in enumerate(linhas):
+            if progresso is not None and posicao % INTERVALO_PROGRESSO == 0:
+                progresso(0.3 * posicao / len(linhas), f"Lendo linha {posicao}")
+            codigos.append(descricoes.setdefault(str(linha.get(colunas.get('descricao')) or ''), len(descricoes)))
+            datas.append(linha.get(colunas.get('data')))
+            entradas.append(linha.get(colunas.get('entradas')))
+            saidas.append(linha.get(colunas.get('saidas')))
+
+        if progresso is not None:
+            progresso(0.3, f"Indexando {len(descricoes)} descrições")
+        self.descricoes = IndiceTermos(list(descricoes))
+        if progresso is not None:
+            progresso(0.9, "Ordenando datas e valores")
+        codigos = np.array(codigos, dtype=np.int64)
+        self.descricao_linha = codigos
+        self.por_descricao = np.argsort(codigos, kind='stable')
+        self.inicio_descricao = np.concatenate(([0], np.cumsum(np.bincount(codigos, minlength=len(descricoes)))))
+
+        # Datas 'AAAA-MM-DD' comparam como texto; linhas sem data ficam no fim, fora de qualquer faixa
+        datas = np.array([str(data)[:10] if data else SEM_DATA for data in datas])
+        self.por_data = np.argsort(datas, kind='stable')
+        self.datas = datas[self.por_data]
+        self.com_data = int(np.searchsorted(self.datas, SEM_DATA))
+
+        # Valores vazios (nan) ficam no fim, como as datas
+        entradas, saidas = _numeros(entradas), _numeros(saidas)
+        valores = np.where(np.nan_to_num(entradas) != 0, np.abs(entradas), np.abs(saidas))
+        self.por_valor = np.argsort(valores, kind='stable')
+        self.valores = valores[self.por_valor]
+        self.com_valor = int(np.count_nonzero(~np.isnan(valores)))
+
+    def _linhas_das_descricoes(self, ids):
+        if len(ids) > LIMITE_FAIXAS:
+            marcadas = np.zeros(len(self.inicio_descricao) - 1, dtype=bool)
+            marcadas[ids] = True
+            return np.flatnonzero(marcadas[self.descricao_linha])
+        faixas = [self.por_descricao[self.inicio_descricao[id_]:self.inicio_descricao[id_ + 1]] for id_ in ids]
+        return _conjunto(np.concatenate(faixas), self.total) if faixas else _vazio()
+
+    def _faixa_ordenada(self, ordenados, ordem, preenchidos, minimo, maximo):
+        """Linhas com o campo entre minimo e maximo; as preenchidos primeiras de ordenados têm o campo"""
+        ordenados = ordenados[:preenchidos]
+        inicio = 0 if minimo is None else np.searchsorted(ordenados, minimo, side='left')
+        fim = preenchidos if maximo is None else np.searchsorted(ordenados, maximo, side='right')
+        return _conjunto(ordem[inicio:fim], self.total)
+
+    def filtrar(self, texto='', data_inicial=None, data_final=None, valor_minimo=None, valor_maximo=None):
+        """Posições das linhas (na ordem do extrato) que passam em todos os filtros; None sem filtros.
+
+        Datas no formato 'AAAA-MM-DD', inclusive; valores inclusive.
+        """
+        conjuntos = []
+        palavras = termos(texto)
+        if palavras:
+            ids = _intersecao([self.descricoes.buscar(palavra) for palavra in palavras])
+            conjuntos.append(self._linhas_das_descricoes(ids))
+        if data_inicial is not None or data_final is not None:
+            conjuntos.append(self._faixa_ordenada(self.datas, self.por_data, self.com_data, data_inicial, data_final))
+        if valor_minimo is not None or valor_maximo is not None:
+            conjuntos.append(self._faixa_ordenada(self.valores, self.por_valor, self.com_valor, valor_minimo, valor_maximo))
+        if not conjuntos:
+            return None
+        return _intersecao(conjuntos)
+
+
+def indexar_extrato(linhas, progresso=None):
+    """IndiceExtrato das linhas; para rodar como Tarefa"""
+    return IndiceExtrato(linhas, progresso)
+
+
+def indexar_extrato_banco(arquivo, progresso=None):
+    """IndiceExtrato de um extrato do banco SQLite, lido na thread da tarefa (a conexão é dela)"""
+    if progresso is not None:
+        progresso(0.0, "Lendo as linhas do banco")
+    with Repositorio.existente() as repositorio:
+        linhas = repositorio.linhas(arquivo)
+    return IndiceExtrato(linhas, progresso)
+
+
+def ler_data(texto):
+    """'DD/MM/AAAA' ou 'AAAA-MM-DD' digitados em 'AAAA-MM-DD'; None se vazio ou incompleto"""
+    texto = texto.strip()
+    if re.fullmatch(r'\d{4}-\d{2}-\d{2}', texto):
+        return texto
+    partes = re.fullmatch(r'(\d{1,2})/(\d{1,2})/(\d{4})', texto)
+    if partes:
+        dia, mes, ano = partes.groups()
+        return f'{ano}-{int(mes):02d}-{int(dia):02d}'
+    return None
+
+
+def ler_valor(texto):
+    """'1.234,56' ou '1234.56' digitados em float; None se vazio ou inválido"""
+    texto = texto.strip()
+    if ',' in texto:
+        texto = texto.replace('.', '').replace(',', '.')
+    try:
+        return float(texto) if texto else None
+    except ValueError:
+        return None
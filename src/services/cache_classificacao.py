@@ -0,0 +1,120 @@
+import json
+import os
+from collections import OrderedDict
+
+from services.catalogo import catalogo_planos
+
+DIRETORIO_CACHE = os.path.join('cache', 'classificacao')
+CAPACIDADE_PADRAO = 50000
+VERSAO_CACHE = 2
+
+# Diferencia "não está no cache" de "está no cache sem conta" (None)
+AUSENTE = object()
+
+
+class CacheClassificacao:
+    """Cache LRU histórico normalizado -> código da conta, gravado entre sessões.
+
+    Há um arquivo por plano de contas; o hash do conteúdo do plano fica gravado
+    junto e, se o plano mudar, o cache é descartado ao ser aberto.
+    """
+
+    def __init__(self, arquivo_plano, hash_plano, capacidade=CAPACIDADE_PADRAO, diretorio=DIRETORIO_CACHE):
+        self.arquivo_plano = arquivo_plano
+        self.hash_plano = hash_plano
+        self.capacidade = capacidade
+        self.caminho = os.path.join(diretorio, os.path.splitext(arquivo_plano)[0] + '.json')
+        self.acertos = 0
+        self.falhas = 0
+        self.alterado = False
+        # Chaves guardadas desde a abertura (ou desde novas.clear()), para mesclar caches de outros processos
+        self.novas = {}
+        self.entradas = self._ler()
+
+    @classmethod
+    def para_plano(cls, arquivo_plano, **kwargs):
+        """Abre o cache do plano em data/, usando o hash registrado no catálogo"""
+        catalogo = catalogo_planos()
+        catalogo.atualizar()
+        return cls(arquivo_plano, catalogo.entradas[arquivo_plano]['hash'], **kwargs)
+
+    def _ler(self):
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                conteudo = json.load(f)
+            if conteudo.get('versao') == VERSAO_CACHE and conteudo.get('hash') == self.hash_plano:
+                entradas = OrderedDict(conteudo['entradas'])
+                while len(entradas) > self.capacidade:
+                    entradas.popitem(last=False)
+                return entradas
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return OrderedDict()
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def obter(self, chave):
+        """Código guardado para a chave (ou None se a linha não tinha conta); AUSENTE se não houver"""
+        codigo = self.entradas.get(chave, AUSENTE)
+        if codigo is AUSENTE:
+            self.falhas += 1
+        else:
+            self.acertos += 1
+            self.entradas.move_to_end(chave)
+        return codigo
+
+    def guardar(self, chave, codigo):
+        self.novas[chave] = codigo
+        self.entradas[chave] = codigo
+        self.entradas.move_to_end(chave)
+        if len(self.entradas) > self.capacidade:
+            self.entradas.popitem(last=False)
+        self.alterado = True
+
+    def mesclar(self, entradas):
+        """Guarda as entradas novas de outra cópia do cache (ex.: de um processo de trabalho)"""
+        for chave, codigo in entradas.items():
+            self.guardar(chave, codigo)
+
+    def migrar(self, hash_plano, invalida):
+        """Passa o cache para outra versão do plano, descartando só as entradas
+        em que invalida(chave, codigo) é verdadeiro; devolve quantas saíram"""
+        descartadas = [chave for chave, codigo in self.entradas.items() if invalida(chave, codigo)]
+        for chave in descartadas:
+            del self.entradas[chave]
+            self.novas.pop(chave, None)
+        self.hash_plano = hash_plano
+        self.alterado = True
+        return len(descartadas)
+
+    def limpar(self):
+        self.novas.clear()
+        self.entradas.clear()
+        self.alterado = True
+
+    def salvar(self):
+        """Grava o cache (do menos para o mais recente) se houve alteração"""
+        if not self.alterado:
+            return
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        temporario = self.caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({
+                'versao': VERSAO_CACHE,
+                'plano': self.arquivo_plano,
+                'hash': self.hash_plano,
+                'entradas': list(self.entradas.items())
+            }, f, ensure_ascii=False)
+        os.replace(temporario, self.caminho)
+        self.alterado = False
+
+    def estatisticas(self):
+        consultas = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+            'tamanho': len(self.entradas),
+            'capacidade': self.capacidade
+        }
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+
+from services.diagnostico import etapa
+
+DIRETORIO_PLANOS = 'data'
+DIRETORIO_EXTRATOS = 'extratos'
+NOME_CATALOGO = '.catalogo'
+VERSAO_CATALOGO = 1
+TAMANHO_BLOCO_HASH = 1024 * 1024
+
+
+class Catalogo:
+    """Metadados dos arquivos JSON de um diretório (data/ ou extratos/).
+
+    Guarda, para cada arquivo, o campo identificador (empresa ou arquivo de origem),
+    o número de linhas, tamanho, mtime e hash do conteúdo, para que as telas de
+    listagem não precisem abrir os JSON completos. Uma entrada só é recalculada
+    quando o mtime ou o tamanho do arquivo mudam.
+    """
+
+    def __init__(self, diretorio, campo, campo_linhas):
+        self.diretorio = diretorio
+        self.campo = campo
+        self.campo_linhas = campo_linhas
+        self.caminho = os.path.join(diretorio, NOME_CATALOGO)
+        self.entradas = self._ler()
+        self._indice = None
+
+    def _ler(self):
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                conteudo = json.load(f)
+            if conteudo.get('versao') == VERSAO_CATALOGO:
+                return conteudo['arquivos']
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}
+
+    def _salvar(self):
+        os.makedirs(self.diretorio, exist_ok=True)
+        temporario = self.caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({'versao': VERSAO_CATALOGO, 'arquivos': self.entradas}, f, ensure_ascii=False)
+        os.replace(temporario, self.caminho)
+
+    def montar_entrada(self, arquivo, dados=None, linhas=None):
+        """Calcula a entrada do catálogo para um arquivo do diretório.
+
+        Se linhas for informado, dados só precisa ter o campo identificador
+        (ex.: resumo devolvido por uma importação gravada em streaming).
+        """
+        caminho = os.path.join(self.diretorio, arquivo)
+        hash_conteudo = hashlib.sha256()
+        with open(caminho, 'rb') as f:
+            for bloco in iter(lambda: f.read(TAMANHO_BLOCO_HASH), b''):
+                hash_conteudo.update(bloco)
+        info = os.stat(caminho)
+        if dados is None:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+        if linhas is None:
+            linhas = len(dados.get(self.campo_linhas, []))
+        return {
+            'valor': dados[self.campo],
+            'linhas': linhas,
+            'tamanho': info.st_size,
+            'mtime': info.st_mtime_ns,
+            'hash': hash_conteudo.hexdigest()
+        }
+
+    def atualizar(self):
+        """Sincroniza o catálogo com o diretório, relendo só os arquivos alterados"""
+        alterado = False
+        presentes = set()
+        with etapa('catalogo_' + os.path.basename(self.diretorio)) as medicao:
+            relidos = 0
+            if os.path.exists(self.diretorio):
+                for arquivo in os.listdir(self.diretorio):
+                    if not arquivo.endswith('.json'):
+                        continue
+                    presentes.add(arquivo)
+                    info = os.stat(os.path.join(self.diretorio, arquivo))
+                    entrada = self.entradas.get(arquivo)
+                    if (entrada is None or entrada['mtime'] != info.st_mtime_ns
+                            or entrada['tamanho'] != info.st_size):
+                        self.entradas[arquivo] = self.montar_entrada(arquivo)
+                        relidos += 1
+                        alterado = True
+            # Linhas: arquivos relidos do disco (os demais vêm do catálogo)
+            medicao.linhas = relidos
+
+        for arquivo in set(self.entradas) - presentes:
+            del self.entradas[arquivo]
+            alterado = True
+
+        if alterado:
+            self._indice = None
+            self._salvar()
+
+    def listar(self):
+        """Lista (arquivo, entrada) em ordem alfabética"""
+        self.atualizar()
+        return [(arquivo, self.entradas[arquivo]) for arquivo in sorted(self.entradas)]
+
+    def registrar(self, arquivo, dados=None, linhas=None):
+        """Atualiza a entrada de um arquivo que acabou de ser gravado"""
+        self.registrar_entradas({arquivo: self.montar_entrada(arquivo, dados, linhas)})
+
+    def registrar_entradas(self, entradas):
+        """Grava de uma vez entradas já calculadas (ex.: por processos de importação em lote)"""
+        self.entradas.update(entradas)
+        self._indice = None
+        self._salvar()
+
+    def remover(self, arquivo):
+        """Remove a entrada de um arquivo excluído"""
+        if self.entradas.pop(arquivo, None) is not None:
+            self._indice = None
+            self._salvar()
+
+    def arquivos_por_valor(self, valor):
+        """Arquivos cujo campo identificador é igual a valor (ex.: planos de uma empresa)"""
+        if self._indice is None:
+            self._indice = {}
+            for arquivo in sorted(self.entradas):
+                self._indice.setdefault(self.entradas[arquivo]['valor'], []).append(arquivo)
+        return self._indice.get(valor, [])
+
+
+def catalogo_planos():
+    return Catalogo(DIRETORIO_PLANOS, 'empresa', 'contas')
+
+
+def catalogo_extratos():
+    return Catalogo(DIRETORIO_EXTRATOS, 'arquivo_origem', 'dados')
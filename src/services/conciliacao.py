@@ -0,0 +1,170 @@
+from services.bibliotecas import np, pd
+
+# Diferença máxima, em dias, entre a saída e a entrada de uma transferência
+JANELA_DIAS = 3
+
+COLUNAS_TRANSFERENCIAS = ['valor', 'dias', 'extrato_saida', 'posicao_saida', 'data_saida', 'descricao_saida',
+                          'extrato_entrada', 'posicao_entrada', 'data_entrada', 'descricao_entrada']
+COLUNAS_DUPLICADAS = ['extrato', 'posicao', 'data', 'entradas', 'saidas', 'descricao',
+                      'extrato_original', 'posicao_original']
+
+
+def _centavos(serie):
+    return np.rint(serie.to_numpy(dtype='float64') * 100).astype('int64')
+
+
+def _dias(serie):
+    return serie.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype('int64')
+
+
+def _descricoes(serie):
+    """Códigos inteiros das descrições normalizadas (espaços e maiúsculas não contam)"""
+    normalizadas = [' '.join(str(texto).split()).lower() if texto is not None and texto == texto else ''
+                    for texto in serie.tolist()]
+    return pd.factorize(pd.Series(normalizadas, dtype=object))[0]
+
+
+def encontrar_duplicadas(movimento):
+    """Linhas repetidas em extratos diferentes, como nas exportações com períodos sobrepostos.
+
+    Duas linhas são a mesma quando têm a mesma data, entrada, saída e descrição.
+    Repetições dentro de um extrato são legítimas (duas tarifas iguais no mesmo
+    dia), então a n-ésima ocorrência de uma linha em um extrato só é duplicata
+    da n-ésima ocorrência no extrato que vem antes em movimento. As linhas são
+    ordenadas pela chave uma vez e comparadas com a vizinha.
+
+    Devolve um DataFrame (COLUNAS_DUPLICADAS) com as linhas a descartar e a
+    linha mantida correspondente.
+    """
+    validas = movimento[movimento['data'].notna()]
+    ordem_extrato = pd.factorize(validas['extrato'])[0]
+    chaves = pd.DataFrame({
+        'dia': _dias(validas['data']),
+        'entradas': _centavos(validas['entradas']),
+        'saidas': _centavos(validas['saidas']),
+    })
+    # Só linhas com data e valores repetidos podem ser duplicatas; as descrições,
+    # que custam mais para normalizar, ficam restritas a elas
+    candidatas = chaves.duplicated(keep=False).to_numpy()
+    if not candidatas.any():
+        return pd.DataFrame(columns=COLUNAS_DUPLICADAS)
+    validas = validas[candidatas]
+    ordem_extrato = ordem_extrato[candidatas]
+    chaves = chaves[candidatas].reset_index(drop=True)
+    chaves['descricao'] = _descricoes(validas['descricao'])
+    # Ocorrência da linha dentro do seu extrato: 0 para a primeira, 1 para a segunda...
+    chaves['ocorrencia'] = chaves.assign(extrato=ordem_extrato) \
+        .groupby(['extrato', 'dia', 'entradas', 'saidas', 'descricao'], sort=False).cumcount().to_numpy()
+    colunas = [chaves[coluna].to_numpy() for coluna in chaves.columns]
+
+    # lexsort ordena pela última chave primeiro; o extrato só desempata
+    ordem = np.lexsort([ordem_extrato] + colunas[::-1])
+    novo_grupo = np.zeros(len(ordem), dtype=bool)
+    novo_grupo[0] = True
+    for coluna in colunas:
+        ordenada = coluna[ordem]
+        novo_grupo[1:] |= ordenada[1:] != ordenada[:-1]
+
+    inicio_grupo = np.flatnonzero(novo_grupo)
+    original = ordem[inicio_grupo[np.cumsum(novo_grupo) - 1]]
+    duplicada = ordem[~novo_grupo]
+    original = original[~novo_grupo]
+
+    resultado = validas.iloc[duplicada][['extrato', 'posicao', 'data', 'entradas', 'saidas', 'descricao']]
+    resultado = resultado.assign(
+        extrato_original=validas['extrato'].to_numpy()[original],
+        posicao_original=validas['posicao'].to_numpy()[original],
+    )
+    return resultado.sort_values(['extrato', 'posicao']).reset_index(drop=True)[COLUNAS_DUPLICADAS]
+
+
+def _lado(movimento, coluna):
+    """Linhas com valor em coluna ('entradas' ou 'saidas'), ordenadas por valor, data, extrato e posição"""
+    linhas = movimento[(movimento[coluna] > 0) & movimento['data'].notna()]
+    valores = _centavos(linhas[coluna])
+    dias = _dias(linhas['data'])
+    extratos = pd.factorize(linhas['extrato'])[0]
+    ordem = np.lexsort((linhas['posicao'].to_numpy(), extratos, dias, valores))
+    return linhas.iloc[ordem], valores[ordem].tolist(), dias[ordem].tolist()
+
+
+def _parear(valores_saida, dias_saida, extratos_saida, valores_entrada, dias_entrada, extratos_entrada, janela):
+    """Merge join das duas listas ordenadas por (valor, dia).
+
+    Cada saída fica com a primeira entrada ainda livre, de outro extrato, com o
+    mesmo valor e até janela dias de distância. Como as duas listas andam só
+    para a frente, o custo é linear mais o número de entradas que caem na
+    janela de cada saída.
+    """
+    pares = []
+    usada = [False] * len(valores_entrada)
+    j = 0
+    total_entradas = len(valores_entrada)
+    for i, (valor, dia) in enumerate(zip(valores_saida, dias_saida)):
+        # Avança as entradas de valor menor, de datas antes da janela ou já usadas
+        while j < total_entradas and (
+            valores_entrada[j] < valor
+            or (valores_entrada[j] == valor and dias_entrada[j] < dia - janela)
+            or usada[j]
+        ):
+            j += 1
+        k = j
+        while k < total_entradas and valores_entrada[k] == valor and dias_entrada[k] <= dia + janela:
+            if not usada[k] and extratos_entrada[k] != extratos_saida[i]:
+                usada[k] = True
+                pares.append((i, k))
+                break
+            k += 1
+    return pares
+
+
+def encontrar_transferencias(movimento, janela=JANELA_DIAS):
+    """Transferências entre contas da empresa: uma saída em um extrato e uma entrada
+    de mesmo valor em outro, com até janela dias de diferença.
+
+    As saídas e as entradas são ordenadas por (valor, data) e casadas em uma
+    única passada, em O(n log n) no total. Cada linha entra em no máximo um par.
+    Devolve um DataFrame com COLUNAS_TRANSFERENCIAS.
+    """
+    saidas, valores_saida, dias_saida = _lado(movimento, 'saidas')
+    entradas, valores_entrada, dias_entrada = _lado(movimento, 'entradas')
+    pares = _parear(
+        valores_saida, dias_saida, saidas['extrato'].tolist(),
+        valores_entrada, dias_entrada, entradas['extrato'].tolist(),
+        janela
+    )
+    if not pares:
+        return pd.DataFrame(columns=COLUNAS_TRANSFERENCIAS)
+
+    indices_saida, indices_entrada = (list(indices) for indices in zip(*pares))
+    saida = saidas.iloc[indices_saida].reset_index(drop=True)
+    entrada = entradas.iloc[indices_entrada].reset_index(drop=True)
+    return pd.DataFrame({
+        'valor': saida['saidas'],
+        'dias': (entrada['data'] - saida['data']).dt.days,
+        'extrato_saida': saida['extrato'],
+        'posicao_saida': saida['posicao'],
+        'data_saida': saida['data'],
+        'descricao_saida': saida['descricao'],
+        'extrato_entrada': entrada['extrato'],
+        'posicao_entrada': entrada['posicao'],
+        'data_entrada': entrada['data'],
+        'descricao_entrada': entrada['descricao'],
+    }).sort_values(['data_saida', 'extrato_saida', 'posicao_saida']).reset_index(drop=True)
+
+
+def conciliar(movimento, janela=JANELA_DIAS):
+    """Duplicadas e transferências do movimento de vários extratos (ver agregacao.extratos_para_dataframe).
+
+    As duplicadas saem antes da busca de transferências, para que uma saída
+    repetida em duas exportações não case com duas entradas.
+    """
+    duplicadas = encontrar_duplicadas(movimento)
+    if not duplicadas.empty:
+        descartar = pd.MultiIndex.from_frame(duplicadas[['extrato', 'posicao']])
+        chaves = pd.MultiIndex.from_frame(movimento[['extrato', 'posicao']])
+        movimento = movimento[~chaves.isin(descartar)]
+    return {
+        'duplicadas': duplicadas,
+        'transferencias': encontrar_transferencias(movimento, janela),
+    }
@@ -0,0 +1,231 @@
+import collections
+import datetime
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# CONTABIL_DIAGNOSTICO=1 liga tempos e contagens; =memoria também mede picos com tracemalloc
+VARIAVEL_AMBIENTE = 'CONTABIL_DIAGNOSTICO'
+NIVEL_MEMORIA = 'memoria'
+
+CAMINHO_LOG = os.path.join('cache', 'diagnostico.jsonl')
+MAXIMO_EXECUCOES = 50
+TAMANHO_MAXIMO_LOG = 1024 * 1024
+
+_local = threading.local()
+_trava = threading.Lock()
+_recentes = collections.deque(maxlen=MAXIMO_EXECUCOES)
+_tracemalloc_usuarios = 0
+
+
+def nivel():
+    """'' (desligado), '1' ou 'memoria', lido do ambiente a cada chamada"""
+    return os.environ.get(VARIAVEL_AMBIENTE, '').strip().lower()
+
+
+def ativo():
+    return nivel() not in ('', '0')
+
+
+def _mb(valor):
+    return round(valor / 1024 / 1024, 3)
+
+
+class Medicao:
+    """Tempo, linhas e pico de memória de uma etapa (ou de uma execução inteira).
+
+    O pico do tracemalloc é global: cada etapa o zera ao começar, então antes
+    disso o pico parcial das medições em aberto é guardado nelas. Com várias
+    importações simultâneas em threads, os picos de uma incluem as outras.
+    """
+
+    def __init__(self, nome, linhas=None, pai=None, memoria=False):
+        self.nome = nome
+        self.linhas = linhas
+        self.etapas = []
+        self.memoria = memoria
+        self.pico = None
+        self._pai = pai
+        self._inicio = time.perf_counter()
+        if memoria:
+            medicao = pai
+            while medicao is not None:
+                medicao._acumular_pico()
+                medicao = medicao._pai
+            tracemalloc.reset_peak()
+            self._base = tracemalloc.get_traced_memory()[0]
+            self._pico_parcial = 0
+
+    def _acumular_pico(self):
+        self._pico_parcial = max(self._pico_parcial, tracemalloc.get_traced_memory()[1] - self._base)
+
+    def encerrar(self):
+        self.duracao = time.perf_counter() - self._inicio
+        if self.memoria:
+            self._acumular_pico()
+            self.pico = self._pico_parcial
+
+    def como_dict(self):
+        resultado = {'nome': self.nome, 'duracao': round(self.duracao, 6)}
+        if self.linhas is not None:
+            resultado['linhas'] = self.linhas
+            if self.duracao > 0:
+                resultado['linhas_por_segundo'] = round(self.linhas / self.duracao)
+        if self.pico is not None:
+            resultado['pico_memoria_mb'] = _mb(self.pico)
+        if self.etapas:
+            resultado['etapas'] = [etapa.como_dict() for etapa in self.etapas]
+        return resultado
+
+
+class _SemMedicao:
+    """Usada quando o diagnóstico está desligado: aceita atribuições e não guarda nada"""
+    linhas = None
+
+    def __setattr__(self, nome, valor):
+        pass
+
+
+_SEM_MEDICAO = _SemMedicao()
+
+
+def _pilha():
+    if not hasattr(_local, 'pilha'):
+        _local.pilha = []
+    return _local.pilha
+
+
+def _iniciar_tracemalloc():
+    global _tracemalloc_usuarios
+    with _trava:
+        if _tracemalloc_usuarios == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracemalloc_usuarios += 1
+
+
+def _parar_tracemalloc():
+    global _tracemalloc_usuarios
+    with _trava:
+        _tracemalloc_usuarios -= 1
+        if _tracemalloc_usuarios == 0:
+            tracemalloc.stop()
+
+
+@contextmanager
+def etapa(nome, linhas=None):
+    """Mede um trecho da execução corrente da thread; fora de uma execução não faz nada.
+
+    O objeto devolvido aceita .linhas = n para registrar quantas linhas a etapa processou.
+    """
+    pilha = _pilha()
+    if not pilha:
+        yield _SEM_MEDICAO
+        return
+    medicao = Medicao(nome, linhas, pilha[-1], pilha[-1].memoria)
+    pilha[-1].etapas.append(medicao)
+    pilha.append(medicao)
+    try:
+        yield medicao
+    finally:
+        pilha.pop()
+        medicao.encerrar()
+
+
+@contextmanager
+def execucao(operacao, descricao=None):
+    """Registra uma operação completa (importação, atualização, listagem) e suas etapas.
+
+    Com o diagnóstico desligado, só devolve um objeto inerte. Dentro de outra
+    execução da mesma thread, vira uma etapa dela. Ao terminar, a execução vai
+    para a lista das recentes e é acrescentada ao log em CAMINHO_LOG.
+    """
+    if _pilha():
+        with etapa(operacao) as medicao:
+            yield medicao
+        return
+    if not ativo():
+        yield _SEM_MEDICAO
+        return
+
+    memoria = nivel() == NIVEL_MEMORIA
+    if memoria:
+        _iniciar_tracemalloc()
+    inicio = datetime.datetime.now()
+    medicao = Medicao(operacao, memoria=memoria)
+    _pilha().append(medicao)
+    situacao, erro = 'ok', None
+    try:
+        yield medicao
+    except BaseException as e:
+        situacao = 'cancelada' if e.__class__.__name__ == 'TarefaCancelada' else 'erro'
+        erro = str(e) or e.__class__.__name__
+        raise
+    finally:
+        _pilha().pop()
+        medicao.encerrar()
+        if memoria:
+            _parar_tracemalloc()
+        registro = {
+            'operacao': operacao,
+            'descricao': descricao,
+            'inicio': inicio.isoformat(timespec='seconds'),
+            'processo': os.getpid(),
+            'situacao': situacao,
+        }
+        if erro is not None:
+            registro['erro'] = erro
+        medida = medicao.como_dict()
+        del medida['nome']
+        registro.update(medida)
+        _registrar(registro)
+
+
+def _registrar(registro):
+    with _trava:
+        _recentes.append(registro)
+        try:
+            os.makedirs(os.path.dirname(CAMINHO_LOG), exist_ok=True)
+            with open(CAMINHO_LOG, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            if os.path.getsize(CAMINHO_LOG) > TAMANHO_MAXIMO_LOG:
+                _podar_log()
+        except OSError:
+            # O diagnóstico nunca interrompe a operação medida
+            pass
+
+
+def _podar_log():
+    """Mantém no log só as últimas MAXIMO_EXECUCOES execuções"""
+    with open(CAMINHO_LOG, 'r', encoding='utf-8') as f:
+        linhas = f.readlines()[-MAXIMO_EXECUCOES:]
+    temporario = CAMINHO_LOG + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.writelines(linhas)
+    os.replace(temporario, CAMINHO_LOG)
+
+
+def execucoes_recentes(quantidade=MAXIMO_EXECUCOES):
+    """Últimas execuções do log (inclusive de outros processos e sessões), da mais recente para a mais antiga"""
+    try:
+        with open(CAMINHO_LOG, 'r', encoding='utf-8') as f:
+            linhas = collections.deque(f, maxlen=quantidade)
+        registros = []
+        for linha in linhas:
+            try:
+                registros.append(json.loads(linha))
+            except ValueError:
+                continue
+    except OSError:
+        with _trava:
+            registros = list(_recentes)[-quantidade:]
+    return registros[::-1]
+
+
+def limpar():
+    with _trava:
+        _recentes.clear()
+        if os.path.exists(CAMINHO_LOG):
+            os.remove(CAMINHO_LOG)
@@ -0,0 +1,196 @@
+import os
+from functools import lru_cache
+from itertools import islice
+
+from services.diagnostico import etapa
+
+# Lançamentos formatados e gravados de cada vez
+TAMANHO_LOTE = 10000
+
+# Buffer do arquivo de saída, em bytes
+TAMANHO_BUFFER = 1 << 20
+
+# Campos de um lançamento disponíveis para os layouts
+CAMPOS = ('data', 'debito', 'credito', 'valor', 'historico', 'extrato')
+
+
+@lru_cache(maxsize=4096)
+def _data(data, separador=''):
+    """'AAAA-MM-DD' (como gravado nos extratos) em 'DD<sep>MM<sep>AAAA'; as datas se repetem muito"""
+    if not data:
+        return ''
+    texto = str(data)
+    return f'{texto[8:10]}{separador}{texto[5:7]}{separador}{texto[:4]}'
+
+
+def _texto(valor):
+    """Texto em uma linha só (quebras de linha e tabulações viram espaço)"""
+    texto = str(valor) if valor else ''
+    if '\n' in texto or '\r' in texto or '\t' in texto:
+        texto = ' '.join(texto.split())
+    return texto
+
+
+class LayoutExportacao:
+    """Base dos layouts de importação do sistema contábil: cabeçalho opcional e uma linha por lançamento.
+
+    Um layout tem os campos (de CAMPOS) na ordem das colunas, um modelo de
+    str.format com um campo posicional por coluna e o fim de linha, e
+    converter(campo, valores), que formata a coluna inteira de um lote. Para
+    um layout novo basta implementar esses três (e o cabeçalho, se houver) e
+    registrá-lo com registrar_layout.
+    """
+
+    extensao = '.txt'
+    codificacao = 'cp1252'
+    fim_linha = '\r\n'
+
+    def __init__(self, nome, campos, modelo):
+        self.nome = nome
+        self.campos = list(campos)
+        self.modelo = modelo
+
+    def cabecalho(self):
+        return ''
+
+    def converter(self, campo, valores):
+        raise NotImplementedError
+
+    def formatar(self, lancamentos):
+        """Texto de um lote de lançamentos, já com as quebras de linha, montado coluna a coluna"""
+        colunas = [self.converter(campo, [lancamento[campo] for lancamento in lancamentos]) for campo in self.campos]
+        return ''.join(map(self.modelo.format, *colunas))
+
+
+class LayoutLarguraFixa(LayoutExportacao):
+    """TXT em que cada campo ocupa uma largura fixa.
+
+    campos é uma lista de (campo, largura), com campo em CAMPOS. Data sai como
+    DDMMAAAA, contas e valor (em centavos) alinhados à direita com zeros e
+    textos à esquerda com espaços, cortados na largura; conta vazia fica em
+    branco. Conta ou valor que não cabem na largura são erro: cortá-los
+    gravaria outro número.
+    """
+
+    FORMATOS = {
+        'data': '{:<%d.%d}',
+        'debito': '{:0>%d}',
+        'credito': '{:0>%d}',
+        'valor': '{:0%dd}',
+        'historico': '{:<%d.%d}',
+        'extrato': '{:<%d.%d}',
+    }
+
+    def __init__(self, nome, campos, fim_linha='\r\n'):
+        self.larguras = dict(campos)
+        self.fim_linha = fim_linha
+        modelo = ''.join(self.FORMATOS[campo].replace('%d', str(largura)) for campo, largura in campos)
+        super().__init__(nome, [campo for campo, _ in campos], modelo + fim_linha.replace('{', '{{'))
+
+    def converter(self, campo, valores):
+        largura = self.larguras[campo]
+        if campo == 'data':
+            return [_data(data) for data in valores]
+        if campo in ('debito', 'credito'):
+            # Conta vazia (lançamento sem contrapartida) sai em branco, não como zeros
+            branco = ' ' * largura
+            valores = [codigo or branco for codigo in valores]
+            if valores and max(map(len, valores)) > largura:
+                raise ValueError(f"Conta com mais de {largura} caracteres não cabe no layout {self.nome}")
+            return valores
+        if campo == 'valor':
+            centavos = [round(valor * 100) for valor in valores]
+            if centavos and max(centavos) >= 10 ** largura:
+                raise ValueError(f"Valor com mais de {largura} dígitos não cabe no layout {self.nome}")
+            return centavos
+        return [_texto(texto) for texto in valores]
+
+
+class LayoutCSV(LayoutExportacao):
+    """CSV com cabeçalho, data DD/MM/AAAA e valor com vírgula decimal.
+
+    colunas é uma lista de (campo, título), com campo em CAMPOS. Textos com o
+    separador ou aspas vão entre aspas.
+    """
+
+    extensao = '.csv'
+
+    def __init__(self, nome, colunas, separador=';', decimal=','):
+        self.titulos = [titulo for _, titulo in colunas]
+        self.separador = separador
+        self.decimal = decimal
+        modelo = separador.join(['{}'] * len(colunas)) + self.fim_linha
+        super().__init__(nome, [campo for campo, _ in colunas], modelo)
+
+    def _campo(self, texto):
+        if self.separador in texto or '"' in texto:
+            return '"' + texto.replace('"', '""') + '"'
+        return texto
+
+    def cabecalho(self):
+        return self.separador.join(self._campo(titulo) for titulo in self.titulos) + self.fim_linha
+
+    def converter(self, campo, valores):
+        if campo == 'data':
+            return [_data(data, '/') for data in valores]
+        if campo in ('debito', 'credito'):
+            return valores
+        if campo == 'valor':
+            return [f'{valor:.2f}'.replace('.', self.decimal) for valor in valores]
+        return [self._campo(_texto(texto)) for texto in valores]
+
+
+LAYOUTS = {}
+
+
+def registrar_layout(layout):
+    """Torna o layout disponível pelo nome para exportar_lancamentos e para a tela de lançamentos"""
+    LAYOUTS[layout.nome] = layout
+    return layout
+
+
+registrar_layout(LayoutLarguraFixa('TXT (largura fixa)', [
+    ('data', 8), ('debito', 10), ('credito', 10), ('valor', 15), ('historico', 200),
+]))
+registrar_layout(LayoutCSV('CSV (;)', [
+    ('data', 'Data'), ('debito', 'Débito'), ('credito', 'Crédito'), ('valor', 'Valor'), ('historico', 'Histórico'),
+]))
+
+
+def exportar_lancamentos(lancamentos, caminho, layout, total=None, progresso=None, tamanho_lote=TAMANHO_LOTE):
+    """Grava os lançamentos em caminho no layout (objeto ou nome em LAYOUTS), lote a lote.
+
+    lancamentos pode ser uma lista ou qualquer iterável (ex.: iterar_lancamentos):
+    só um lote de tamanho_lote lançamentos e o seu texto ficam em memória, e o
+    arquivo é escrito por um buffer. total, se o iterável não tiver len, serve
+    só para o progresso. O arquivo só substitui o anterior quando termina de
+    ser escrito. Devolve um resumo (caminho, layout, linhas).
+    """
+    if isinstance(layout, str):
+        layout = LAYOUTS[layout]
+    if total is None and hasattr(lancamentos, '__len__'):
+        total = len(lancamentos)
+    iterador = iter(lancamentos)
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    temporario = caminho + '.tmp'
+    linhas = 0
+    try:
+        # newline='': o fim de linha é o do layout, também no Linux
+        with etapa('exportacao') as medicao, open(temporario, 'w', encoding=layout.codificacao, errors='replace',
+                                                  newline='', buffering=TAMANHO_BUFFER) as f:
+            f.write(layout.cabecalho())
+            while True:
+                lote = list(islice(iterador, tamanho_lote))
+                if not lote:
+                    break
+                f.write(layout.formatar(lote))
+                linhas += len(lote)
+                if progresso is not None:
+                    progresso(min(1.0, linhas / total) if total else 0.5, f"{linhas} lançamentos gravados")
+            medicao.linhas = linhas
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    return {'caminho': caminho, 'layout': layout.nome, 'linhas': linhas}
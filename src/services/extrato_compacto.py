@@ -0,0 +1,238 @@
+import json
+import mmap
+import os
+import re
+import struct
+
+from services.bibliotecas import np
+
+EXTENSAO_COMPACTA = '.extrato'
+MAGIA = b'EXTC'
+VERSAO_FORMATO = 1
+ALINHAMENTO = 8
+
+# Cabeçalho fixo: magia, versão, tamanho do cabeçalho JSON
+_PREAMBULO = struct.Struct('<4sIQ')
+
+_PADRAO_DATA = re.compile(r'\d{4}-\d{2}-\d{2}\Z')
+
+TIPO_REAL = 'real'
+TIPO_INTEIRO = 'inteiro'
+TIPO_DATA = 'data'
+TIPO_TEXTO = 'texto'
+TIPO_OBJETO = 'objeto'
+
+
+def _data_valida(valor):
+    if not _PADRAO_DATA.match(valor):
+        return False
+    try:
+        return str(np.datetime64(valor, 'D')) == valor
+    except ValueError:
+        return False
+
+
+def _tipo_coluna(valores):
+    """Tipo de armazenamento que reproduz exatamente os valores da coluna"""
+    presentes = [valor for valor in valores if valor is not None]
+    tipos = set(map(type, presentes))
+    if tipos <= {float}:
+        return TIPO_REAL
+    if tipos == {int} and all(-2 ** 63 <= valor < 2 ** 63 for valor in presentes):
+        return TIPO_INTEIRO
+    if tipos == {str}:
+        return TIPO_DATA if all(_data_valida(valor) for valor in presentes) else TIPO_TEXTO
+    return TIPO_OBJETO
+
+
+def _tabela_textos(textos):
+    """Textos distintos concatenados em UTF-8, com deslocamentos, e o código de cada valor (-1 = nulo)"""
+    indices = {}
+    codigos = np.empty(len(textos), dtype='<i4')
+    for posicao, texto in enumerate(textos):
+        codigos[posicao] = -1 if texto is None else indices.setdefault(texto, len(indices))
+    blocos = [texto.encode('utf-8') for texto in indices]
+    deslocamentos = np.zeros(len(blocos) + 1, dtype='<i8')
+    np.cumsum([len(bloco) for bloco in blocos], out=deslocamentos[1:])
+    return codigos, deslocamentos, np.frombuffer(b''.join(blocos), dtype='u1')
+
+
+def _arrays_coluna(tipo, valores):
+    """Arrays gravados para uma coluna, por nome"""
+    nulos = np.array([valor is None for valor in valores], dtype='u1')
+    if tipo == TIPO_REAL:
+        return {'valores': np.array([np.nan if valor is None else valor for valor in valores], dtype='<f8'),
+                'nulos': nulos}
+    if tipo == TIPO_INTEIRO:
+        return {'valores': np.array([0 if valor is None else valor for valor in valores], dtype='<i8'),
+                'nulos': nulos}
+    if tipo == TIPO_DATA:
+        dias = np.array([valor or '1970-01-01' for valor in valores], dtype='datetime64[D]')
+        return {'valores': dias.astype('<i8'), 'nulos': nulos}
+    if tipo == TIPO_OBJETO:
+        valores = [None if valor is None else json.dumps(valor, ensure_ascii=False) for valor in valores]
+    codigos, deslocamentos, texto = _tabela_textos(valores)
+    return {'codigos': codigos, 'deslocamentos': deslocamentos, 'texto': texto}
+
+
+def gravar_extrato_compacto(dados_extrato, caminho):
+    """Grava o extrato (dicionário do JSON) no formato compacto, colunar.
+
+    Cada coluna vira um array contíguo: valores reais e inteiros em float64/int64,
+    datas 'AAAA-MM-DD' em dias desde 1970 (int64), textos em uma tabela de
+    textos distintos com um código int32 por linha. Nulos ficam em uma máscara
+    à parte. Colunas com tipos misturados são guardadas como JSON por valor.
+    Todas as linhas precisam ter as mesmas colunas, na mesma ordem.
+    """
+    linhas = dados_extrato['dados']
+    nomes = list(linhas[0].keys()) if linhas else []
+    for linha in linhas:
+        if list(linha.keys()) != nomes:
+            raise ValueError("Linhas do extrato com colunas diferentes não podem ser compactadas")
+
+    metadados = {chave: valor for chave, valor in dados_extrato.items() if chave != 'dados'}
+    colunas, arrays = [], []
+    deslocamento = 0
+    for nome in nomes:
+        valores = [linha[nome] for linha in linhas]
+        tipo = _tipo_coluna(valores)
+        descricao = {'nome': nome, 'tipo': tipo, 'arrays': {}}
+        for papel, array in _arrays_coluna(tipo, valores).items():
+            descricao['arrays'][papel] = [deslocamento, array.dtype.str, len(array)]
+            arrays.append(array)
+            deslocamento += -(-array.nbytes // ALINHAMENTO) * ALINHAMENTO
+        colunas.append(descricao)
+
+    cabecalho = json.dumps({
+        'metadados': metadados,
+        'ordem': list(dados_extrato.keys()),
+        'linhas': len(linhas),
+        'colunas': colunas
+    }, ensure_ascii=False).encode('utf-8')
+    cabecalho += b' ' * (-(_PREAMBULO.size + len(cabecalho)) % ALINHAMENTO)
+
+    temporario = caminho + '.tmp'
+    with open(temporario, 'wb') as f:
+        f.write(_PREAMBULO.pack(MAGIA, VERSAO_FORMATO, len(cabecalho)))
+        f.write(cabecalho)
+        for array in arrays:
+            f.write(array.tobytes())
+            f.write(b'\0' * (-array.nbytes % ALINHAMENTO))
+    os.replace(temporario, caminho)
+
+
+class ExtratoCompacto:
+    """Extrato aberto do formato compacto, com as colunas mapeadas em memória.
+
+    Abrir o arquivo só lê o cabeçalho; coluna() devolve arrays numpy que
+    apontam direto para o mmap (sem cópia) e os textos só são decodificados
+    quando uma linha é pedida.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        with open(caminho, 'rb') as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magia, versao, tamanho = _PREAMBULO.unpack_from(self._mapa, 0)
+        if magia != MAGIA or versao != VERSAO_FORMATO:
+            self._mapa.close()
+            raise ValueError(f"{caminho} não é um extrato compacto (versão {VERSAO_FORMATO})")
+        cabecalho = json.loads(self._mapa[_PREAMBULO.size:_PREAMBULO.size + tamanho])
+        self._inicio = _PREAMBULO.size + tamanho
+        self.metadados = cabecalho['metadados']
+        self._ordem = cabecalho['ordem']
+        self.linhas = cabecalho['linhas']
+        self._colunas = {coluna['nome']: coluna for coluna in cabecalho['colunas']}
+        self.colunas = list(self._colunas)
+
+    def __len__(self):
+        return self.linhas
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def fechar(self):
+        try:
+            self._mapa.close()
+        except BufferError:
+            # Ainda há arrays de coluna() em uso; o mmap é liberado junto com eles
+            pass
+
+    def _array(self, nome, papel):
+        deslocamento, dtype, quantidade = self._colunas[nome]['arrays'][papel]
+        return np.frombuffer(self._mapa, dtype=dtype, count=quantidade, offset=self._inicio + deslocamento)
+
+    def tipo(self, nome):
+        return self._colunas[nome]['tipo']
+
+    def coluna(self, nome):
+        """Array da coluna sem cópia: float64, int64, datetime64[D] ou códigos da tabela de textos"""
+        tipo = self.tipo(nome)
+        if tipo == TIPO_DATA:
+            return self._array(nome, 'valores').view('datetime64[D]')
+        if tipo in (TIPO_REAL, TIPO_INTEIRO):
+            return self._array(nome, 'valores')
+        return self._array(nome, 'codigos')
+
+    def nulos(self, nome):
+        """Máscara booleana das linhas sem valor na coluna"""
+        if self.tipo(nome) in (TIPO_TEXTO, TIPO_OBJETO):
+            return self._array(nome, 'codigos') < 0
+        return self._array(nome, 'nulos').view(bool)
+
+    def valores(self, nome, inicio=0, fim=None):
+        """Valores Python da coluna nas linhas [inicio, fim), como no JSON"""
+        tipo = self.tipo(nome)
+        fim = self.linhas if fim is None else fim
+        if tipo in (TIPO_TEXTO, TIPO_OBJETO):
+            # Cada texto distinto é decodificado uma vez; código -1 é nulo
+            codigos = self.coluna(nome)[inicio:fim].tolist()
+            distintos = sorted(set(codigos) - {-1})
+            deslocamentos = self._array(nome, 'deslocamentos')
+            inicio_texto = self._inicio + self._colunas[nome]['arrays']['texto'][0]
+            limites = zip(deslocamentos[distintos].tolist(), deslocamentos[[c + 1 for c in distintos]].tolist())
+            textos = {-1: None}
+            for codigo, (de, ate) in zip(distintos, limites):
+                texto = self._mapa[inicio_texto + de:inicio_texto + ate].decode('utf-8')
+                textos[codigo] = json.loads(texto) if tipo == TIPO_OBJETO else texto
+            return [textos[codigo] for codigo in codigos]
+
+        if tipo == TIPO_DATA:
+            valores = np.datetime_as_string(self.coluna(nome)[inicio:fim], unit='D').tolist()
+        else:
+            valores = self.coluna(nome)[inicio:fim].tolist()
+        nulos = self._array(nome, 'nulos')[inicio:fim].tolist()
+        return [None if nulo else valor for valor, nulo in zip(valores, nulos)]
+
+    def registros(self, inicio=0, fim=None):
+        """Linhas [inicio, fim) como dicionários, iguais às do JSON"""
+        colunas = [self.valores(nome, inicio, fim) for nome in self.colunas]
+        return [dict(zip(self.colunas, linha)) for linha in zip(*colunas)]
+
+    def para_dict(self):
+        """Extrato completo no mesmo formato do JSON em extratos/"""
+        dados_extrato = dict(self.metadados, dados=self.registros())
+        return {chave: dados_extrato[chave] for chave in self._ordem}
+
+
+def caminho_compacto(json_filepath):
+    return os.path.splitext(json_filepath)[0] + EXTENSAO_COMPACTA
+
+
+def compactar_json(json_filepath, caminho=None):
+    """Converte um extrato JSON para o formato compacto; devolve o caminho gravado"""
+    caminho = caminho or caminho_compacto(json_filepath)
+    with open(json_filepath, 'r', encoding='utf-8') as f:
+        gravar_extrato_compacto(json.load(f), caminho)
+    return caminho
+
+
+def exportar_json(caminho, json_filepath):
+    """Grava de volta o JSON (indent=4) a partir do formato compacto"""
+    with ExtratoCompacto(caminho) as extrato:
+        dados_extrato = extrato.para_dict()
+    with open(json_filepath, 'w', encoding='utf-8') as f:
+        json.dump(dados_extrato, f, ensure_ascii=False, indent=4)
@@ -0,0 +1,399 @@
+import datetime
+import decimal
+import json
+import os
+
+from services.bibliotecas import np, openpyxl, pd
+from services.catalogo import DIRETORIO_EXTRATOS
+from services.diagnostico import etapa
+from services.layouts import coluna_descartada, detectar_layout, layout_do_cabecalho
+
+# Extensões lidas em streaming pelo openpyxl (as demais passam pelo pandas)
+EXTENSOES_STREAMING = ('.xlsx', '.xlsm')
+
+# A cada quantas linhas a leitura em streaming informa o progresso
+INTERVALO_PROGRESSO = 2000
+
+
+def converter_para_serializavel(valor):
+    """Converte valores para formatos serializáveis em JSON"""
+    if pd.isna(valor):
+        return None
+    elif isinstance(valor, (pd.Timestamp, pd._libs.tslibs.timestamps.Timestamp)):
+        return valor.strftime('%Y-%m-%d')
+    elif isinstance(valor, datetime.datetime):
+        return valor.strftime('%Y-%m-%d')
+    elif isinstance(valor, datetime.date):
+        return valor.strftime('%Y-%m-%d')
+    elif isinstance(valor, (np.int64, np.int32, np.int16, np.int8)):
+        return int(valor)
+    elif isinstance(valor, (np.float64, np.float32)):
+        return float(valor)
+    elif isinstance(valor, decimal.Decimal):
+        return str(valor)
+    return valor
+
+
+def aplicar_layout(df, layout):
+    """Renomeia as colunas já selecionadas pelo layout e remove linhas vazias ou sem descrição"""
+    df = df.set_axis([final for _, _, final in layout['colunas']], axis=1)
+
+    # Remove linhas totalmente vazias
+    df = df.dropna(how='all')
+
+    # Remove linhas com descrição vazia ou nula
+    coluna_descricao = layout['descricao']
+    df = df.dropna(subset=[coluna_descricao])
+    df = df[df[coluna_descricao].astype(str).str.strip() != '']
+    return df
+
+
+def limpar_extrato(df):
+    """Remove colunas desnecessárias e linhas sem descrição do extrato lido do Excel"""
+    layout = detectar_layout([str(coluna) for coluna in df.columns])
+    df = df.iloc[:, [posicao for posicao, _, _ in layout['colunas']]]
+    return aplicar_layout(df, layout)
+
+
+def converter_coluna(serie):
+    """Converte uma coluna inteira para valores serializáveis em JSON de uma só vez"""
+    nulos = serie.isna().to_numpy()
+    dtype = serie.dtype
+
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        valores = serie.dt.strftime('%Y-%m-%d').tolist()
+    elif pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_numeric_dtype(dtype):
+        # tolist() já devolve int/float/bool nativos do Python
+        valores = serie.tolist()
+    else:
+        valores = serie.tolist()
+        tipos = set(map(type, valores))
+        if not tipos <= {str, float}:
+            # Coluna com tipos misturados (datas, Decimal, etc.): converte valor a valor
+            return [converter_para_serializavel(valor) for valor in valores]
+
+    for posicao in np.flatnonzero(nulos):
+        valores[posicao] = None
+    return valores
+
+
+def dataframe_para_registros(df):
+    """Converte o DataFrame em uma lista de dicionários serializáveis, coluna a coluna"""
+    if len(df.columns) and all(
+        pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)
+        for dtype in df.dtypes
+    ):
+        # Mesmo comportamento do iterrows: linhas só numéricas usam o tipo comum do frame
+        df = pd.DataFrame(df.to_numpy(), index=df.index, columns=df.columns)
+
+    chaves = [str(coluna) for coluna in df.columns]
+    colunas = [converter_coluna(df.iloc[:, posicao]) for posicao in range(len(chaves))]
+    return [dict(zip(chaves, linha)) for linha in zip(*colunas)]
+
+
+def _progresso(progresso, fracao, mensagem):
+    if progresso is not None:
+        progresso(fracao, mensagem)
+
+
+def ler_planilha_extrato(filepath, layout):
+    """DataFrame só com as colunas mantidas pelo layout; a descrição fica como texto, sem inferência"""
+    descricao = [nome for _, nome, final in layout['colunas'] if final == layout['descricao']]
+    return pd.read_excel(
+        filepath,
+        usecols=[posicao for posicao, _, _ in layout['colunas']],
+        dtype={descricao[0]: object}
+    )
+
+
+def processar_extrato(filepath, progresso=None):
+    """Lê o extrato em Excel e devolve o dicionário gravado em extratos/
+
+    progresso, se informado, é chamado como progresso(fracao, mensagem) entre as etapas.
+    """
+    _progresso(progresso, 0.02, "Identificando layout")
+    with etapa('layout'):
+        layout = layout_do_cabecalho(ler_cabecalho(filepath))
+    _progresso(progresso, 0.05, "Lendo planilha")
+    with etapa('leitura_excel') as medicao:
+        df = ler_planilha_extrato(filepath, layout)
+        medicao.linhas = len(df)
+    _progresso(progresso, 0.6, "Removendo linhas vazias")
+    with etapa('filtragem') as medicao:
+        df = aplicar_layout(df, layout)
+        medicao.linhas = len(df)
+    _progresso(progresso, 0.7, "Convertendo linhas")
+    with etapa('conversao', len(df)):
+        dados = dataframe_para_registros(df)
+    return {
+        'arquivo_origem': os.path.basename(filepath),
+        'data_processamento': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'dados': dados
+    }
+
+
+def caminho_extrato(filepath, aba=None):
+    """Caminho do JSON em extratos/ correspondente à planilha (ou a uma das abas, se houver várias)"""
+    nome_base = os.path.splitext(os.path.basename(filepath))[0]
+    if aba is not None:
+        nome_base = f'{nome_base} - {aba}'
+    return os.path.join(DIRETORIO_EXTRATOS, f'{nome_base}.json')
+
+
+def gravar_extrato(dados_extrato, json_filepath, catalogo=None, progresso=None):
+    """Salva o extrato como JSON e, se informado, atualiza o catálogo"""
+    _progresso(progresso, 0.9, "Gravando JSON")
+    os.makedirs(os.path.dirname(json_filepath), exist_ok=True)
+    with etapa('gravacao_json', len(dados_extrato['dados'])):
+        with open(json_filepath, 'w', encoding='utf-8') as f:
+            json.dump(dados_extrato, f, ensure_ascii=False, indent=4)
+    if catalogo is not None:
+        catalogo.registrar(os.path.basename(json_filepath), dados_extrato)
+
+
+def _nomes_colunas(cabecalho):
+    """Nomes das colunas como o pandas os daria (células vazias e nomes repetidos)"""
+    nomes, vistos = [], {}
+    for posicao, nome in enumerate(cabecalho):
+        nome = f'Unnamed: {posicao}' if nome is None else str(nome)
+        if nome in vistos:
+            vistos[nome] += 1
+            nome = f'{nome}.{vistos[nome]}'
+        else:
+            vistos[nome] = 0
+        nomes.append(nome)
+    return nomes
+
+
+def _cabecalho_planilha(planilha):
+    """Nomes das colunas da primeira linha de uma aba aberta pelo openpyxl"""
+    cabecalho = list(next(planilha.iter_rows(max_row=1, values_only=True), ()))
+    # Células vazias no fim do cabeçalho não são colunas
+    while cabecalho and cabecalho[-1] is None:
+        cabecalho.pop()
+    return _nomes_colunas(cabecalho)
+
+
+def ler_cabecalho(filepath):
+    """Nomes das colunas da primeira linha da planilha, sem ler o restante do arquivo"""
+    if filepath.lower().endswith(EXTENSOES_STREAMING):
+        pasta = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+        try:
+            return _cabecalho_planilha(pasta.worksheets[0])
+        finally:
+            pasta.close()
+    cabecalho = [None if str(nome).startswith('Unnamed: ') else nome
+                 for nome in pd.read_excel(filepath, nrows=0).columns]
+    while cabecalho and cabecalho[-1] is None:
+        cabecalho.pop()
+    return _nomes_colunas(cabecalho)
+
+
+def e_extrato(nomes):
+    """Se o cabeçalho tem coluna de descrição, isto é, se a aba é um extrato"""
+    return any('desc' in nome.lower() for nome in nomes if not coluna_descartada(nome))
+
+
+def _converter_celula(valor, numerica):
+    """Valor de uma célula do openpyxl no mesmo formato gerado por dataframe_para_registros"""
+    if valor is None or isinstance(valor, (str, bool)):
+        return valor
+    if numerica and isinstance(valor, (int, float)):
+        # Colunas de valores são float no pandas mesmo quando a célula tem um inteiro
+        return float(valor)
+    return converter_para_serializavel(valor)
+
+
+def _linhas_planilha(planilha, progresso=None, inicio=0.05, largura=0.9):
+    """Linhas de uma aba aberta em modo read-only, já filtradas e convertidas (ver ler_linhas_extrato).
+
+    O progresso informado vai de inicio a inicio + largura.
+    """
+    linhas = planilha.iter_rows(values_only=True)
+    cabecalho = list(next(linhas, ()))
+    while cabecalho and cabecalho[-1] is None:
+        cabecalho.pop()
+    layout = layout_do_cabecalho(_nomes_colunas(cabecalho))
+    mantidas = [(posicao, final) for posicao, _, final in layout['colunas']]
+    descricao = layout['descricao']
+    numericas = set(layout['numericas'])
+    total = planilha.max_row or 0
+
+    for numero, linha in enumerate(linhas, start=1):
+        if numero % INTERVALO_PROGRESSO == 0:
+            _progresso(progresso, inicio + largura * min(1.0, numero / total) if total else inicio + largura / 2,
+                       f"Lendo linha {numero}")
+        registro = {
+            nome: _converter_celula(linha[posicao] if posicao < len(linha) else None, nome in numericas)
+            for posicao, nome in mantidas
+        }
+        valor_descricao = registro[descricao]
+        if valor_descricao is None or str(valor_descricao).strip() == '':
+            continue
+        yield registro
+
+
+def _abrir_aba(pasta, aba):
+    """Aba pelo nome, ou a primeira se aba for None"""
+    if aba is None:
+        return pasta.worksheets[0]
+    if aba not in pasta.sheetnames:
+        raise ValueError(f"A planilha não tem a aba {aba}")
+    return pasta[aba]
+
+
+def ler_linhas_extrato(filepath, progresso=None, aba=None):
+    """Lê o extrato em streaming (openpyxl read-only), linha a linha.
+
+    As colunas descartadas nunca são convertidas e as linhas sem descrição são
+    puladas, como em limpar_extrato. As colunas mantidas e seus nomes vêm do
+    layout em cache para o cabeçalho. Gera dicionários já serializáveis; a
+    memória usada não depende do tamanho da planilha. Sem aba, lê a primeira.
+    """
+    pasta = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        yield from _linhas_planilha(_abrir_aba(pasta, aba), progresso)
+    finally:
+        pasta.close()
+
+
+def ler_registros(filepath, progresso=None, aba=None):
+    """Linhas já convertidas da planilha: em streaming para .xlsx, via pandas para as demais (só a primeira aba)"""
+    if filepath.lower().endswith(EXTENSOES_STREAMING):
+        return ler_linhas_extrato(filepath, progresso, aba)
+    return iter(processar_extrato(filepath, progresso)['dados'])
+
+
+def formatar_registro(registro):
+    """Linha do extrato como aparece dentro de 'dados' em um JSON gravado com indent=4"""
+    texto = json.dumps(registro, ensure_ascii=False, indent=4)
+    return '\n'.join('        ' + linha for linha in texto.split('\n'))
+
+
+def formatar_cabecalho(chave, valor):
+    """Linha de um campo do cabeçalho, no mesmo formato de json.dump(indent=4)"""
+    return f'    {json.dumps(chave, ensure_ascii=False)}: {json.dumps(valor, ensure_ascii=False)},\n'
+
+
+def _escrever_json_incremental(arquivo, cabecalho, registros):
+    """Escreve {cabecalho..., 'dados': [registros]} no mesmo formato de json.dump(indent=4)"""
+    arquivo.write('{\n')
+    for chave, valor in cabecalho.items():
+        arquivo.write(formatar_cabecalho(chave, valor))
+    quantidade = 0
+    for registro in registros:
+        arquivo.write('    "dados": [\n' if quantidade == 0 else ',\n')
+        arquivo.write(formatar_registro(registro))
+        quantidade += 1
+    arquivo.write('\n    ]\n}' if quantidade else '    "dados": []\n}')
+    return quantidade
+
+
+def cabecalho_json(filepath, aba=None):
+    cabecalho = {'arquivo_origem': os.path.basename(filepath)}
+    if aba is not None:
+        cabecalho['aba'] = aba
+    cabecalho['data_processamento'] = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return cabecalho
+
+
+def _gravar_incremental(json_filepath, cabecalho, registros):
+    """Grava o JSON em um temporário que só substitui o anterior quando termina; devolve as linhas"""
+    os.makedirs(os.path.dirname(json_filepath) or '.', exist_ok=True)
+    temporario = json_filepath + '.tmp'
+    try:
+        # Leitura, conversão e gravação acontecem intercaladas, linha a linha
+        with etapa('leitura_conversao_gravacao') as medicao, open(temporario, 'w', encoding='utf-8') as f:
+            linhas = _escrever_json_incremental(f, cabecalho, registros)
+            medicao.linhas = linhas
+        os.replace(temporario, json_filepath)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    return linhas
+
+
+def importar_extrato(filepath, json_filepath, progresso=None, aba=None):
+    """Lê a planilha e grava o JSON em json_filepath sem montar o extrato inteiro em memória.
+
+    Planilhas .xlsx são lidas e gravadas linha a linha (da aba informada ou da
+    primeira); as demais passam por processar_extrato. O arquivo só substitui o
+    anterior quando termina de ser escrito. Devolve um resumo (arquivo_origem,
+    data_processamento, linhas).
+    """
+    cabecalho = cabecalho_json(filepath, aba)
+    if not filepath.lower().endswith(EXTENSOES_STREAMING):
+        dados_extrato = processar_extrato(filepath, progresso)
+        gravar_extrato(dados_extrato, json_filepath, progresso=progresso)
+        return dict(cabecalho, data_processamento=dados_extrato['data_processamento'],
+                    linhas=len(dados_extrato['dados']))
+
+    _progresso(progresso, 0.05, "Lendo planilha")
+    linhas = _gravar_incremental(json_filepath, cabecalho, ler_linhas_extrato(filepath, progresso, aba))
+    return dict(cabecalho, linhas=linhas)
+
+
+def _verificar_destinos(destinos, substituir):
+    if substituir:
+        return
+    for destino in destinos:
+        if os.path.exists(destino):
+            raise ValueError(f"Já existe um extrato com o nome {os.path.basename(destino)}")
+
+
+def extratos_existentes(filepath):
+    """JSON em extratos/ já importados da planilha: o de nome igual e os de cada aba"""
+    nome_base = os.path.splitext(os.path.basename(filepath))[0]
+    if not os.path.isdir(DIRETORIO_EXTRATOS):
+        return []
+    return sorted(
+        arquivo for arquivo in os.listdir(DIRETORIO_EXTRATOS)
+        if arquivo == f'{nome_base}.json' or (arquivo.startswith(f'{nome_base} - ') and arquivo.endswith('.json'))
+    )
+
+
+def importar_extratos(filepath, progresso=None, substituir=True, reservar=None):
+    """Importa todas as abas de extrato da planilha, abrindo o arquivo uma única vez.
+
+    Cada aba com coluna de descrição vira um JSON (caminho_extrato; com o nome
+    da aba quando há mais de uma) gravado linha a linha. Sem substituir, nada é
+    gravado se algum dos JSON já existir. Planilhas que não são .xlsx têm só a
+    primeira aba lida, como em importar_extrato. reservar(destinos), se
+    informado, é chamado antes de gravar e pode recusar os destinos com um
+    erro. Devolve um resumo por aba, com o destino.
+    """
+    if not filepath.lower().endswith(EXTENSOES_STREAMING):
+        destinos = [caminho_extrato(filepath)]
+        _verificar_destinos(destinos, substituir)
+        if reservar is not None:
+            reservar(destinos)
+        return [dict(importar_extrato(filepath, destinos[0], progresso), destino=destinos[0])]
+
+    _progresso(progresso, 0.02, "Identificando abas")
+    pasta = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        with etapa('layout'):
+            abas = [planilha for planilha in pasta.worksheets if e_extrato(_cabecalho_planilha(planilha))]
+        if not abas:
+            raise ValueError("Nenhuma aba com coluna de descrição encontrada no arquivo")
+        varias = len(abas) > 1
+        destinos = [caminho_extrato(filepath, planilha.title if varias else None) for planilha in abas]
+        _verificar_destinos(destinos, substituir)
+        if reservar is not None:
+            reservar(destinos)
+
+        resumos = []
+        largura = 0.9 / len(abas)
+        for i, (planilha, destino) in enumerate(zip(abas, destinos)):
+            _progresso(progresso, 0.05 + i * largura, f"Lendo aba {planilha.title}")
+            # A aba fica no JSON quando não é a primeira, para a atualização ler a mesma
+            aba = planilha.title if varias or planilha is not pasta.worksheets[0] else None
+            cabecalho = cabecalho_json(filepath, aba)
+            linhas = _gravar_incremental(destino, cabecalho,
+                                         _linhas_planilha(planilha, progresso, 0.05 + i * largura, largura))
+            resumos.append(dict(cabecalho, linhas=linhas, destino=destino))
+        return resumos
+    finally:
+        pasta.close()
+
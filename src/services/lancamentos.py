@@ -0,0 +1,209 @@
+import math
+import re
+import unicodedata
+
+from services.bibliotecas import np
+from services.cache_classificacao import AUSENTE
+from services.layouts import identificar_colunas
+
+# Palavras que aparecem em quase todo histórico/nome e não ajudam a identificar a conta
+PALAVRAS_IGNORADAS = {
+    'de', 'da', 'do', 'das', 'dos', 'em', 'para', 'com', 'por', 'sem',
+    'ltda', 'epp', 'eireli', 'doc', 'rec', 'pgto', 'pagto', 'boleto', 'ref',
+}
+TAMANHO_MINIMO_TOKEN = 3
+
+# Tokens presentes em mais que esta fração das contas não são consultados
+FRACAO_MAXIMA_TOKEN = 0.2
+
+# Similaridade mínima para aceitar a conta sugerida pelo índice de trigramas
+LIMIAR_TRIGRAMAS = 0.3
+
+# Linhas de extrato entre duas chamadas do callback de progresso
+INTERVALO_PROGRESSO = 2000
+
+# Grupos (primeiro nível da classificação) preferidos para a contrapartida
+GRUPOS_ENTRADA = ('1', '3')
+GRUPOS_SAIDA = ('2', '3')
+
+# Palavras só com letras: tokens com dígitos (números de documento, NF) ficam de fora
+_PADRAO_TOKEN = re.compile(r'\b[a-z]{%d,}\b' % TAMANHO_MINIMO_TOKEN)
+
+
+def tokenizar(texto):
+    """Tokens normalizados (sem acento, minúsculos) sem números de documento e palavras genéricas"""
+    texto = unicodedata.normalize('NFKD', str(texto).lower()).encode('ascii', 'ignore').decode('ascii')
+    return [token for token in _PADRAO_TOKEN.findall(texto) if token not in PALAVRAS_IGNORADAS]
+
+
+def normalizar_descricao(descricao):
+    """Forma canônica do histórico: tokens distintos e ordenados, sem números nem espaços de preenchimento"""
+    return ' '.join(sorted(set(tokenizar(descricao))))
+
+
+def conta_analitica(conta):
+    """Contas sintéticas (tipo 'S') só agrupam outras e não recebem lançamentos"""
+    return conta.get('tipo', '').upper() != 'S'
+
+
+class IndiceContas:
+    """Índice invertido do plano de contas.
+
+    Cada token do nome das contas analíticas aponta para as contas que o contêm,
+    com peso IDF; código e classificação ficam em dicionários de acesso direto.
+    A busca de um histórico só percorre as listas dos tokens que ele contém.
+    """
+
+    def __init__(self, contas):
+        self.contas = [conta for conta in contas if conta_analitica(conta)]
+        self.por_codigo = {conta['codigo']: conta for conta in contas}
+        self.por_classificacao = {conta['classificacao']: conta for conta in contas}
+        self.grupos = [conta['classificacao'][:1] for conta in self.contas]
+
+        postagens = {}
+        for posicao, conta in enumerate(self.contas):
+            for token in set(tokenizar(conta['nome'])):
+                postagens.setdefault(token, []).append(posicao)
+
+        total = max(len(self.contas), 1)
+        limite = max(1, int(total * FRACAO_MAXIMA_TOKEN))
+        self.postagens = {
+            token: np.array(posicoes, dtype=np.int32) for token, posicoes in postagens.items()
+        }
+        self.pesos = {
+            token: math.log(1 + total / len(posicoes))
+            for token, posicoes in postagens.items()
+            if len(posicoes) <= limite
+        }
+
+    def conta_por_codigo(self, codigo):
+        return self.por_codigo.get(str(codigo).strip())
+
+    def conta_por_classificacao(self, classificacao):
+        return self.por_classificacao.get(str(classificacao).strip())
+
+    def pontuar(self, tokens):
+        """Soma dos pesos dos tokens em comum para cada conta (None se nenhum token é indexado)"""
+        tokens = [token for token in set(tokens) if token in self.pesos]
+        if not tokens:
+            return None
+        pontos = np.zeros(len(self.contas))
+        for token in tokens:
+            pontos[self.postagens[token]] += self.pesos[token]
+        return pontos
+
+    def buscar(self, descricao, preferir=()):
+        """Conta analítica mais parecida com o histórico, ou None.
+
+        Em caso de empate, vence a conta de um dos grupos preferidos e depois a
+        que aparece primeiro no plano.
+        """
+        return self.buscar_tokens(tokenizar(descricao), preferir)
+
+    def buscar_tokens(self, tokens, preferir=()):
+        pontos = self.pontuar(tokens)
+        if pontos is None:
+            return None
+        empatadas = np.flatnonzero(pontos >= pontos.max() - 1e-9)
+        if preferir and len(empatadas) > 1:
+            for posicao in empatadas:
+                if self.grupos[posicao] in preferir:
+                    return self.contas[posicao]
+        return self.contas[empatadas[0]]
+
+    def conta_banco(self):
+        """Primeira conta analítica de banco do ativo, usada quando nenhuma é informada"""
+        for conta in self.contas:
+            if conta['classificacao'].startswith('1') and tokenizar(conta['nome'])[:1] == ['banco']:
+                return conta
+        return None
+
+
+def _valor(valor):
+    """Valor da célula de Entradas/Saídas; texto como '1.234,56' é convertido e '-' ou outro texto vale 0.0"""
+    try:
+        return float(valor) if valor else 0.0
+    except (TypeError, ValueError):
+        pass
+    try:
+        return float(str(valor).strip().replace('.', '').replace(',', '.'))
+    except ValueError:
+        return 0.0
+
+
+def buscar_contrapartida(indice, tokens, preferir, trigramas=None):
+    """Busca pelos tokens; se nenhum coincidir, tenta o índice de trigramas (nomes abreviados ou com erro)"""
+    conta = indice.buscar_tokens(tokens, preferir)
+    if conta is None and trigramas is not None:
+        candidatos = trigramas.buscar(' '.join(tokens), k=1, minimo=LIMIAR_TRIGRAMAS)
+        if candidatos:
+            conta = candidatos[0][0]
+    return conta
+
+
+def classificar(indice, historico, entrada, cache=None, trigramas=None):
+    """Conta de contrapartida do histórico, consultando o cache antes dos índices"""
+    preferir = GRUPOS_ENTRADA if entrada else GRUPOS_SAIDA
+    if cache is None:
+        # Mesmo texto da chave do cache: os trigramas dependem da ordem das palavras, e o cache não pode mudar a conta
+        return buscar_contrapartida(indice, normalizar_descricao(historico).split(), preferir, trigramas)
+
+    chave = ('E:' if entrada else 'S:') + normalizar_descricao(historico)
+    codigo = cache.obter(chave)
+    if codigo is AUSENTE:
+        conta = buscar_contrapartida(indice, chave[2:].split(), preferir, trigramas)
+        cache.guardar(chave, conta['codigo'] if conta else None)
+        return conta
+    return indice.conta_por_codigo(codigo) if codigo is not None else None
+
+
+def iterar_lancamentos(plano, extratos, conta_banco=None, indice=None, cache=None, trigramas=None, progresso=None):
+    """Gera os lançamentos de débito/crédito para as linhas dos extratos, um a um.
+
+    plano é o dicionário gravado em data/, extratos um dicionário
+    {arquivo: dados do extrato}. Entradas debitam o banco e creditam a
+    contrapartida; saídas fazem o inverso. Linhas sem conta encontrada ficam
+    com a contrapartida vazia para classificação manual. Com um
+    CacheClassificacao, históricos já vistos não passam pelo índice; com um
+    IndiceTrigramas, históricos sem nenhuma palavra em comum com o plano
+    ainda podem ser classificados por semelhança. progresso(fracao, mensagem),
+    se informado, é chamado a cada INTERVALO_PROGRESSO linhas.
+    """
+    if indice is None:
+        indice = IndiceContas(plano['contas'])
+    banco = indice.conta_por_codigo(conta_banco) if conta_banco else indice.conta_banco()
+    codigo_banco = banco['codigo'] if banco else ''
+
+    total = sum(len(dados_extrato['dados']) for dados_extrato in extratos.values())
+    processadas = 0
+    for arquivo, dados_extrato in extratos.items():
+        linhas = dados_extrato['dados']
+        if not linhas:
+            continue
+        colunas = identificar_colunas(linhas[0].keys())
+
+        for linha in linhas:
+            if progresso is not None and processadas % INTERVALO_PROGRESSO == 0:
+                progresso(processadas / total, f"{processadas} de {total} linhas")
+            processadas += 1
+            historico = str(linha.get(colunas['descricao']) or '').strip()
+            data = linha.get(colunas['data'])
+            for valor, debito_banco in ((_valor(linha.get(colunas['entradas'])), True),
+                                        (_valor(linha.get(colunas['saidas'])), False)):
+                if not valor:
+                    continue
+                contrapartida = classificar(indice, historico, debito_banco, cache, trigramas)
+                codigo = contrapartida['codigo'] if contrapartida else ''
+                yield {
+                    'data': data,
+                    'debito': codigo_banco if debito_banco else codigo,
+                    'credito': codigo if debito_banco else codigo_banco,
+                    'valor': valor,
+                    'historico': historico,
+                    'extrato': arquivo
+                }
+
+
+def gerar_lancamentos(plano, extratos, conta_banco=None, indice=None, cache=None, trigramas=None, progresso=None):
+    """Lista com todos os lançamentos de iterar_lancamentos (mesmos parâmetros)"""
+    return list(iterar_lancamentos(plano, extratos, conta_banco, indice, cache, trigramas, progresso))
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import threading
+
+CAMINHO_LAYOUTS = os.path.join('cache', 'layouts.json')
+VERSAO_LAYOUTS = 1
+
+# Lista de possíveis nomes para as colunas que queremos remover
+COLUNAS_PARA_REMOVER = [
+    'Código', 'Cod', 'Cod.', 'Codigo',
+    'Doc', 'Doc.', 'Documento', 'Nº Doc', 'N Doc', 'Num Doc',
+    'Saldo dia', 'Saldo Dia', 'Saldo do dia', 'Saldo'
+]
+_REMOVER = [remover.lower() for remover in COLUNAS_PARA_REMOVER]
+
+# Nomes gravados no JSON para as colunas identificadas
+NOMES_PADRAO = {
+    'data': 'Data',
+    'entradas': 'Entradas',
+    'saidas': 'Saídas',
+    'descricao': 'Descrição',
+}
+
+
+def coluna_descartada(coluna):
+    """Indica se a coluna é uma das que não vão para o JSON (código, documento, saldo)"""
+    nome = str(coluna).lower()
+    return any(remover in nome for remover in _REMOVER)
+
+
+def coluna_de_descricao(colunas):
+    """Primeira coluna cujo nome contém 'desc'"""
+    return [col for col in colunas if 'desc' in str(col).lower()][0]
+
+
+def identificar_colunas(colunas):
+    """Localiza as colunas de data, entradas, saídas e descrição pelos nomes (com ou sem espaços)"""
+    mapa = {'data': None, 'entradas': None, 'saidas': None, 'descricao': None}
+    for coluna in colunas:
+        nome = str(coluna).strip().lower()
+        if mapa['data'] is None and nome.startswith('data'):
+            mapa['data'] = coluna
+        elif mapa['entradas'] is None and 'entrada' in nome:
+            mapa['entradas'] = coluna
+        elif mapa['saidas'] is None and ('saída' in nome or 'saida' in nome):
+            mapa['saidas'] = coluna
+        elif mapa['descricao'] is None and 'desc' in nome:
+            mapa['descricao'] = coluna
+    return mapa
+
+
+def impressao_digital(nomes):
+    """Identifica o layout de um banco pelos nomes exatos do cabeçalho, na ordem"""
+    return hashlib.sha1(json.dumps(list(nomes), ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def detectar_layout(nomes):
+    """Decide quais colunas do cabeçalho são mantidas e com que nome vão para o JSON.
+
+    Devolve {'colunas': [[posição, nome na planilha, nome no JSON]], 'descricao': nome,
+    'numericas': [nomes]}: as colunas de data, entradas, saídas e descrição recebem
+    os NOMES_PADRAO e as demais só perdem os espaços das pontas.
+    """
+    mantidas = [(posicao, nome) for posicao, nome in enumerate(nomes) if not coluna_descartada(nome)]
+    mapa = identificar_colunas([nome for _, nome in mantidas])
+    mapa['descricao'] = coluna_de_descricao([nome for _, nome in mantidas])
+    papeis = {nome: papel for papel, nome in mapa.items() if nome is not None}
+
+    colunas, usados = [], set()
+    for posicao, nome in mantidas:
+        final = NOMES_PADRAO[papeis[nome]] if nome in papeis else str(nome).strip()
+        if final in usados:
+            final = str(nome)
+        usados.add(final)
+        colunas.append([posicao, nome, final])
+
+    finais = {nome: final for _, nome, final in colunas}
+    return {
+        'colunas': colunas,
+        'descricao': finais[mapa['descricao']],
+        'numericas': [finais[mapa[papel]] for papel in ('entradas', 'saidas') if mapa[papel] is not None],
+    }
+
+
+class CacheLayouts:
+    """Layouts de extrato já detectados, por impressão digital do cabeçalho.
+
+    Cada banco exporta sempre o mesmo cabeçalho; a partir da segunda planilha
+    do mesmo layout a detecção de colunas é pulada e o leitor já sabe quais
+    colunas ler (usecols) e com que nomes gravá-las.
+    """
+
+    def __init__(self, caminho=CAMINHO_LAYOUTS):
+        self.caminho = caminho
+        self.alterado = False
+        self.entradas = self._ler()
+
+    def _ler(self):
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                conteudo = json.load(f)
+            if conteudo.get('versao') == VERSAO_LAYOUTS:
+                return conteudo['layouts']
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}
+
+    def obter(self, nomes):
+        """Layout do cabeçalho, detectado e guardado se ainda não for conhecido"""
+        chave = impressao_digital(nomes)
+        layout = self.entradas.get(chave)
+        if layout is None:
+            layout = self.entradas[chave] = detectar_layout(nomes)
+            self.alterado = True
+        return layout
+
+    def salvar(self):
+        if not self.alterado:
+            return
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        # Nome temporário por processo/thread: importações simultâneas podem gravar ao mesmo tempo
+        temporario = f'{self.caminho}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({'versao': VERSAO_LAYOUTS, 'layouts': self.entradas}, f, ensure_ascii=False)
+        os.replace(temporario, self.caminho)
+        self.alterado = False
+
+
+def layout_do_cabecalho(nomes):
+    """Layout do cabeçalho consultando (e atualizando) o cache em disco"""
+    cache = CacheLayouts()
+    layout = cache.obter(nomes)
+    cache.salvar()
+    return layout
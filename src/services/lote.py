@@ -0,0 +1,126 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from services.catalogo import catalogo_planos, catalogo_extratos
+from services.extratos import importar_extratos
+from services.planos import processar_planos, caminhos_planos, gravar_plano
+
+TIPO_PLANO = 'plano'
+TIPO_EXTRATO = 'extrato'
+
+# Mesmas extensões aceitas pelas janelas de importação
+EXTENSOES = {
+    TIPO_PLANO: ('.xls', '.xlsx'),
+    TIPO_EXTRATO: ('.xlsx',),
+}
+
+
+def listar_planilhas(diretorio, tipo):
+    """Planilhas do diretório com a extensão aceita para o tipo, ignorando arquivos temporários do Excel"""
+    return [
+        os.path.join(diretorio, arquivo)
+        for arquivo in sorted(os.listdir(diretorio))
+        if arquivo.lower().endswith(EXTENSOES[tipo]) and not arquivo.startswith('~$')
+    ]
+
+
+def _reservar(reservas, trava, origem, empresas=(), destinos=()):
+    """Reserva para origem as empresas e os destinos no lote, antes de gravar.
+
+    reservas é um dicionário compartilhado entre os processos do pool; se outra
+    planilha do lote já reservou uma empresa ou um destino, a segunda recebe
+    erro e não grava nada (dois planos da mesma empresa, ou duas planilhas
+    gravando o mesmo JSON, mesmo com substituir).
+    """
+    if reservas is None:
+        return
+    chaves = [('empresa', empresa) for empresa in empresas]
+    chaves += [('destino', os.path.normcase(os.path.abspath(destino))) for destino in destinos]
+    with trava:
+        for tipo, valor in chaves:
+            outra = reservas.get((tipo, valor), origem)
+            if outra == origem:
+                continue
+            if tipo == 'empresa':
+                raise ValueError(f"A empresa {valor} também está em {outra}, deste lote")
+            raise ValueError(f"{os.path.basename(valor)} também seria gravado por {outra}, deste lote")
+        for chave in chaves:
+            reservas[chave] = origem
+
+
+def importar_arquivo(tipo, filepath, substituir=False, empresas_existentes=None, reservas=None, trava=None):
+    """Converte e grava uma planilha (todas as abas); roda dentro dos processos do pool.
+
+    Nunca propaga exceções: o erro volta no resultado para não interromper o lote.
+    """
+    inicio = time.perf_counter()
+    resultado = {'tipo': tipo, 'origem': filepath}
+    try:
+        entradas = {}
+        if tipo == TIPO_PLANO:
+            planos = processar_planos(filepath)
+            caminhos = caminhos_planos(filepath, planos)
+            if not substituir:
+                for aba, dados in planos.items():
+                    if dados['empresa'] in (empresas_existentes or ()) or os.path.exists(caminhos[aba]):
+                        raise ValueError(f"Já existe um plano de contas para a empresa {dados['empresa']}")
+            _reservar(reservas, trava, filepath, [dados['empresa'] for dados in planos.values()], caminhos.values())
+            for aba, dados in planos.items():
+                gravar_plano(dados, caminhos[aba])
+                arquivo = os.path.basename(caminhos[aba])
+                entradas[arquivo] = catalogo_planos().montar_entrada(arquivo, dados)
+            destinos = list(caminhos.values())
+            linhas = sum(len(dados['contas']) for dados in planos.values())
+        else:
+            resumos = importar_extratos(filepath, substituir=substituir,
+                                        reservar=lambda destinos: _reservar(reservas, trava, filepath, destinos=destinos))
+            for resumo in resumos:
+                arquivo = os.path.basename(resumo['destino'])
+                entradas[arquivo] = catalogo_extratos().montar_entrada(arquivo, resumo, resumo['linhas'])
+            destinos = [resumo['destino'] for resumo in resumos]
+            linhas = sum(resumo['linhas'] for resumo in resumos)
+
+        resultado.update(destinos=destinos, linhas=linhas, entradas=entradas)
+    except Exception as e:
+        resultado['erro'] = str(e) or e.__class__.__name__
+    resultado['tempo'] = time.perf_counter() - inicio
+    return resultado
+
+
+def importar_lote(tarefas, processos=None, substituir=False):
+    """Importa em paralelo uma lista de (tipo, filepath), devolvendo os resultados à medida que terminam.
+
+    O catálogo de cada diretório é atualizado uma única vez, no processo principal,
+    depois que todas as planilhas foram gravadas. Planilhas do lote com a mesma
+    empresa ou o mesmo destino são recusadas (ver _reservar): a primeira a
+    terminar a conversão grava, as demais voltam com erro.
+    """
+    catalogos = {TIPO_PLANO: catalogo_planos(), TIPO_EXTRATO: catalogo_extratos()}
+    catalogos[TIPO_PLANO].atualizar()
+    empresas_existentes = {entrada['valor'] for entrada in catalogos[TIPO_PLANO].entradas.values()}
+    novas_entradas = {TIPO_PLANO: {}, TIPO_EXTRATO: {}}
+
+    try:
+        with multiprocessing.Manager() as gerenciador, ProcessPoolExecutor(max_workers=processos) as executor:
+            reservas, trava = gerenciador.dict(), gerenciador.Lock()
+            futuros = {
+                executor.submit(importar_arquivo, tipo, filepath, substituir, empresas_existentes,
+                                reservas, trava): (tipo, filepath)
+                for tipo, filepath in tarefas
+            }
+            for futuro in as_completed(futuros):
+                tipo, filepath = futuros[futuro]
+                try:
+                    resultado = futuro.result()
+                except Exception as e:
+                    # Falha do próprio processo (ex.: encerrado pelo sistema)
+                    resultado = {'tipo': tipo, 'origem': filepath, 'erro': str(e) or e.__class__.__name__, 'tempo': 0.0}
+                if 'erro' not in resultado:
+                    novas_entradas[tipo].update(resultado.pop('entradas'))
+                yield resultado
+    finally:
+        for tipo, entradas in novas_entradas.items():
+            if entradas:
+                catalogos[tipo].registrar_entradas(entradas)
@@ -0,0 +1,224 @@
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from services.cache_classificacao import CacheClassificacao
+from services.catalogo import catalogo_planos
+from services.diagnostico import etapa, execucao
+from services.lancamentos import IndiceContas, gerar_lancamentos
+from services.tarefas import Tarefa, TarefaCancelada
+from services.trigramas import IndiceTrigramas
+
+# Intervalo (s) entre leituras da fila de progresso
+INTERVALO_FILA = 0.1
+
+# Processos novos em vez de fork: o processo do Tk sempre tem outras threads (importações, pré-carga,
+# leitor da fila) e um fork pode herdar uma trava presa por uma delas (ex.: a do diagnóstico)
+METODO_INICIO = 'spawn'
+
+# Estado de cada processo do pool, preenchido pelo inicializador e por _contexto_plano
+_fila_progresso = None
+_cancelados = None
+_planos = {}
+
+
+def _iniciar_processo(fila, cancelados):
+    global _fila_progresso, _cancelados
+    _fila_progresso = fila
+    _cancelados = cancelados
+
+
+def _contexto_plano(arquivo_plano, hash_plano):
+    """Plano, índices e cache de classificação, carregados uma vez por plano em cada processo"""
+    chave = (arquivo_plano, hash_plano)
+    if chave not in _planos:
+        with open(os.path.join('data', arquivo_plano), 'r', encoding='utf-8') as f:
+            plano = json.load(f)
+        _planos[chave] = {
+            'plano': plano,
+            'indice': IndiceContas(plano['contas']),
+            'trigramas': IndiceTrigramas(plano['contas']),
+            'cache': CacheClassificacao(arquivo_plano, hash_plano),
+        }
+    return _planos[chave]
+
+
+def _progresso(posicao):
+    def progresso(fracao, mensagem=None):
+        if _cancelados is not None and _cancelados[posicao]:
+            raise TarefaCancelada()
+        if _fila_progresso is not None:
+            _fila_progresso.put((posicao, fracao, mensagem))
+    return progresso
+
+
+def gerar_trabalho(posicao, arquivo_plano, hash_plano, arquivo_extrato):
+    """Gera os lançamentos de um extrato; roda dentro dos processos do pool.
+
+    Erros do extrato voltam no resultado para não interromper o lote. As
+    entradas que este trabalho acrescentou ao cache de classificação do
+    processo vão junto, para serem mescladas no processo principal.
+    """
+    inicio = time.perf_counter()
+    progresso = _progresso(posicao)
+    resultado = {'plano': arquivo_plano, 'extrato': arquivo_extrato}
+    try:
+        with execucao('gerar_lancamentos', arquivo_extrato):
+            progresso(0.0, "Carregando plano")
+            contexto = _contexto_plano(arquivo_plano, hash_plano)
+            cache = contexto['cache']
+            cache.novas.clear()
+            acertos, falhas = cache.acertos, cache.falhas
+
+            progresso(0.0, "Lendo extrato")
+            with etapa('leitura_json'), open(os.path.join('extratos', arquivo_extrato), 'r', encoding='utf-8') as f:
+                dados_extrato = json.load(f)
+            with etapa('classificacao', len(dados_extrato['dados'])):
+                lancamentos = gerar_lancamentos(
+                    contexto['plano'], {arquivo_extrato: dados_extrato},
+                    indice=contexto['indice'], cache=cache, trigramas=contexto['trigramas'], progresso=progresso
+                )
+            resultado.update(
+                lancamentos=lancamentos,
+                cache=dict(cache.novas),
+                acertos=cache.acertos - acertos,
+                falhas=cache.falhas - falhas
+            )
+            progresso(1.0, "Concluído")
+    except TarefaCancelada:
+        raise
+    except Exception as e:
+        resultado['erro'] = str(e) or e.__class__.__name__
+    resultado['tempo'] = time.perf_counter() - inicio
+    return resultado
+
+
+class TarefaProcesso(Tarefa):
+    """Tarefa cujo trabalho roda em um processo do pool.
+
+    O progresso chega pela fila do escalonador; cancelar() também marca a
+    posição em um array compartilhado, que o trabalho consulta a cada chamada
+    de progresso, para interromper o que já começou a rodar.
+    """
+
+    def __init__(self, descricao, posicao, cancelados):
+        super().__init__(descricao, None)
+        self.posicao = posicao
+        self._cancelados = cancelados
+
+    def cancelar(self):
+        self._cancelados[self.posicao] = 1
+        super().cancelar()
+
+
+class EscalonadorLancamentos:
+    """Distribui a geração de lançamentos de vários extratos entre processos.
+
+    trabalhos é uma lista de (arquivo do plano em data/, arquivo do extrato
+    em extratos/), possivelmente de empresas diferentes. Cada processo
+    carrega o plano, os índices e o cache de classificação uma vez e os
+    reaproveita para todos os extratos daquele plano. iniciar() devolve uma
+    Tarefa por trabalho (para o PainelTarefas); concluir() espera todos e
+    devolve os resultados na ordem dos trabalhos, independentemente da ordem
+    em que terminaram. Um extrato com erro não interrompe os demais.
+    """
+
+    def __init__(self, trabalhos, processos=None):
+        self.trabalhos = list(trabalhos)
+        self.processos = processos or min(len(self.trabalhos), os.cpu_count() or 1) or 1
+        self.hashes = {}
+        self.tarefas = []
+        self._executor = None
+        self._fila = None
+        self._leitor = None
+
+    def iniciar(self):
+        catalogo = catalogo_planos()
+        catalogo.atualizar()
+        self.hashes = {plano: catalogo.entradas[plano]['hash'] for plano, _ in self.trabalhos}
+
+        contexto = multiprocessing.get_context(METODO_INICIO)
+        self._fila = contexto.Queue()
+        cancelados = contexto.Array('b', len(self.trabalhos), lock=False)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processos, mp_context=contexto,
+            initializer=_iniciar_processo, initargs=(self._fila, cancelados)
+        )
+        for posicao, (plano, extrato) in enumerate(self.trabalhos):
+            tarefa = TarefaProcesso(f"Lançamentos: {extrato}", posicao, cancelados)
+            tarefa.futuro = self._executor.submit(gerar_trabalho, posicao, plano, self.hashes[plano], extrato)
+            self.tarefas.append(tarefa)
+
+        self._leitor = threading.Thread(target=self._ler_progresso, daemon=True)
+        self._leitor.start()
+        return self.tarefas
+
+    def _ler_progresso(self):
+        """Repassa às tarefas o progresso enviado pelos processos, até todas terminarem"""
+        while True:
+            try:
+                posicao, fracao, mensagem = self._fila.get(timeout=INTERVALO_FILA)
+            except queue.Empty:
+                if all(tarefa.concluida for tarefa in self.tarefas):
+                    return
+                continue
+            tarefa = self.tarefas[posicao]
+            if not tarefa.cancelada:
+                tarefa(fracao, mensagem)
+
+    @property
+    def concluido(self):
+        return all(tarefa.concluida for tarefa in self.tarefas)
+
+    def _resultado(self, posicao):
+        plano, extrato = self.trabalhos[posicao]
+        futuro = self.tarefas[posicao].futuro
+        if futuro.cancelled():
+            return {'plano': plano, 'extrato': extrato, 'erro': "Cancelado", 'tempo': 0.0}
+        erro = futuro.exception()
+        if isinstance(erro, TarefaCancelada):
+            return {'plano': plano, 'extrato': extrato, 'erro': "Cancelado", 'tempo': 0.0}
+        if erro is not None:
+            # Falha do próprio processo (ex.: encerrado pelo sistema)
+            return {'plano': plano, 'extrato': extrato, 'erro': str(erro) or erro.__class__.__name__, 'tempo': 0.0}
+        return futuro.result()
+
+    def concluir(self):
+        """Espera os trabalhos, grava os caches mesclados e devolve os resultados na ordem dos trabalhos"""
+        try:
+            resultados = [self._resultado(posicao) for posicao in range(len(self.trabalhos))]
+        finally:
+            self._executor.shutdown(wait=True)
+            self._leitor.join()
+            self._fila.close()
+
+        caches = {}
+        for resultado in resultados:
+            if 'erro' not in resultado:
+                plano = resultado['plano']
+                if plano not in caches:
+                    caches[plano] = CacheClassificacao(plano, self.hashes[plano])
+                caches[plano].mesclar(resultado.pop('cache'))
+        for cache in caches.values():
+            cache.salvar()
+        return resultados
+
+
+def gerar_lote(trabalhos, processos=None):
+    """Gera os lançamentos de todos os trabalhos e devolve os resultados na ordem dada"""
+    escalonador = EscalonadorLancamentos(trabalhos, processos)
+    escalonador.iniciar()
+    return escalonador.concluir()
+
+
+def lancamentos_por_plano(resultados):
+    """Junta os lançamentos bem-sucedidos de cada plano, na ordem dos trabalhos"""
+    por_plano = {}
+    for resultado in resultados:
+        if 'erro' not in resultado:
+            por_plano.setdefault(resultado['plano'], []).extend(resultado['lancamentos'])
+    return por_plano
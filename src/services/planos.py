@@ -0,0 +1,238 @@
+import json
+import os
+
+from services.bibliotecas import np, openpyxl, pd
+from services.catalogo import DIRETORIO_PLANOS
+from services.diagnostico import etapa
+from services.extratos import EXTENSOES_STREAMING
+
+# Colunas fixas da planilha do plano de contas (rótulos originais do Excel)
+COLUNA_CODIGO = 0
+COLUNA_TIPO = 3
+COLUNA_CLASSIFICACAO = 7
+
+# Linhas antes do corpo: empresa e duas de título
+LINHAS_TITULO = 3
+
+
+def _tipos(serie):
+    """Tipo Python de cada valor da coluna, como o iterrows devolveria"""
+    if serie.dtype == object:
+        return serie.map(type).to_numpy()
+    if pd.api.types.is_bool_dtype(serie.dtype):
+        return np.full(len(serie), bool, dtype=object)
+    if pd.api.types.is_integer_dtype(serie.dtype):
+        return np.full(len(serie), int, dtype=object)
+    if pd.api.types.is_float_dtype(serie.dtype):
+        return np.full(len(serie), float, dtype=object)
+    if pd.api.types.is_string_dtype(serie.dtype):
+        return np.full(len(serie), str, dtype=object)
+    return serie.map(type).to_numpy()
+
+
+def _mascara_texto(serie):
+    """Valores que são texto não vazio"""
+    tipos = _tipos(serie)
+    e_texto = (tipos == str) & serie.notna().to_numpy()
+    if not e_texto.any():
+        return e_texto
+    textos = pd.Series(serie.to_numpy(dtype=object)[e_texto], dtype=object)
+    e_texto[e_texto] = textos.str.strip().to_numpy() != ''
+    return e_texto
+
+
+def _mascara_numero(serie):
+    """Valores numéricos (int/float) não nulos"""
+    tipos = _tipos(serie)
+    e_numero = np.isin(tipos, [int, float, bool, np.float64, np.float32])
+    return e_numero & serie.notna().to_numpy()
+
+
+def _texto_ou_vazio(serie):
+    return [str(valor).strip() if pd.notna(valor) else '' for valor in serie.tolist()]
+
+
+def extrair_contas(df):
+    """Extrai a lista de contas da planilha lida com skiprows=3 e header=None.
+
+    O nome é o primeiro texto não vazio depois da coluna de classificação e o grau
+    é o último valor numérico da linha; ambos são localizados para todas as linhas
+    de uma vez a partir de máscaras por coluna.
+    """
+    df = df.dropna(axis=1, how='all')
+    df = df.iloc[1:]
+
+    # Só interessam linhas com código e com algum nome
+    df = df[df[COLUNA_CODIGO].notna()]
+    colunas_nome = [col for col in df.columns if col > COLUNA_CLASSIFICACAO]
+    if df.empty or not colunas_nome:
+        return []
+
+    mascara_nome = np.column_stack([_mascara_texto(df[col]) for col in colunas_nome])
+    tem_nome = mascara_nome.any(axis=1)
+    df = df[tem_nome]
+    mascara_nome = mascara_nome[tem_nome]
+    if df.empty:
+        return []
+
+    linhas = np.arange(len(df))
+    valores_nome = df[colunas_nome].to_numpy(dtype=object)
+    nomes = valores_nome[linhas, mascara_nome.argmax(axis=1)]
+
+    # Último valor numérico da linha: primeiro verdadeiro na máscara invertida
+    mascara_grau = np.column_stack([_mascara_numero(df[col]) for col in df.columns])[:, ::-1]
+    valores_grau = df.to_numpy(dtype=object)[:, ::-1]
+    tem_grau = mascara_grau.any(axis=1)
+    graus = valores_grau[linhas, mascara_grau.argmax(axis=1)]
+
+    codigos = [str(codigo).strip() for codigo in df[COLUNA_CODIGO].tolist()]
+    tipos = _texto_ou_vazio(df[COLUNA_TIPO])
+    classificacoes = _texto_ou_vazio(df[COLUNA_CLASSIFICACAO])
+
+    contas = []
+    for codigo, tipo, classificacao, nome, grau, achou_grau in zip(
+        codigos, tipos, classificacoes, nomes, graus, tem_grau
+    ):
+        contas.append({
+            'codigo': codigo,
+            'tipo': tipo,
+            'classificacao': classificacao,
+            'nome': nome.strip(),
+            'grau': int(grau) if achou_grau else 0
+        })
+    return contas
+
+
+def extrair_empresa(df_empresa):
+    """Procura o nome da empresa na primeira linha da planilha ("Empresa:" seguido do nome)"""
+    empresa = None
+    empresa_encontrada = False
+
+    # Itera sobre as colunas da primeira linha
+    for col in df_empresa.columns:
+        valor = str(df_empresa.iloc[0, col]).strip()
+
+        if empresa_encontrada and valor and valor != 'nan':
+            empresa = valor
+            break
+
+        if "Empresa:" in valor:
+            empresa_encontrada = True
+
+    if not empresa:
+        raise ValueError("Nome da empresa não encontrado no arquivo")
+    return empresa
+
+
+def _valor_celula(valor):
+    """Célula do openpyxl como o pd.read_excel a devolveria (vazia é NaN, número inteiro é int)"""
+    if valor is None:
+        return np.nan
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return valor
+
+
+def _dataframe_planilha(planilha):
+    """Todas as linhas da aba (header=None), lidas em streaming"""
+    linhas = [[_valor_celula(valor) for valor in linha] for linha in planilha.iter_rows(values_only=True)]
+    # Como o pandas, descarta as linhas vazias do fim
+    while linhas and all(valor is np.nan for valor in linhas[-1]):
+        linhas.pop()
+    return pd.DataFrame(linhas, dtype=object).infer_objects()
+
+
+def ler_pasta_plano(filepath):
+    """{nome da aba: DataFrame com todas as linhas, header=None}, abrindo o arquivo uma única vez.
+
+    Planilhas .xlsx são lidas em streaming pelo openpyxl; .xls passa pelo
+    pandas com sheet_name=None, que também lê todas as abas de uma vez.
+    """
+    if filepath.lower().endswith(EXTENSOES_STREAMING):
+        pasta = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+        try:
+            return {planilha.title: _dataframe_planilha(planilha) for planilha in pasta.worksheets}
+        finally:
+            pasta.close()
+    return pd.read_excel(filepath, sheet_name=None, header=None)
+
+
+def separar_plano(df):
+    """(empresa, corpo) de uma aba lida inteira: a empresa vem da primeira linha e o
+    corpo, a partir da quarta, é o que extrair_contas espera"""
+    empresa = extrair_empresa(df.iloc[:1])
+    corpo = df.iloc[LINHAS_TITULO:].reset_index(drop=True)
+    return empresa, corpo
+
+
+def _progresso(progresso, fracao, mensagem):
+    if progresso is not None:
+        progresso(fracao, mensagem)
+
+
+def processar_planos(filepath, progresso=None):
+    """Converte todas as abas de plano de contas da planilha, lida uma única vez.
+
+    Devolve {nome da aba: plano}, na ordem das abas; abas sem "Empresa:" na
+    primeira linha (ex.: observações) são ignoradas. progresso, se informado,
+    é chamado como progresso(fracao, mensagem) entre as etapas.
+    """
+    _progresso(progresso, 0.05, "Lendo planilha")
+    with etapa('leitura_excel') as medicao:
+        abas = ler_pasta_plano(filepath)
+        linhas = medicao.linhas = sum(len(df) for df in abas.values())
+    _progresso(progresso, 0.6, "Extraindo contas")
+    planos = {}
+    with etapa('conversao', linhas):
+        for aba, df in abas.items():
+            try:
+                empresa, corpo = separar_plano(df)
+            except ValueError:
+                continue
+            planos[aba] = {
+                'empresa': empresa,
+                'contas': extrair_contas(corpo)
+            }
+    if not planos:
+        raise ValueError("Nome da empresa não encontrado no arquivo")
+    return planos
+
+
+def processar_plano(filepath, progresso=None):
+    """Converte a planilha do plano de contas no dicionário gravado em data/ (primeira aba com plano)"""
+    return next(iter(processar_planos(filepath, progresso).values()))
+
+
+def caminho_plano(filepath, aba=None):
+    """Caminho do JSON em data/ correspondente à planilha (ou a uma das abas, se houver várias)"""
+    nome_base = os.path.splitext(os.path.basename(filepath))[0]
+    if aba is not None:
+        nome_base = f'{nome_base} - {aba}'
+    return os.path.join(DIRETORIO_PLANOS, f'{nome_base}.json')
+
+
+def caminhos_planos(filepath, planos):
+    """{aba: caminho do JSON} para o resultado de processar_planos; uma aba só mantém o nome da planilha"""
+    if len(planos) == 1:
+        return {aba: caminho_plano(filepath) for aba in planos}
+    return {aba: caminho_plano(filepath, aba) for aba in planos}
+
+
+def gravar_plano(plano_contas, json_filepath, catalogo=None, progresso=None):
+    """Salva o plano como JSON e, se informado, atualiza o catálogo"""
+    _progresso(progresso, 0.9, "Gravando JSON")
+    os.makedirs(os.path.dirname(json_filepath), exist_ok=True)
+    # Arquivo temporário + os.replace: uma atualização nunca deixa o plano pela metade
+    temporario = json_filepath + '.tmp'
+    with etapa('gravacao_json', len(plano_contas['contas'])):
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(plano_contas, f, ensure_ascii=False, indent=4)
+        os.replace(temporario, json_filepath)
+    if catalogo is not None:
+        catalogo.registrar(os.path.basename(json_filepath), plano_contas)
+
+
+def gravar_planos(planos, caminhos, catalogo=None, progresso=None):
+    """Grava cada plano de processar_planos no caminho da sua aba (ver caminhos_planos)"""
+    for aba, plano_contas in planos.items():
+        gravar_plano(plano_contas, caminhos[aba], catalogo, progresso)
@@ -0,0 +1,380 @@
+import json
+import os
+import sqlite3
+from bisect import bisect_left
+
+from services.catalogo import DIRETORIO_PLANOS, DIRETORIO_EXTRATOS, catalogo_planos, catalogo_extratos
+from services.layouts import identificar_colunas
+
+CAMINHO_BANCO = os.path.join('cache', 'contabil.db')
+VERSAO_BANCO = 2
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS planos (
+    arquivo TEXT PRIMARY KEY,
+    empresa TEXT NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS planos_empresa ON planos (empresa);
+
+CREATE TABLE IF NOT EXISTS contas (
+    plano TEXT NOT NULL REFERENCES planos (arquivo) ON DELETE CASCADE,
+    codigo TEXT NOT NULL,
+    ocorrencia INTEGER NOT NULL,
+    ordem REAL NOT NULL,
+    tipo TEXT,
+    classificacao TEXT NOT NULL,
+    nome TEXT,
+    grau INTEGER,
+    PRIMARY KEY (plano, codigo, ocorrencia)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS contas_ordem ON contas (plano, ordem);
+CREATE INDEX IF NOT EXISTS contas_classificacao ON contas (plano, classificacao);
+
+CREATE TABLE IF NOT EXISTS extratos (
+    arquivo TEXT PRIMARY KEY,
+    arquivo_origem TEXT,
+    data_processamento TEXT,
+    colunas TEXT NOT NULL,
+    hash TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS linhas_extrato (
+    extrato TEXT NOT NULL REFERENCES extratos (arquivo) ON DELETE CASCADE,
+    posicao INTEGER NOT NULL,
+    data TEXT,
+    entrada REAL NOT NULL,
+    saida REAL NOT NULL,
+    descricao TEXT,
+    valores TEXT NOT NULL,
+    PRIMARY KEY (extrato, posicao)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS linhas_data ON linhas_extrato (extrato, data);
+CREATE INDEX IF NOT EXISTS linhas_valor ON linhas_extrato (extrato, (entrada - saida));
+"""
+
+
+def chaves_contas(contas):
+    """(código, ocorrência) de cada conta; a ocorrência só separa códigos repetidos"""
+    vistos = {}
+    for conta in contas:
+        ocorrencia = vistos.get(conta['codigo'], 0)
+        vistos[conta['codigo']] = ocorrencia + 1
+        yield (conta['codigo'], ocorrencia), conta
+
+
+def _sequencia_crescente(valores):
+    """Posições de uma maior subsequência estritamente crescente de valores (None fica de fora)"""
+    finais, posicoes_finais, anterior = [], [], {}
+    for posicao, valor in enumerate(valores):
+        if valor is None:
+            continue
+        i = bisect_left(finais, valor)
+        anterior[posicao] = posicoes_finais[i - 1] if i else None
+        if i == len(finais):
+            finais.append(valor)
+            posicoes_finais.append(posicao)
+        else:
+            finais[i] = valor
+            posicoes_finais[i] = posicao
+    mantidas = set()
+    posicao = posicoes_finais[-1] if posicoes_finais else None
+    while posicao is not None:
+        mantidas.add(posicao)
+        posicao = anterior[posicao]
+    return mantidas
+
+
+def _nova_ordem(ordens):
+    """Ordem de cada conta da nova versão, mudando só as que não têm ou que saíram do lugar.
+
+    ordens traz a ordem gravada de cada conta, na sequência do plano novo (None
+    para as adicionadas). As contas de uma maior subsequência crescente ficam
+    como estão; as demais recebem valores espaçados entre as vizinhas mantidas.
+    Devolve None se não há espaço entre duas ordens (muitas inserções no mesmo
+    ponto): aí o plano é renumerado.
+    """
+    mantidas = _sequencia_crescente(ordens)
+    resultado = list(ordens)
+    posicao = 0
+    while posicao < len(ordens):
+        if posicao in mantidas:
+            posicao += 1
+            continue
+        fim = posicao
+        while fim < len(ordens) and fim not in mantidas:
+            fim += 1
+        quantidade = fim - posicao
+        if posicao:
+            inferior = resultado[posicao - 1]
+            superior = ordens[fim] if fim < len(ordens) else inferior + quantidade + 1
+        else:
+            superior = ordens[fim] if fim < len(ordens) else quantidade + 1
+            inferior = superior - quantidade - 1
+        for i in range(quantidade):
+            resultado[posicao + i] = inferior + (superior - inferior) * (i + 1) / (quantidade + 1)
+        posicao = fim
+    if any(a >= b for a, b in zip(resultado, resultado[1:])):
+        return None
+    return resultado
+
+
+def _numero(valor):
+    try:
+        return float(valor) if valor else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class Repositorio:
+    """Cópia indexada em SQLite dos planos (data/) e extratos (extratos/).
+
+    Os JSON continuam sendo a fonte dos dados; sincronizar() importa para o
+    banco os arquivos novos ou alterados (comparando o hash do catálogo) e
+    apaga os que sumiram. Depois disso, contas e linhas podem ser consultadas
+    por código, classificação, data, valor ou posição sem reler o JSON inteiro.
+    Cada linha guarda também o dicionário original (valores), para que
+    carregar_extrato() devolva exatamente o que está no arquivo.
+    """
+
+    def __init__(self, caminho=CAMINHO_BANCO):
+        self.caminho = caminho
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.row_factory = sqlite3.Row
+        self.conexao.execute('PRAGMA foreign_keys = ON')
+        self.conexao.execute('PRAGMA journal_mode = WAL')
+        self._criar_esquema()
+
+    @classmethod
+    def existente(cls, caminho=CAMINHO_BANCO):
+        """Abre e sincroniza o banco se ele já foi criado; None caso contrário"""
+        if not os.path.exists(caminho):
+            return None
+        repositorio = cls(caminho)
+        repositorio.sincronizar()
+        return repositorio
+
+    def _criar_esquema(self):
+        versao = self.conexao.execute('PRAGMA user_version').fetchone()[0]
+        if versao != VERSAO_BANCO:
+            # Banco de outra versão: é só uma cópia dos JSON, então recria do zero
+            with self.conexao:
+                for tabela in ('linhas_extrato', 'extratos', 'contas', 'planos'):
+                    self.conexao.execute(f'DROP TABLE IF EXISTS {tabela}')
+        self.conexao.executescript(ESQUEMA)
+        self.conexao.execute(f'PRAGMA user_version = {VERSAO_BANCO}')
+
+    def fechar(self):
+        self.conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    # Importação
+
+    def importar_plano(self, arquivo, plano, hash_arquivo):
+        """Grava (ou substitui) um plano de contas já lido do JSON"""
+        with self.conexao:
+            self.conexao.execute('DELETE FROM planos WHERE arquivo = ?', (arquivo,))
+            self.conexao.execute('INSERT INTO planos VALUES (?, ?, ?)', (arquivo, plano['empresa'], hash_arquivo))
+            self.conexao.executemany(
+                'INSERT INTO contas VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                ((arquivo, codigo, ocorrencia, posicao, conta['tipo'], conta['classificacao'], conta['nome'],
+                  conta['grau'])
+                 for posicao, ((codigo, ocorrencia), conta) in enumerate(chaves_contas(plano['contas'])))
+            )
+
+    def atualizar_plano(self, arquivo, plano, hash_arquivo, diferenca):
+        """Aplica uma nova versão do plano gravando só as contas que mudaram.
+
+        diferenca é a de comparar_planos entre o plano gravado e o novo (com
+        as mesmas contas de plano['contas']). As
+        contas são chaveadas por código: adicionadas são inseridas, removidas
+        apagadas e renomeadas/reclassificadas atualizadas; a ordem do plano
+        fica em uma coluna à parte, e só as contas novas ou que mudaram de
+        lugar recebem uma ordem nova (entre as vizinhas), sem renumerar as
+        seguintes. Devolve quantas linhas mudaram.
+        """
+        chaves = list(chaves_contas(plano['contas']))
+        gravadas = {(linha[0], linha[1]): linha[2] for linha in self.conexao.execute(
+            'SELECT codigo, ocorrencia, ordem FROM contas WHERE plano = ?', (arquivo,))}
+        novas = {chave for chave, _ in chaves}
+        ordens = [gravadas.get(chave) for chave, _ in chaves]
+        ordem_nova = _nova_ordem(ordens)
+        if ordem_nova is None:
+            ordem_nova = list(range(len(chaves)))
+
+        campos = {id(nova) for _, nova in diferenca['renomeadas'] + diferenca['reclassificadas']}
+        inseridas, atualizadas = [], []
+        for ((codigo, ocorrencia), conta), antiga, ordem in zip(chaves, ordens, ordem_nova):
+            linha = (ordem, conta['tipo'], conta['classificacao'], conta['nome'], conta['grau'])
+            if antiga is None:
+                inseridas.append((arquivo, codigo, ocorrencia) + linha)
+            elif antiga != ordem or id(conta) in campos:
+                atualizadas.append(linha + (arquivo, codigo, ocorrencia))
+        removidas = [(arquivo,) + chave for chave in gravadas if chave not in novas]
+
+        with self.conexao:
+            self.conexao.execute('UPDATE planos SET empresa = ?, hash = ? WHERE arquivo = ?',
+                                 (plano['empresa'], hash_arquivo, arquivo))
+            self.conexao.executemany('DELETE FROM contas WHERE plano = ? AND codigo = ? AND ocorrencia = ?', removidas)
+            self.conexao.executemany(
+                'UPDATE contas SET ordem = ?, tipo = ?, classificacao = ?, nome = ?, grau = ? '
+                'WHERE plano = ? AND codigo = ? AND ocorrencia = ?', atualizadas)
+            self.conexao.executemany('INSERT INTO contas VALUES (?, ?, ?, ?, ?, ?, ?, ?)', inseridas)
+        return len(inseridas) + len(atualizadas) + len(removidas)
+
+    def hash_plano(self, arquivo):
+        linha = self.conexao.execute('SELECT hash FROM planos WHERE arquivo = ?', (arquivo,)).fetchone()
+        return linha[0] if linha else None
+
+    def importar_extrato(self, arquivo, dados_extrato, hash_arquivo):
+        """Grava (ou substitui) um extrato já lido do JSON"""
+        linhas = dados_extrato['dados']
+        chaves = list(linhas[0].keys()) if linhas else []
+        colunas = identificar_colunas(chaves)
+        with self.conexao:
+            self.conexao.execute('DELETE FROM extratos WHERE arquivo = ?', (arquivo,))
+            self.conexao.execute(
+                'INSERT INTO extratos VALUES (?, ?, ?, ?, ?)',
+                (arquivo, dados_extrato.get('arquivo_origem'), dados_extrato.get('data_processamento'),
+                 json.dumps(chaves, ensure_ascii=False), hash_arquivo)
+            )
+            self.conexao.executemany(
+                'INSERT INTO linhas_extrato VALUES (?, ?, ?, ?, ?, ?, ?)',
+                ((arquivo, posicao, linha.get(colunas['data']),
+                  _numero(linha.get(colunas['entradas'])), _numero(linha.get(colunas['saidas'])),
+                  linha.get(colunas['descricao']), json.dumps(linha, ensure_ascii=False))
+                 for posicao, linha in enumerate(linhas))
+            )
+
+    def _sincronizar_tabela(self, tabela, diretorio, catalogo, importar):
+        catalogo.atualizar()
+        gravados = dict(self.conexao.execute(f'SELECT arquivo, hash FROM {tabela}'))
+        importados = 0
+        for arquivo, entrada in catalogo.entradas.items():
+            if gravados.get(arquivo) == entrada['hash']:
+                continue
+            with open(os.path.join(diretorio, arquivo), 'r', encoding='utf-8') as f:
+                importar(arquivo, json.load(f), entrada['hash'])
+            importados += 1
+        removidos = set(gravados) - set(catalogo.entradas)
+        with self.conexao:
+            self.conexao.executemany(f'DELETE FROM {tabela} WHERE arquivo = ?', ((a,) for a in removidos))
+        return importados + len(removidos)
+
+    def sincronizar(self):
+        """Importa os JSON novos/alterados de data/ e extratos/; devolve quantos arquivos mudaram"""
+        return (self._sincronizar_tabela('planos', DIRETORIO_PLANOS, catalogo_planos(), self.importar_plano)
+                + self._sincronizar_tabela('extratos', DIRETORIO_EXTRATOS, catalogo_extratos(), self.importar_extrato))
+
+    # Planos
+
+    def listar_planos(self):
+        """Lista (arquivo, empresa) em ordem alfabética"""
+        return [tuple(linha) for linha in self.conexao.execute('SELECT arquivo, empresa FROM planos ORDER BY arquivo')]
+
+    def planos_da_empresa(self, empresa):
+        return [linha[0] for linha in self.conexao.execute(
+            'SELECT arquivo FROM planos WHERE empresa = ? ORDER BY arquivo', (empresa,))]
+
+    def contar_contas(self, plano):
+        return self.conexao.execute('SELECT COUNT(*) FROM contas WHERE plano = ?', (plano,)).fetchone()[0]
+
+    def contas(self, plano, inicio=0, fim=None):
+        """Contas nas posições [inicio, fim) do plano, na ordem do arquivo"""
+        limite = -1 if fim is None else max(0, fim - inicio)
+        return [self._conta(linha) for linha in self.conexao.execute(
+            'SELECT * FROM contas WHERE plano = ? ORDER BY ordem LIMIT ? OFFSET ?', (plano, limite, inicio))]
+
+    def conta_por_codigo(self, plano, codigo):
+        linha = self.conexao.execute(
+            'SELECT * FROM contas WHERE plano = ? AND codigo = ? ORDER BY ocorrencia LIMIT 1',
+            (plano, codigo)).fetchone()
+        return self._conta(linha) if linha else None
+
+    def contas_por_classificacao(self, plano, prefixo):
+        """Conta com a classificação prefixo e todas as suas filhas (ex.: '1.1' -> 1.1, 1.1.01, ...)"""
+        return [self._conta(linha) for linha in self.conexao.execute(
+            'SELECT * FROM contas WHERE plano = ? AND (classificacao = ? OR '
+            '(classificacao >= ? AND classificacao < ?)) ORDER BY classificacao',
+            (plano, prefixo, prefixo + '.', prefixo + '/'))]
+
+    def carregar_plano(self, plano):
+        """Plano no mesmo formato do JSON em data/"""
+        linha = self.conexao.execute('SELECT empresa FROM planos WHERE arquivo = ?', (plano,)).fetchone()
+        if linha is None:
+            raise KeyError(plano)
+        return {'empresa': linha[0], 'contas': self.contas(plano)}
+
+    @staticmethod
+    def _conta(linha):
+        return {
+            'codigo': linha['codigo'],
+            'tipo': linha['tipo'],
+            'classificacao': linha['classificacao'],
+            'nome': linha['nome'],
+            'grau': linha['grau']
+        }
+
+    # Extratos
+
+    def listar_extratos(self):
+        """Lista (arquivo, arquivo de origem) em ordem alfabética"""
+        return [tuple(linha) for linha in self.conexao.execute(
+            'SELECT arquivo, arquivo_origem FROM extratos ORDER BY arquivo')]
+
+    def colunas_extrato(self, extrato):
+        linha = self.conexao.execute('SELECT colunas FROM extratos WHERE arquivo = ?', (extrato,)).fetchone()
+        if linha is None:
+            raise KeyError(extrato)
+        return json.loads(linha[0])
+
+    def contar_linhas(self, extrato):
+        return self.conexao.execute('SELECT COUNT(*) FROM linhas_extrato WHERE extrato = ?', (extrato,)).fetchone()[0]
+
+    def linhas(self, extrato, inicio=0, fim=None):
+        """Linhas do extrato nas posições [inicio, fim), como no JSON"""
+        fim = self.contar_linhas(extrato) if fim is None else fim
+        return [json.loads(linha[0]) for linha in self.conexao.execute(
+            'SELECT valores FROM linhas_extrato WHERE extrato = ? AND posicao >= ? AND posicao < ? ORDER BY posicao',
+            (extrato, inicio, fim))]
+
+    def linhas_por_periodo(self, extrato, data_inicial=None, data_final=None):
+        """Linhas com data entre data_inicial e data_final (inclusive, 'AAAA-MM-DD')"""
+        condicoes, parametros = self._filtro(extrato, 'data', data_inicial, data_final)
+        return self._consultar_linhas(condicoes, parametros, 'data, posicao')
+
+    def linhas_por_valor(self, extrato, minimo=None, maximo=None):
+        """Linhas cujo valor (entrada - saída) está entre minimo e maximo (inclusive)"""
+        condicoes, parametros = self._filtro(extrato, '(entrada - saida)', minimo, maximo)
+        return self._consultar_linhas(condicoes, parametros, '(entrada - saida), posicao')
+
+    @staticmethod
+    def _filtro(extrato, expressao, minimo, maximo):
+        condicoes, parametros = ['extrato = ?'], [extrato]
+        if minimo is not None:
+            condicoes.append(f'{expressao} >= ?')
+            parametros.append(minimo)
+        if maximo is not None:
+            condicoes.append(f'{expressao} <= ?')
+            parametros.append(maximo)
+        return condicoes, parametros
+
+    def _consultar_linhas(self, condicoes, parametros, ordem):
+        return [json.loads(linha[0]) for linha in self.conexao.execute(
+            f'SELECT valores FROM linhas_extrato WHERE {" AND ".join(condicoes)} ORDER BY {ordem}', parametros)]
+
+    def carregar_extrato(self, extrato):
+        """Extrato no mesmo formato do JSON em extratos/"""
+        linha = self.conexao.execute(
+            'SELECT arquivo_origem, data_processamento FROM extratos WHERE arquivo = ?', (extrato,)).fetchone()
+        if linha is None:
+            raise KeyError(extrato)
+        return {'arquivo_origem': linha[0], 'data_processamento': linha[1], 'dados': self.linhas(extrato)}
@@ -0,0 +1,73 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from services.diagnostico import execucao
+
+MAXIMO_TAREFAS_SIMULTANEAS = 4
+
+_executor = None
+_trava_executor = threading.Lock()
+
+
+class TarefaCancelada(Exception):
+    """Levantada dentro da tarefa quando o usuário pede o cancelamento"""
+
+
+def executor_padrao():
+    """Pool de threads compartilhado pelas importações em segundo plano"""
+    global _executor
+    with _trava_executor:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAXIMO_TAREFAS_SIMULTANEAS, thread_name_prefix='importacao')
+        return _executor
+
+
+class Tarefa:
+    """Execução de funcao(*args, progresso=self, **kwargs) em uma thread de trabalho.
+
+    A própria tarefa é o callback de progresso: a função chama
+    progresso(fracao, mensagem) entre as etapas, o que atualiza fracao/mensagem
+    (lidas pela interface via polling) e levanta TarefaCancelada se o
+    cancelamento foi pedido. Nada aqui toca em widgets do Tk.
+    """
+
+    def __init__(self, descricao, funcao, *args, **kwargs):
+        self.descricao = descricao
+        self.funcao = funcao
+        self.args = args
+        self.kwargs = kwargs
+        self.fracao = 0.0
+        self.mensagem = "Aguardando"
+        self.futuro = None
+        self._cancelar = threading.Event()
+
+    def __call__(self, fracao, mensagem=None):
+        if self._cancelar.is_set():
+            raise TarefaCancelada()
+        self.fracao = fracao
+        if mensagem:
+            self.mensagem = mensagem
+
+    def iniciar(self, executor=None):
+        self.futuro = (executor or executor_padrao()).submit(self._executar)
+        return self
+
+    def _executar(self):
+        with execucao(self.funcao.__name__, self.descricao):
+            self(0.0, "Iniciando")
+            resultado = self.funcao(*self.args, progresso=self, **self.kwargs)
+            self(1.0, "Concluído")
+        return resultado
+
+    def cancelar(self):
+        self._cancelar.set()
+        if self.futuro is not None:
+            self.futuro.cancel()
+
+    @property
+    def cancelada(self):
+        return self._cancelar.is_set()
+
+    @property
+    def concluida(self):
+        return self.futuro is not None and self.futuro.done()
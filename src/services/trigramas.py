@@ -0,0 +1,73 @@
+from services.bibliotecas import np
+from services.lancamentos import conta_analitica, tokenizar
+
+TAMANHO_NGRAMA = 3
+
+
+def ngramas(texto, n=TAMANHO_NGRAMA):
+    """Conjunto de n-gramas de caracteres do texto normalizado (com espaço nas bordas das palavras)"""
+    normalizado = ' ' + ' '.join(tokenizar(texto)) + ' '
+    if len(normalizado) <= 2:
+        return set()
+    return {normalizado[i:i + n] for i in range(len(normalizado) - n + 1)}
+
+
+class IndiceTrigramas:
+    """Índice de trigramas de caracteres dos nomes das contas analíticas.
+
+    Cada trigrama aponta para as contas que o contêm. Uma consulta junta as
+    listas dos trigramas do histórico, conta as coincidências por conta com
+    bincount e calcula a similaridade de Jaccard, sem comparar o histórico
+    com todas as contas.
+    """
+
+    def __init__(self, contas, n=TAMANHO_NGRAMA):
+        self.n = n
+        self.contas = [conta for conta in contas if conta_analitica(conta)]
+
+        postagens = {}
+        tamanhos = []
+        for posicao, conta in enumerate(self.contas):
+            gramas = ngramas(conta['nome'], n)
+            tamanhos.append(len(gramas))
+            for grama in gramas:
+                postagens.setdefault(grama, []).append(posicao)
+
+        self.tamanhos = np.array(tamanhos, dtype=np.int32)
+        self.postagens = {grama: np.array(posicoes, dtype=np.int32) for grama, posicoes in postagens.items()}
+
+    def similaridades(self, descricao):
+        """Similaridade de Jaccard do histórico com cada conta (None se não há trigrama em comum)"""
+        gramas = ngramas(descricao, self.n)
+        listas = [self.postagens[grama] for grama in gramas if grama in self.postagens]
+        if not listas:
+            return None
+        total_consulta = len(gramas)
+        comuns = np.bincount(np.concatenate(listas), minlength=len(self.contas))
+        return comuns / (self.tamanhos + total_consulta - comuns)
+
+    def buscar(self, descricao, k=5, minimo=0.0):
+        """As k contas mais parecidas, como lista de (conta, similaridade) em ordem decrescente"""
+        similaridades = self.similaridades(descricao)
+        if similaridades is None:
+            return []
+        k = min(k, len(similaridades))
+        melhores = np.argpartition(-similaridades, k - 1)[:k]
+        # Ordena por similaridade e, no empate, pela posição no plano
+        melhores = melhores[np.lexsort((melhores, -similaridades[melhores]))]
+        return [
+            (self.contas[posicao], float(similaridades[posicao]))
+            for posicao in melhores
+            if similaridades[posicao] > minimo
+        ]
+
+    def buscar_lote(self, descricoes, k=5, minimo=0.0):
+        """buscar() para todas as descrições de um extrato; históricos repetidos são consultados uma vez"""
+        resultados = {}
+        saida = []
+        for descricao in descricoes:
+            chave = ' '.join(tokenizar(descricao))
+            if chave not in resultados:
+                resultados[chave] = self.buscar(chave, k, minimo)
+            saida.append(resultados[chave])
+        return saida
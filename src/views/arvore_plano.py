@@ -0,0 +1,71 @@
+import tkinter as tk
+from tkinter import ttk
+
+_MARCADOR = 'carregando'
+
+
+class ArvorePlano(ttk.Frame):
+    """Treeview hierárquico do plano de contas, preenchido sob demanda.
+
+    Abre só com as contas do primeiro nível; os filhos de uma conta são
+    inseridos na primeira vez que ela é expandida (até lá, um item marcador
+    faz o Tk mostrar o botão de expandir). O custo de abrir a janela não
+    depende do tamanho do plano.
+    """
+
+    def __init__(self, master, arvore, **kwargs):
+        super().__init__(master, **kwargs)
+        self.arvore = arvore
+
+        self.tree = ttk.Treeview(self, columns=("codigo", "tipo", "classificacao", "grau"), selectmode="browse")
+        self.tree.heading("#0", text="Nome")
+        self.tree.heading("codigo", text="Código")
+        self.tree.heading("tipo", text="Tipo")
+        self.tree.heading("classificacao", text="Classificação")
+        self.tree.heading("grau", text="Grau")
+        self.tree.column("#0", width=800)
+        self.tree.column("codigo", width=80)
+        self.tree.column("tipo", width=50)
+        self.tree.column("classificacao", width=150)
+        self.tree.column("grau", width=50)
+
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        # Layout
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self.tree.bind('<<TreeviewOpen>>', self._ao_expandir)
+        self._inserir_filhos('', arvore.raizes)
+
+    def _inserir_filhos(self, item_pai, nos):
+        for no in nos:
+            conta = self.arvore.contas[no]
+            item = self.tree.insert(
+                item_pai, 'end', iid=str(no), text=conta['nome'],
+                values=(conta['codigo'], conta['tipo'], conta['classificacao'], conta['grau'])
+            )
+            if self.arvore.tem_filhos(no):
+                self.tree.insert(item, 'end', iid=f'{_MARCADOR}{no}')
+
+    def _carregar(self, item):
+        """Troca o marcador pelos filhos reais da conta, se ainda não foram inseridos"""
+        marcador = f'{_MARCADOR}{item}'
+        if self.tree.exists(marcador):
+            self.tree.delete(marcador)
+            self._inserir_filhos(item, self.arvore.filhos[int(item)])
+
+    def _ao_expandir(self, evento):
+        self._carregar(self.tree.focus())
+
+    def mostrar(self, no):
+        """Expande os ancestrais da conta (carregando-os se preciso), seleciona e rola até ela"""
+        for ancestral in reversed(self.arvore.ancestrais(no)):
+            self._carregar(str(ancestral))
+            self.tree.item(str(ancestral), open=True)
+        self.tree.selection_set(str(no))
+        self.tree.focus(str(no))
+        self.tree.see(str(no))
@@ -0,0 +1,139 @@
+import tkinter as tk
+from tkinter import ttk
+
+from services.busca import ler_data, ler_valor
+
+# Espera depois da última tecla antes de consultar o índice, em ms
+ATRASO_BUSCA = 150
+
+
+class _CamposBusca(ttk.Frame):
+    """Campos que disparam buscar() ATRASO_BUSCA ms depois da última alteração (digitar não consulta a cada tecla)"""
+
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
+        self._agendado = None
+        self.bind('<Destroy>', self._ao_destruir)
+
+    def _campo(self, largura):
+        variavel = tk.StringVar()
+        variavel.trace_add('write', lambda *args: self._agendar())
+        return variavel, ttk.Entry(self, textvariable=variavel, width=largura)
+
+    def _agendar(self):
+        if self._agendado is not None:
+            self.after_cancel(self._agendado)
+        self._agendado = self.after(ATRASO_BUSCA, self._executar)
+
+    def _executar(self):
+        self._agendado = None
+        self.buscar()
+
+    def _ao_destruir(self, evento):
+        if evento.widget is self and self._agendado is not None:
+            self.after_cancel(self._agendado)
+            self._agendado = None
+
+    def buscar(self):
+        raise NotImplementedError
+
+
+class BuscaPlano(_CamposBusca):
+    """Busca no plano de contas da ArvorePlano por código, classificação ou nome.
+
+    As contas encontradas ficam na ordem da árvore; Enter e os botões
+    passam de uma para outra, expandindo os níveis até ela.
+    """
+
+    def __init__(self, master, indice, arvore_plano, **kwargs):
+        super().__init__(master, **kwargs)
+        self.indice = indice
+        self.arvore_plano = arvore_plano
+        self.encontradas = []
+        self.atual = 0
+
+        self.texto_var, campo = self._campo(40)
+        self.contador = ttk.Label(self, width=20)
+        campo.bind('<Return>', lambda e: self.mover(1))
+        campo.bind('<Shift-Return>', lambda e: self.mover(-1))
+
+        # Layout
+        ttk.Label(self, text="Buscar (código, classificação ou nome):").grid(row=0, column=0, padx=5)
+        campo.grid(row=0, column=1, padx=5)
+        ttk.Button(self, text="Anterior", command=lambda: self.mover(-1)).grid(row=0, column=2, padx=5)
+        ttk.Button(self, text="Próxima", command=lambda: self.mover(1)).grid(row=0, column=3, padx=5)
+        self.contador.grid(row=0, column=4, padx=5)
+
+    def buscar(self):
+        posicoes = self.indice.buscar(self.texto_var.get())
+        if posicoes is None:
+            self.encontradas = []
+            self.contador.configure(text="")
+            return
+        self.encontradas = sorted(posicoes.tolist(), key=self.arvore_plano.arvore.entrada.__getitem__)
+        self.atual = 0
+        self._mostrar()
+
+    def mover(self, deslocamento):
+        if self.encontradas:
+            self.atual = (self.atual + deslocamento) % len(self.encontradas)
+            self._mostrar()
+
+    def _mostrar(self):
+        if not self.encontradas:
+            self.contador.configure(text="Nenhuma conta")
+            return
+        self.contador.configure(text=f"{self.atual + 1} de {len(self.encontradas)}")
+        self.arvore_plano.mostrar(self.encontradas[self.atual])
+
+
+class FiltroExtrato(_CamposBusca):
+    """Filtros das linhas de um extrato: palavras da descrição, período e faixa de valor.
+
+    Chama ao_filtrar(posicoes) com as posições das linhas que passam nos
+    filtros preenchidos, ou None quando todos estão vazios. Datas em
+    DD/MM/AAAA e valores como 1.234,56; um campo ainda incompleto é ignorado.
+    Os campos ficam desabilitados até o índice ser definido.
+    """
+
+    def __init__(self, master, ao_filtrar, **kwargs):
+        super().__init__(master, **kwargs)
+        self.ao_filtrar = ao_filtrar
+        self.indice = None
+
+        self.texto_var, texto = self._campo(30)
+        self.data_inicial_var, data_inicial = self._campo(12)
+        self.data_final_var, data_final = self._campo(12)
+        self.valor_minimo_var, valor_minimo = self._campo(12)
+        self.valor_maximo_var, valor_maximo = self._campo(12)
+        self.campos = [texto, data_inicial, data_final, valor_minimo, valor_maximo]
+        self.contador = ttk.Label(self, width=30)
+
+        # Layout
+        for coluna, (rotulo, campo) in enumerate([
+            ("Descrição:", texto), ("Data de:", data_inicial), ("até:", data_final),
+            ("Valor de:", valor_minimo), ("até:", valor_maximo),
+        ]):
+            ttk.Label(self, text=rotulo).grid(row=0, column=2 * coluna, padx=(5, 2))
+            campo.grid(row=0, column=2 * coluna + 1, padx=(0, 5))
+        self.contador.grid(row=0, column=10, padx=5)
+        self.definir_indice(None)
+
+    def definir_indice(self, indice):
+        self.indice = indice
+        for campo in self.campos:
+            campo.configure(state='normal' if indice is not None else 'disabled')
+        self.contador.configure(text="" if indice is not None else "Preparando a busca...")
+
+    def buscar(self):
+        if self.indice is None:
+            return
+        posicoes = self.indice.filtrar(
+            self.texto_var.get(),
+            data_inicial=ler_data(self.data_inicial_var.get()),
+            data_final=ler_data(self.data_final_var.get()),
+            valor_minimo=ler_valor(self.valor_minimo_var.get()),
+            valor_maximo=ler_valor(self.valor_maximo_var.get()),
+        )
+        self.contador.configure(text="" if posicoes is None else f"{len(posicoes)} de {self.indice.total} linhas")
+        self.ao_filtrar(posicoes)
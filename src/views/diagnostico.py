@@ -0,0 +1,102 @@
+import tkinter as tk
+from tkinter import ttk
+
+from services import diagnostico
+
+
+def _formatar_linhas(registro):
+    return f"{registro['linhas']:,}".replace(',', '.') if 'linhas' in registro else ''
+
+
+def _formatar_velocidade(registro):
+    return f"{registro['linhas_por_segundo']:,}".replace(',', '.') if 'linhas_por_segundo' in registro else ''
+
+
+def _formatar_memoria(registro):
+    return f"{registro['pico_memoria_mb']:.1f} MB" if 'pico_memoria_mb' in registro else ''
+
+
+class JanelaDiagnostico(tk.Toplevel):
+    """Últimas operações registradas pelo diagnóstico, com o tempo, as linhas e
+    o pico de memória de cada etapa (as etapas aparecem dentro da operação)"""
+
+    def __init__(self, master):
+        super().__init__(master)
+        self.title("Diagnóstico")
+        self.geometry("1000x500")
+
+        if diagnostico.ativo():
+            situacao = f"Diagnóstico ligado ({diagnostico.VARIAVEL_AMBIENTE}={diagnostico.nivel()})"
+            if diagnostico.nivel() != diagnostico.NIVEL_MEMORIA:
+                situacao += f"; use {diagnostico.VARIAVEL_AMBIENTE}={diagnostico.NIVEL_MEMORIA} para medir a memória"
+        else:
+            situacao = (f"Diagnóstico desligado: inicie o programa com {diagnostico.VARIAVEL_AMBIENTE}=1 "
+                        f"(ou ={diagnostico.NIVEL_MEMORIA}) para registrar novas operações")
+        ttk.Label(self, text=situacao).grid(row=0, column=0, columnspan=2, sticky=tk.W, padx=10, pady=5)
+
+        colunas = ('inicio', 'duracao', 'linhas', 'velocidade', 'memoria', 'situacao')
+        self.tree = ttk.Treeview(self, columns=colunas)
+        self.tree.heading('#0', text='Operação / etapa')
+        self.tree.heading('inicio', text='Início')
+        self.tree.heading('duracao', text='Duração (s)')
+        self.tree.heading('linhas', text='Linhas')
+        self.tree.heading('velocidade', text='Linhas/s')
+        self.tree.heading('memoria', text='Pico de memória')
+        self.tree.heading('situacao', text='Situação')
+        self.tree.column('#0', width=300)
+        self.tree.column('inicio', width=140)
+        for coluna in ('duracao', 'linhas', 'velocidade', 'memoria'):
+            self.tree.column(coluna, width=100, anchor=tk.E)
+        self.tree.column('situacao', width=160)
+
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        btn_frame = ttk.Frame(self)
+        ttk.Button(btn_frame, text="Atualizar", command=self.carregar).grid(row=0, column=0, padx=5)
+        ttk.Button(btn_frame, text="Limpar", command=self.limpar).grid(row=0, column=1, padx=5)
+
+        # Layout
+        self.tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        btn_frame.grid(row=2, column=0, columnspan=2, pady=10)
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(1, weight=1)
+
+        self.carregar()
+
+    def carregar(self):
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+        for registro in diagnostico.execucoes_recentes():
+            situacao = registro.get('situacao', '')
+            if 'erro' in registro:
+                situacao = f"{situacao}: {registro['erro']}"
+            texto = registro['operacao']
+            if registro.get('descricao'):
+                texto = f"{texto} - {registro['descricao']}"
+            item = self.tree.insert('', 'end', text=texto, values=(
+                registro.get('inicio', '').replace('T', ' '),
+                f"{registro['duracao']:.3f}",
+                _formatar_linhas(registro),
+                _formatar_velocidade(registro),
+                _formatar_memoria(registro),
+                situacao
+            ))
+            self._inserir_etapas(item, registro.get('etapas', []))
+
+    def _inserir_etapas(self, pai, etapas):
+        for etapa in etapas:
+            item = self.tree.insert(pai, 'end', text=etapa['nome'], values=(
+                '',
+                f"{etapa['duracao']:.3f}",
+                _formatar_linhas(etapa),
+                _formatar_velocidade(etapa),
+                _formatar_memoria(etapa),
+                ''
+            ))
+            self._inserir_etapas(item, etapa.get('etapas', []))
+
+    def limpar(self):
+        diagnostico.limpar()
+        self.carregar()
@@ -0,0 +1,44 @@
+import tkinter as tk
+from tkinter import ttk
+
+from services.bibliotecas import pd
+from views.tabela_virtual import TabelaVirtual
+
+
+def formatar_valor(valor):
+    if isinstance(valor, float):
+        return '' if pd.isna(valor) else f"{valor:.2f}"
+    if isinstance(valor, pd.Timestamp):
+        return valor.strftime('%Y-%m-%d')
+    return str(valor)
+
+
+class JanelaTabelas(tk.Toplevel):
+    """Janela com uma aba por DataFrame, cada uma em uma TabelaVirtual"""
+
+    def __init__(self, master, titulo, tabelas, rodape=None):
+        super().__init__(master)
+        self.title(titulo)
+        self.geometry("1200x600")
+
+        abas = ttk.Notebook(self)
+        for nome, df in tabelas.items():
+            abas.add(self._tabela(abas, df), text=nome)
+
+        # Layout
+        abas.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        if rodape:
+            ttk.Label(self, text=rodape).grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+    def _tabela(self, master, df):
+        colunas = [str(coluna) for coluna in df.columns]
+        # Só as linhas visíveis são convertidas para texto
+        linhas = df.astype(object).to_numpy()
+        return TabelaVirtual(
+            master,
+            colunas=[(coluna, coluna, 120) for coluna in colunas],
+            obter_linhas=lambda inicio, fim: [[formatar_valor(valor) for valor in linha] for linha in linhas[inicio:fim]],
+            total=len(linhas)
+        )
@@ -0,0 +1,48 @@
+import tkinter as tk
+
+from views.painel_tarefas import PainelTarefas, INTERVALO_ATUALIZACAO
+
+
+class JanelaLoteLancamentos(tk.Toplevel):
+    """Acompanha um EscalonadorLancamentos: uma barra de progresso por extrato.
+
+    Quando todos os trabalhos terminam (ou são cancelados), chama
+    ao_concluir(resultados) com os resultados na ordem dos trabalhos e fecha.
+    """
+
+    def __init__(self, master, escalonador, ao_concluir):
+        super().__init__(master)
+        self.title("Gerando Lançamentos")
+        self.geometry("800x400")
+        self.escalonador = escalonador
+        self.ao_concluir = ao_concluir
+
+        self.painel = PainelTarefas(self, titulo=f"{len(escalonador.trabalhos)} extratos em "
+                                                 f"{escalonador.processos} processos")
+        self.painel.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N), padx=10, pady=10)
+        self.columnconfigure(0, weight=1)
+
+        # Falha ao montar o lote (ex.: plano excluído depois de selecionado): não deixa a janela vazia aberta
+        try:
+            tarefas = escalonador.iniciar()
+        except Exception:
+            self.destroy()
+            raise
+
+        # Erros de cada extrato são reunidos em concluir(); o painel não abre um diálogo por falha
+        for tarefa in tarefas:
+            self.painel.adicionar(tarefa, ao_falhar=lambda erro: None)
+        self.protocol("WM_DELETE_WINDOW", self.cancelar)
+        self.after(INTERVALO_ATUALIZACAO, self._verificar)
+
+    def cancelar(self):
+        for tarefa in self.escalonador.tarefas:
+            tarefa.cancelar()
+
+    def _verificar(self):
+        if not self.escalonador.concluido:
+            self.after(INTERVALO_ATUALIZACAO, self._verificar)
+            return
+        resultados = self.escalonador.concluir()
+        self.destroy()
+        self.ao_concluir(resultados)
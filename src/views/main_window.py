@@ -1,11 +1,35 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pandas as pd
 import json
 import os
-import datetime
-import numpy as np
-import decimal
+from views.tabela_virtual import TabelaVirtual
+from views.painel_tarefas import PainelTarefas
+from views.arvore_plano import ArvorePlano
+from views.busca import BuscaPlano, FiltroExtrato
+from services.extratos import extratos_existentes, importar_extrato, importar_extratos
+from services.atualizacao_extrato import atualizar_extrato_incremental
+from services.planos import processar_planos, caminhos_planos, gravar_planos
+from services.tarefas import Tarefa
+from services.catalogo import catalogo_planos, catalogo_extratos
+from services.lancamentos import gerar_lancamentos
+from services.cache_classificacao import CacheClassificacao
+from services.trigramas import IndiceTrigramas
+from services.repositorio import Repositorio
+from services.arvore_contas import ArvoreContas
+from services.agregacao import (extratos_para_dataframe, saldo_corrente, totais_diarios, totais_mensais,
+                                resumo_extratos, totais_por_conta, ler_movimento_com_saldo, conferir_saldo,
+                                movimento_descartado)
+from services.lote_lancamentos import EscalonadorLancamentos, lancamentos_por_plano
+from services.conciliacao import JANELA_DIAS, conciliar
+from services.atualizacao_plano import (comparar_planos, plano_alterado, resumo_diferenca, tabelas_diferenca,
+                                        aplicar_atualizacao, ler_plano_gravado, escolher_plano)
+from views.janela_tabelas import JanelaTabelas
+from views.lote_lancamentos import JanelaLoteLancamentos
+from views.diagnostico import JanelaDiagnostico
+from services.diagnostico import execucao, etapa
+from services.exportacao import LAYOUTS, exportar_lancamentos
+from services.busca import IndicePlano, indexar_extrato, indexar_extrato_banco
+from services.layouts import identificar_colunas
 
 class PlanoContasViewer(tk.Toplevel):
     def __init__(self, master):
@@ -46,6 +70,10 @@ class PlanoContasViewer(tk.Toplevel):
         scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         btn_frame.grid(row=1, column=0, pady=10)
         
+        # Importações rodando em segundo plano
+        self.painel_tarefas = PainelTarefas(main_frame)
+        self.painel_tarefas.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E))
+        
         btn_novo.grid(row=0, column=0, padx=5)
         btn_visualizar.grid(row=0, column=1, padx=5)
         btn_atualizar.grid(row=0, column=2, padx=5)
@@ -65,12 +93,11 @@ class PlanoContasViewer(tk.Toplevel):
         for item in self.tree.get_children():
             self.tree.delete(item)
             
-        if os.path.exists('data'):
-            for arquivo in sorted(os.listdir('data')):
-                if arquivo.endswith('.json'):
-                    with open(os.path.join('data', arquivo), 'r', encoding='utf-8') as f:
-                        dados = json.load(f)
-                        self.tree.insert('', 'end', values=(arquivo, dados['empresa']))
+        with execucao('listar_planos'):
+            planos = catalogo_planos().listar()
+            with etapa('preencher_lista', len(planos)):
+                for arquivo, entrada in planos:
+                    self.tree.insert('', 'end', values=(arquivo, entrada['valor']))
     
     def novo_plano(self):
         filepath = filedialog.askopenfilename(
@@ -80,111 +107,36 @@ class PlanoContasViewer(tk.Toplevel):
         )
         
         if filepath:
-            try:
-                # Lê a primeira linha para pegar o nome da empresa
-                df_empresa = pd.read_excel(filepath, nrows=1, header=None)
-                
-                # Encontra a coluna que contém "Empresa:" e o nome
-                empresa = None
-                empresa_encontrada = False
-                
-                # Itera sobre as colunas da primeira linha
-                for col in df_empresa.columns:
-                    valor = str(df_empresa.iloc[0, col]).strip()
-                    
-                    if empresa_encontrada and valor and valor != 'nan':
-                        empresa = valor
-                        break
-                        
-                    if "Empresa:" in valor:
-                        empresa_encontrada = True
-                
-                if not empresa:
-                    raise ValueError("Nome da empresa não encontrado no arquivo")
-                
-                # Verifica se já existe um plano de contas para esta empresa
-                for arquivo in os.listdir('data'):
-                    if arquivo.endswith('.json'):
-                        with open(os.path.join('data', arquivo), 'r', encoding='utf-8') as f:
-                            dados_existentes = json.load(f)
-                            if dados_existentes['empresa'] == empresa:
-                                if not tk.messagebox.askyesno(
-                                    "Empresa Existente",
-                                    f"Já existe um plano de contas para a empresa:\n{empresa}\n\nDeseja substituir?",
-                                    parent=self
-                                ):
-                                    return
-                
-                # Processa o arquivo
-                df = pd.read_excel(filepath, skiprows=3, header=None)
-                df = df.dropna(axis=1, how='all')
-                df = df.iloc[1:]
-                
-                dados = []
-                for idx, row in df.iterrows():
-                    codigo = row[0]
-                    if pd.notna(codigo):
-                        tipo = str(row[3]).strip() if pd.notna(row[3]) else ''
-                        classificacao = str(row[7]).strip() if pd.notna(row[7]) else ''
-                        
-                        # Procura o nome em todas as colunas não vazias após a classificação
-                        nome = None
-                        for col in [col for col in df.columns if col > 7]:
-                            valor = row[col]
-                            if pd.notna(valor) and isinstance(valor, str) and valor.strip():
-                                nome = valor.strip()
-                                break
-                        
-                        if not nome:
-                            continue
-                            
-                        try:
-                            grau = None
-                            for col in reversed(df.columns):
-                                valor = row[col]
-                                if pd.notna(valor) and isinstance(valor, (int, float)):
-                                    grau = int(valor)
-                                    break
-                            if grau is None:
-                                grau = 0
-                        except (ValueError, TypeError):
-                            grau = 0
-                            
-                        conta = {
-                            'codigo': str(codigo).strip(),
-                            'tipo': tipo,
-                            'classificacao': classificacao,
-                            'nome': nome,
-                            'grau': grau
-                        }
-                        dados.append(conta)
-                
-                # Cria o dicionário final
-                plano_contas = {
-                    'empresa': empresa,
-                    'contas': dados
-                }
-                
-                # Cria diretório data se não existir
-                os.makedirs('data', exist_ok=True)
-                
-                # Gera nome do arquivo JSON
-                nome_base = os.path.splitext(os.path.basename(filepath))[0]
-                json_filepath = os.path.join('data', f'{nome_base}.json')
-                
-                # Salva como JSON
-                with open(json_filepath, 'w', encoding='utf-8') as f:
-                    json.dump(plano_contas, f, ensure_ascii=False, indent=4)
-                
-                self.carregar_planos()  # Recarrega a lista
-                tk.messagebox.showinfo("Sucesso", "Plano de contas adicionado com sucesso!", parent=self)
-                
-            except Exception as e:
-                tk.messagebox.showerror(
-                    "Erro",
-                    f"Erro ao processar o arquivo:\n{str(e)}",
-                    parent=self
-                )
+            # Lê e converte a planilha (todas as abas, em uma leitura) em segundo plano
+            tarefa = Tarefa(f"Plano: {os.path.basename(filepath)}", processar_planos, filepath)
+            self.painel_tarefas.adicionar(tarefa, ao_concluir=lambda planos: self.confirmar_plano(filepath, planos))
+    
+    def confirmar_plano(self, filepath, planos):
+        # Verifica se já existe um plano de contas para alguma das empresas
+        catalogo = catalogo_planos()
+        catalogo.atualizar()
+        existentes = [plano['empresa'] for plano in planos.values() if catalogo.arquivos_por_valor(plano['empresa'])]
+        if existentes:
+            if not tk.messagebox.askyesno(
+                "Empresa Existente",
+                "Já existe um plano de contas para a empresa:\n" + "\n".join(existentes) + "\n\nDeseja substituir?",
+                parent=self
+            ):
+                return
+        
+        # Salva como JSON em segundo plano, um arquivo por aba
+        caminhos = caminhos_planos(filepath, planos)
+        tarefa = Tarefa(f"Gravando: {os.path.basename(filepath)}", gravar_planos, planos, caminhos)
+        self.painel_tarefas.adicionar(tarefa, ao_concluir=lambda _: self.plano_gravado(caminhos, planos))
+    
+    def plano_gravado(self, caminhos, planos):
+        catalogo = catalogo_planos()
+        for aba, plano_contas in planos.items():
+            catalogo.registrar(os.path.basename(caminhos[aba]), plano_contas)
+        self.carregar_planos()  # Recarrega a lista
+        mensagem = ("Plano de contas adicionado com sucesso!" if len(planos) == 1
+                    else f"{len(planos)} planos de contas adicionados com sucesso!")
+        tk.messagebox.showinfo("Sucesso", mensagem, parent=self)
     
     def atualizar_plano(self):
         selecionado = self.tree.selection()
@@ -201,19 +153,41 @@ class PlanoContasViewer(tk.Toplevel):
         )
         
         if filepath:
-            try:
-                # Mesmo processo do novo_plano, mas mantendo o arquivo JSON existente
-                # ... (código de processamento igual ao novo_plano)
-                
-                self.carregar_planos()
-                tk.messagebox.showinfo("Sucesso", "Plano de contas atualizado com sucesso!", parent=self)
-                
-            except Exception as e:
-                tk.messagebox.showerror(
-                    "Erro",
-                    f"Erro ao atualizar o arquivo:\n{str(e)}",
-                    parent=self
-                )
+            # Mesma leitura do novo_plano; a gravação mantém o arquivo JSON existente
+            tarefa = Tarefa(f"Plano: {os.path.basename(filepath)}", processar_planos, filepath)
+            self.painel_tarefas.adicionar(tarefa, ao_concluir=lambda planos: self.comparar_plano(arquivo_json, planos))
+    
+    def comparar_plano(self, arquivo_json, planos):
+        try:
+            plano_antigo = ler_plano_gravado(arquivo_json)
+            plano_novo = escolher_plano(planos, plano_antigo)
+        except Exception as e:
+            tk.messagebox.showerror("Erro", f"Erro ao atualizar o arquivo:\n{str(e)}", parent=self)
+            return
+        
+        diferenca = comparar_planos(plano_antigo['contas'], plano_novo['contas'])
+        empresa_alterada = plano_antigo['empresa'] != plano_novo['empresa']
+        if not plano_alterado(diferenca) and not empresa_alterada:
+            tk.messagebox.showinfo("Atualizar Plano", "A planilha não tem alterações em relação ao plano gravado.", parent=self)
+            return
+        
+        mensagem = f"Alterações encontradas em {arquivo_json}:\n{resumo_diferenca(diferenca)}"
+        if empresa_alterada:
+            mensagem += f"\n\nA empresa muda de {plano_antigo['empresa']} para {plano_novo['empresa']}."
+        if not tk.messagebox.askyesno("Atualizar Plano", mensagem + "\n\nDeseja aplicar?", parent=self):
+            return
+        
+        tarefa = Tarefa(f"Atualizando: {arquivo_json}", aplicar_atualizacao,
+                        arquivo_json, plano_novo, diferenca)
+        self.painel_tarefas.adicionar(tarefa, ao_concluir=lambda resumo: self.plano_atualizado(diferenca, resumo))
+    
+    def plano_atualizado(self, diferenca, resumo):
+        self.carregar_planos()
+        rodape = (f"{resumo_diferenca(diferenca)}. Cache de classificação: {resumo['cache_mantidas']} "
+                  f"entradas mantidas, {resumo['cache_descartadas']} descartadas")
+        if resumo['linhas_banco'] is not None:
+            rodape += f". Banco: {resumo['linhas_banco']} linhas alteradas"
+        JanelaTabelas(self, "Plano de contas atualizado", tabelas_diferenca(diferenca), rodape=rodape)
     
     def excluir_plano(self):
         selecionado = self.tree.selection()
@@ -231,6 +205,7 @@ class PlanoContasViewer(tk.Toplevel):
         ):
             try:
                 os.remove(os.path.join('data', arquivo))
+                catalogo_planos().remover(arquivo)
                 self.carregar_planos()
                 tk.messagebox.showinfo("Sucesso", "Plano de contas excluído com sucesso!", parent=self)
             except Exception as e:
@@ -249,58 +224,35 @@ class PlanoContasViewer(tk.Toplevel):
         caminho = os.path.join('data', arquivo)
         
         try:
-            with open(caminho, 'r', encoding='utf-8') as f:
-                dados = json.load(f)
+            repositorio = Repositorio.existente()
+            if repositorio is not None:
+                with repositorio:
+                    dados = repositorio.carregar_plano(arquivo)
+            else:
+                with open(caminho, 'r', encoding='utf-8') as f:
+                    dados = json.load(f)
                 
             # Criar nova janela para mostrar os detalhes
             detalhes = tk.Toplevel(self)
             detalhes.title(f"Detalhes - {dados['empresa']}")
             detalhes.geometry("1200x600")
             
-            # Criar Treeview para mostrar as contas
-            tree = ttk.Treeview(detalhes, columns=("codigo", "tipo", "classificacao", "nome", "grau"), show="headings")
-            tree.heading("codigo", text="Código")
-            tree.heading("tipo", text="Tipo")
-            tree.heading("classificacao", text="Classificação")
-            tree.heading("nome", text="Nome")
-            tree.heading("grau", text="Grau")
-            
-            # Configurar colunas
-            tree.column("codigo", width=80)
-            tree.column("tipo", width=50)
-            tree.column("classificacao", width=100)
-            tree.column("nome", width=800)
-            tree.column("grau", width=50)
+            # Hierarquia pela classificação; a janela abre recolhida e os filhos são inseridos ao expandir
+            arvore = ArvorePlano(detalhes, ArvoreContas(dados['contas']))
             
-            # Adicionar scrollbar
-            scrollbar = ttk.Scrollbar(detalhes, orient=tk.VERTICAL, command=tree.yview)
-            tree.configure(yscrollcommand=scrollbar.set)
+            # Busca pelos índices de código, classificação e nome, montados uma vez ao abrir
+            busca = BuscaPlano(detalhes, IndicePlano(dados['contas']), arvore)
             
             # Layout
-            tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-            scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+            busca.grid(row=0, column=0, sticky=tk.W, pady=5)
+            arvore.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
             
             # Configurar grid
             detalhes.columnconfigure(0, weight=1)
-            detalhes.rowconfigure(0, weight=1)
-            
-            # Preencher dados
-            for conta in dados['contas']:
-                nome_tabulado = self.adicionar_tabulacao(conta['nome'], conta['classificacao'])
-                tree.insert('', 'end', values=(
-                    conta['codigo'],
-                    conta['tipo'],
-                    conta['classificacao'],
-                    nome_tabulado,
-                    conta['grau']
-                ))
+            detalhes.rowconfigure(1, weight=1)
                 
         except Exception as e:
             tk.messagebox.showerror("Erro", f"Erro ao abrir detalhes: {str(e)}", parent=self)
-    
-    def adicionar_tabulacao(self, nome, classificacao):
-        niveis = len(classificacao.split('.')) - 1
-        return '        ' * niveis + nome
 
 class TelaSelecaoArquivos(tk.Toplevel):
     def __init__(self, master):
@@ -311,6 +263,7 @@ class TelaSelecaoArquivos(tk.Toplevel):
         # Configurações da janela
         self.extratos_vars = {}  # Dicionário para guardar as variáveis dos checkboxes
         self.plano_contas_var = tk.StringVar()
+        self.janela_var = tk.StringVar(value=str(JANELA_DIAS))
         self.setup_ui()
         self.carregar_arquivos()
     
@@ -358,8 +311,14 @@ class TelaSelecaoArquivos(tk.Toplevel):
         self.btn_confirmar = ttk.Button(frame_botoes, text="Confirmar", command=self.confirmar_selecao)
         self.btn_confirmar.grid(row=0, column=0, padx=5)
         
+        self.btn_conciliar = ttk.Button(frame_botoes, text="Conciliar Extratos", command=self.conciliar_extratos)
+        self.btn_conciliar.grid(row=0, column=1, padx=5)
+        
+        ttk.Label(frame_botoes, text="Janela (dias):").grid(row=0, column=2, padx=(5, 0))
+        ttk.Spinbox(frame_botoes, from_=0, to=30, width=4, textvariable=self.janela_var).grid(row=0, column=3, padx=5)
+        
         self.btn_cancelar = ttk.Button(frame_botoes, text="Cancelar", command=self.destroy)
-        self.btn_cancelar.grid(row=0, column=1, padx=5)
+        self.btn_cancelar.grid(row=0, column=4, padx=5)
         
         # Configurar grid weights
         self.columnconfigure(0, weight=1)
@@ -390,17 +349,46 @@ class TelaSelecaoArquivos(tk.Toplevel):
                     ).pack(anchor=tk.W, padx=5, pady=2)
         
         # Carregar planos de contas com radio buttons
-        if os.path.exists('data'):
-            for arquivo in sorted(os.listdir('data')):
-                if arquivo.endswith('.json'):
-                    with open(os.path.join('data', arquivo), 'r', encoding='utf-8') as f:
-                        dados = json.load(f)
-                        ttk.Radiobutton(
-                            self.frame_radio,
-                            text=f"{dados['empresa']} ({arquivo})",
-                            value=arquivo,
-                            variable=self.plano_contas_var
-                        ).pack(anchor=tk.W, padx=5, pady=2)
+        for arquivo, entrada in catalogo_planos().listar():
+            ttk.Radiobutton(
+                self.frame_radio,
+                text=f"{entrada['valor']} ({arquivo})",
+                value=arquivo,
+                variable=self.plano_contas_var
+            ).pack(anchor=tk.W, padx=5, pady=2)
+    
+    def conciliar_extratos(self):
+        extratos_selecionados = [arquivo for arquivo, var in self.extratos_vars.items() if var.get()]
+        if len(extratos_selecionados) < 2:
+            tk.messagebox.showwarning("Aviso", "Selecione pelo menos dois extratos para conciliar!", parent=self)
+            return
+        
+        try:
+            janela = int(self.janela_var.get())
+        except ValueError:
+            tk.messagebox.showwarning("Aviso", "Informe a janela em dias!", parent=self)
+            return
+        
+        try:
+            extratos = {}
+            for arquivo in extratos_selecionados:
+                with open(os.path.join('extratos', arquivo), 'r', encoding='utf-8') as f:
+                    extratos[arquivo] = json.load(f)
+            
+            resultado = conciliar(extratos_para_dataframe(extratos), janela)
+        except Exception as e:
+            tk.messagebox.showerror("Erro", f"Erro ao conciliar os extratos: {str(e)}", parent=self)
+            return
+        
+        relatorio = JanelaTabelas(self, "Conciliação de Extratos", {
+            "Transferências": resultado['transferencias'],
+            "Duplicadas": resultado['duplicadas'],
+        }, rodape=f"{len(resultado['transferencias'])} transferências entre contas e "
+                  f"{len(resultado['duplicadas'])} linhas duplicadas (janela de {janela} dias)")
+        # Esta janela é modal: o relatório recebe o foco e o devolve ao ser fechado
+        relatorio.grab_set()
+        self.wait_window(relatorio)
+        self.grab_set()
     
     def confirmar_selecao(self):
         # Verificar seleção de extratos
@@ -455,16 +443,24 @@ class ExtratoViewer(tk.Toplevel):
         btn_visualizar = ttk.Button(btn_frame, text="Visualizar Detalhes", command=self.visualizar_detalhes)
         btn_atualizar = ttk.Button(btn_frame, text="Atualizar Extrato", command=self.atualizar_extrato)
         btn_excluir = ttk.Button(btn_frame, text="Excluir Extrato", command=self.excluir_extrato)
+        btn_totais = ttk.Button(btn_frame, text="Saldos e Totais", command=self.mostrar_totais)
+        btn_conferir = ttk.Button(btn_frame, text="Conferir Saldo", command=self.conferir_saldo)
         
         # Layout
         self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         btn_frame.grid(row=1, column=0, pady=10)
         
+        # Importações rodando em segundo plano
+        self.painel_tarefas = PainelTarefas(main_frame)
+        self.painel_tarefas.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E))
+        
         btn_novo.grid(row=0, column=0, padx=5)
         btn_visualizar.grid(row=0, column=1, padx=5)
         btn_atualizar.grid(row=0, column=2, padx=5)
         btn_excluir.grid(row=0, column=3, padx=5)
+        btn_totais.grid(row=0, column=4, padx=5)
+        btn_conferir.grid(row=0, column=5, padx=5)
         
         # Configurar grid
         self.columnconfigure(0, weight=1)
@@ -480,13 +476,11 @@ class ExtratoViewer(tk.Toplevel):
         for item in self.tree.get_children():
             self.tree.delete(item)
             
-        if os.path.exists('extratos'):
-            for arquivo in sorted(os.listdir('extratos')):
-                if arquivo.endswith('.json'):
-                    with open(os.path.join('extratos', arquivo), 'r', encoding='utf-8') as f:
-                        dados = json.load(f)
-                        nome_excel = dados['arquivo_origem']
-                        self.tree.insert('', 'end', values=(arquivo, f"({nome_excel})"))
+        with execucao('listar_extratos'):
+            extratos = catalogo_extratos().listar()
+            with etapa('preencher_lista', len(extratos)):
+                for arquivo, entrada in extratos:
+                    self.tree.insert('', 'end', values=(arquivo, f"({entrada['valor']})"))
 
     def excluir_extrato(self):
         selecionado = self.tree.selection()
@@ -503,6 +497,7 @@ class ExtratoViewer(tk.Toplevel):
         ):
             try:
                 os.remove(os.path.join('extratos', arquivo))
+                catalogo_extratos().remover(arquivo)
                 self.carregar_extratos()  # Recarrega a lista
                 tk.messagebox.showinfo("Sucesso", "Extrato excluído com sucesso!", parent=self)
             except Exception as e:
@@ -528,78 +523,52 @@ class ExtratoViewer(tk.Toplevel):
         )
         
         if filepath:
-            try:
-                # Lê o arquivo Excel
-                df = pd.read_excel(filepath)
-                
-                # Lista de possíveis nomes para as colunas que queremos remover
-                colunas_para_remover = [
-                    'Código', 'Cod', 'Cod.', 'Codigo',
-                    'Doc', 'Doc.', 'Documento', 'Nº Doc', 'N Doc', 'Num Doc',
-                    'Saldo dia', 'Saldo Dia', 'Saldo do dia', 'Saldo'
-                ]
-                
-                # Remove as colunas que não precisamos (ignorando case)
-                colunas_atuais = df.columns.tolist()
-                for coluna in colunas_atuais:
-                    if any(remover.lower() in coluna.lower() for remover in colunas_para_remover):
-                        df = df.drop(columns=[coluna])
-                
-                # Remove linhas totalmente vazias
-                df = df.dropna(how='all')
-                
-                # Remove linhas com descrição vazia ou nula
-                coluna_descricao = [col for col in df.columns if 'desc' in col.lower()][0]
-                df = df.dropna(subset=[coluna_descricao])
-                df = df[df[coluna_descricao].astype(str).str.strip() != '']
-                
-                # Converte DataFrame para dicionário, tratando valores especiais
-                dados = []
-                for _, row in df.iterrows():
-                    linha = {}
-                    for coluna in df.columns:
-                        linha[str(coluna)] = self.converter_para_serializavel(row[coluna])
-                    dados.append(linha)
-                
-                # Atualiza o arquivo JSON
-                dados_extrato = {
-                    'arquivo_origem': os.path.basename(filepath),
-                    'data_processamento': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    'dados': dados
-                }
-                
-                # Salva o arquivo atualizado
-                with open(os.path.join('extratos', arquivo_json), 'w', encoding='utf-8') as f:
-                    json.dump(dados_extrato, f, ensure_ascii=False, indent=4)
-                
-                self.carregar_extratos()  # Recarrega a lista
-                tk.messagebox.showinfo("Sucesso", "Extrato atualizado com sucesso!", parent=self)
-                
-            except Exception as e:
-                tk.messagebox.showerror(
-                    "Erro",
-                    f"Erro ao atualizar o arquivo:\n{str(e)}",
-                    parent=self
+            # Acrescenta em segundo plano só as linhas que ainda não estão no extrato
+            json_filepath = os.path.join('extratos', arquivo_json)
+            tarefa = Tarefa(f"Atualizando: {arquivo_json}", atualizar_extrato_incremental, filepath, json_filepath)
+            self.painel_tarefas.adicionar(
+                tarefa,
+                ao_concluir=lambda resumo: self.extrato_atualizado(filepath, json_filepath, resumo),
+                ao_falhar=self.erro_atualizacao
+            )
+    
+    def extrato_atualizado(self, filepath, json_filepath, resumo):
+        mensagem = (f"Extrato atualizado com sucesso!\n\n{resumo['novas']} linhas novas, "
+                    f"{resumo['existentes']} já existentes.")
+        self.extrato_gravado(json_filepath, resumo, mensagem)
+        
+        # Histórico alterado pelo banco: oferece substituir o extrato inteiro pela planilha
+        if resumo['conflitos'] or resumo['ausentes']:
+            exemplos = "\n".join(
+                " | ".join(str(valor) for valor in linha.values()) for linha in resumo['conflitos'][:5]
+            )
+            if tk.messagebox.askyesno(
+                "Linhas Conflitantes",
+                f"{len(resumo['conflitos'])} linhas da planilha alteram datas já gravadas e não foram incluídas"
+                f"; {resumo['ausentes']} linhas gravadas não aparecem mais na planilha.\n\n{exemplos}\n\n"
+                "Deseja substituir o extrato inteiro pela nova planilha?",
+                parent=self
+            ):
+                tarefa = Tarefa(f"Substituindo: {os.path.basename(json_filepath)}", importar_extrato,
+                                filepath, json_filepath, aba=resumo['aba'])
+                self.painel_tarefas.adicionar(
+                    tarefa,
+                    ao_concluir=lambda resumo: self.extrato_gravado(json_filepath, resumo, "Extrato substituído com sucesso!"),
+                    ao_falhar=self.erro_atualizacao
                 )
     
-    def converter_para_serializavel(self, valor):
-        """Converte valores para formatos serializáveis em JSON"""
-        if pd.isna(valor):
-            return None
-        elif isinstance(valor, (pd.Timestamp, pd._libs.tslibs.timestamps.Timestamp)):
-            return valor.strftime('%Y-%m-%d')
-        elif isinstance(valor, datetime.datetime):
-            return valor.strftime('%Y-%m-%d')
-        elif isinstance(valor, datetime.date):
-            return valor.strftime('%Y-%m-%d')
-        elif isinstance(valor, (np.int64, np.int32, np.int16, np.int8)):
-            return int(valor)
-        elif isinstance(valor, (np.float64, np.float32)):
-            return float(valor)
-        elif isinstance(valor, decimal.Decimal):
-            return str(valor)
-        return valor
-
+    def erro_atualizacao(self, erro):
+        tk.messagebox.showerror(
+            "Erro",
+            f"Erro ao atualizar o arquivo:\n{str(erro)}",
+            parent=self
+        )
+    
+    def extrato_gravado(self, json_filepath, resumo, mensagem):
+        catalogo_extratos().registrar(os.path.basename(json_filepath), resumo, resumo['linhas'])
+        self.carregar_extratos()  # Recarrega a lista
+        tk.messagebox.showinfo("Sucesso", mensagem, parent=self)
+    
     def visualizar_detalhes(self):
         selecionado = self.tree.selection()
         if not selecionado:
@@ -609,44 +578,133 @@ class ExtratoViewer(tk.Toplevel):
         caminho = os.path.join('extratos', arquivo)
         
         try:
-            with open(caminho, 'r', encoding='utf-8') as f:
-                dados = json.load(f)
+            repositorio = Repositorio.existente()
+            if repositorio is not None:
+                # Com o banco SQLite, só as linhas pedidas pela tabela são lidas
+                origem = self.tree.item(selecionado[0])['values'][1].strip('()')
+                colunas = repositorio.colunas_extrato(arquivo)
+                total = repositorio.contar_linhas(arquivo)
+                buscar_linhas = lambda inicio, fim: repositorio.linhas(arquivo, inicio, fim)
+            else:
+                with open(caminho, 'r', encoding='utf-8') as f:
+                    dados = json.load(f)
+                origem = dados['arquivo_origem']
+                linhas = dados['dados']
+                # Configurar colunas baseado nos dados
+                colunas = list(linhas[0].keys()) if linhas else []
+                total = len(linhas)
+                buscar_linhas = lambda inicio, fim: linhas[inicio:fim]
             
             # Criar nova janela para mostrar os detalhes
             detalhes = tk.Toplevel(self)
-            detalhes.title(f"Detalhes - {dados['arquivo_origem']}")
+            detalhes.title(f"Detalhes - {origem}")
             detalhes.geometry("1200x600")
             
-            # Criar Treeview para mostrar os dados
-            tree = ttk.Treeview(detalhes, show="headings")
-            
-            # Configurar colunas baseado nos dados
-            if dados['dados']:
-                colunas = list(dados['dados'][0].keys())
-                tree["columns"] = colunas
-                for col in colunas:
-                    tree.heading(col, text=col)
-                    tree.column(col, width=100)
+            # Só as linhas visíveis são inseridas no Treeview; valores alinhados à direita
+            obter_linhas = lambda inicio, fim: [list(linha.values()) for linha in buscar_linhas(inicio, fim)]
+            mapa = identificar_colunas(colunas)
+            valores = {mapa['entradas'], mapa['saidas']}
+            tabela = TabelaVirtual(
+                detalhes,
+                colunas=[(col, col, 100, tk.E if col in valores else tk.W) for col in colunas],
+                obter_linhas=obter_linhas,
+                total=total
+            )
             
-            # Adicionar scrollbar
-            scrollbar = ttk.Scrollbar(detalhes, orient=tk.VERTICAL, command=tree.yview)
-            tree.configure(yscrollcommand=scrollbar.set)
+            # Filtros pelo índice do extrato, montado em segundo plano (a tabela já pode ser rolada)
+            filtro = FiltroExtrato(
+                detalhes,
+                ao_filtrar=lambda posicoes: self.filtrar_detalhes(tabela, filtro.indice, posicoes, total, obter_linhas)
+            )
+            painel = PainelTarefas(detalhes, titulo="Preparando a busca")
+            if repositorio is not None:
+                # A tarefa abre a sua própria conexão e já deixa as linhas em memória para os filtros
+                tarefa = Tarefa(f"Indexando: {arquivo}", indexar_extrato_banco, arquivo)
+            else:
+                tarefa = Tarefa(f"Indexando: {arquivo}", indexar_extrato, linhas)
+            painel.adicionar(tarefa, ao_concluir=filtro.definir_indice)
             
             # Layout
-            tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-            scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+            filtro.grid(row=0, column=0, sticky=tk.W, pady=5)
+            tabela.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+            painel.grid(row=2, column=0, sticky=(tk.W, tk.E))
             
             # Configurar grid
             detalhes.columnconfigure(0, weight=1)
-            detalhes.rowconfigure(0, weight=1)
-            
-            # Preencher dados
-            for linha in dados['dados']:
-                tree.insert('', 'end', values=list(linha.values()))
+            detalhes.rowconfigure(1, weight=1)
                 
         except Exception as e:
             tk.messagebox.showerror("Erro", f"Erro ao abrir detalhes: {str(e)}", parent=self)
 
+    def filtrar_detalhes(self, tabela, indice, posicoes, total, obter_linhas):
+        """Mostra na tabela de detalhes só as linhas filtradas, ou todas de novo quando não há filtro"""
+        if posicoes is None:
+            tabela.atualizar(total, obter_linhas)
+        else:
+            tabela.atualizar(len(posicoes), lambda inicio, fim: [
+                list(indice.linhas[posicao].values()) for posicao in posicoes[inicio:fim]
+            ])
+
+    def mostrar_totais(self):
+        selecionados = self.tree.selection()
+        if not selecionados:
+            tk.messagebox.showwarning("Aviso", "Selecione um ou mais extratos!", parent=self)
+            return
+        
+        try:
+            extratos = {}
+            for item in selecionados:
+                arquivo = self.tree.item(item)['values'][0]
+                with open(os.path.join('extratos', arquivo), 'r', encoding='utf-8') as f:
+                    extratos[arquivo] = json.load(f)
+            
+            movimento = extratos_para_dataframe(extratos)
+            movimento['saldo'] = saldo_corrente(movimento)
+            JanelaTabelas(self, "Saldos e Totais", {
+                "Resumo": resumo_extratos(movimento),
+                "Diário": totais_diarios(movimento),
+                "Mensal": totais_mensais(movimento),
+                "Saldo Corrente": movimento,
+            }, rodape="Saldos calculados a partir de saldo inicial zero")
+        except Exception as e:
+            tk.messagebox.showerror("Erro", f"Erro ao calcular os totais: {str(e)}", parent=self)
+    
+    def conferir_saldo(self):
+        # A coluna de saldo não vai para o JSON: a conferência é feita sobre a planilha do banco
+        filepath = filedialog.askopenfilename(
+            title="Selecione a planilha do banco com a coluna de saldo",
+            filetypes=[("Excel files", "*.xlsx")],
+            parent=self
+        )
+        
+        if filepath:
+            tarefa = Tarefa(f"Conferindo saldo: {os.path.basename(filepath)}", ler_movimento_com_saldo, filepath)
+            self.painel_tarefas.adicionar(
+                tarefa,
+                ao_concluir=lambda movimento: self.saldo_conferido(filepath, movimento),
+                ao_falhar=lambda erro: tk.messagebox.showerror(
+                    "Erro", f"Erro ao conferir o saldo:\n{str(erro)}", parent=self
+                )
+            )
+    
+    def saldo_conferido(self, filepath, movimento):
+        if movimento is None:
+            tk.messagebox.showwarning("Aviso", "A planilha não tem coluna de saldo.", parent=self)
+            return
+        
+        conferidas, divergentes = conferir_saldo(movimento)
+        descartadas = movimento_descartado(movimento)
+        mensagem = f"{conferidas} linhas conferidas, {len(divergentes)} quebras de saldo"
+        if len(descartadas):
+            mensagem += f", {len(descartadas)} linhas com valor sem descrição (não importadas)"
+        if divergentes.empty and descartadas.empty:
+            tk.messagebox.showinfo("Saldo Conferido", f"{mensagem}.", parent=self)
+            return
+        JanelaTabelas(self, f"Conferência de Saldo - {os.path.basename(filepath)}", {
+            "Quebras de Saldo": divergentes,
+            "Não Importadas": descartadas,
+        }, rodape=mensagem)
+
     def novo_extrato(self):
         # Solicitar arquivo Excel
         filepath = filedialog.askopenfilename(
@@ -656,75 +714,130 @@ class ExtratoViewer(tk.Toplevel):
         )
         
         if filepath:
-            try:
-                # Lê o arquivo Excel
-                df = pd.read_excel(filepath)
-                
-                # Lista de possíveis nomes para as colunas que queremos remover
-                colunas_para_remover = [
-                    'Código', 'Cod', 'Cod.', 'Codigo',
-                    'Doc', 'Doc.', 'Documento', 'Nº Doc', 'N Doc', 'Num Doc',
-                    'Saldo dia', 'Saldo Dia', 'Saldo do dia', 'Saldo'
-                ]
-                
-                # Remove as colunas que não precisamos (ignorando case)
-                colunas_atuais = df.columns.tolist()
-                for coluna in colunas_atuais:
-                    if any(remover.lower() in coluna.lower() for remover in colunas_para_remover):
-                        df = df.drop(columns=[coluna])
-                
-                # Remove linhas totalmente vazias
-                df = df.dropna(how='all')
-                
-                # Remove linhas com descrição vazia ou nula
-                coluna_descricao = [col for col in df.columns if 'desc' in col.lower()][0]
-                df = df.dropna(subset=[coluna_descricao])
-                df = df[df[coluna_descricao].astype(str).str.strip() != '']
-                
-                # Converte DataFrame para dicionário, tratando valores especiais
-                dados = []
-                for _, row in df.iterrows():
-                    linha = {}
-                    for coluna in df.columns:
-                        linha[str(coluna)] = self.converter_para_serializavel(row[coluna])
-                    dados.append(linha)
-                
-                # Cria diretório extratos se não existir
-                os.makedirs('extratos', exist_ok=True)
-                
-                # Extrai informações básicas
-                dados_extrato = {
-                    'arquivo_origem': os.path.basename(filepath),
-                    'data_processamento': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    'dados': dados
-                }
-                
-                # Gera nome do arquivo JSON
-                nome_base = os.path.splitext(os.path.basename(filepath))[0]
-                json_filepath = os.path.join('extratos', f'{nome_base}.json')
-                
-                # Verifica se já existe um arquivo com esse nome
-                if os.path.exists(json_filepath):
-                    if not tk.messagebox.askyesno(
-                        "Arquivo Existente",
-                        f"Já existe um extrato com o nome {nome_base}.\nDeseja substituir?",
-                        parent=self
-                    ):
-                        return
-                
-                # Salva como JSON
-                with open(json_filepath, 'w', encoding='utf-8') as f:
-                    json.dump(dados_extrato, f, ensure_ascii=False, indent=4)
-                
-                self.carregar_extratos()  # Recarrega a lista
-                tk.messagebox.showinfo("Sucesso", "Extrato adicionado com sucesso!", parent=self)
-                
-            except Exception as e:
-                tk.messagebox.showerror(
-                    "Erro",
-                    f"Erro ao processar o arquivo:\n{str(e)}",
+            # Verifica se já existe extrato com o nome da planilha (ou de uma de suas abas)
+            existentes = extratos_existentes(filepath)
+            if existentes:
+                nomes = "\n".join(os.path.splitext(arquivo)[0] for arquivo in existentes)
+                if not tk.messagebox.askyesno(
+                    "Arquivo Existente",
+                    f"Já existe um extrato com o nome:\n{nomes}\nDeseja substituir?",
                     parent=self
-                )
+                ):
+                    return
+            
+            # Lê a planilha (todas as abas de extrato) e grava os JSON linha a linha em segundo plano
+            tarefa = Tarefa(f"Extrato: {os.path.basename(filepath)}", importar_extratos, filepath)
+            self.painel_tarefas.adicionar(tarefa, ao_concluir=self.extratos_gravados)
+    
+    def extratos_gravados(self, resumos):
+        catalogo = catalogo_extratos()
+        for resumo in resumos:
+            catalogo.registrar(os.path.basename(resumo['destino']), resumo, resumo['linhas'])
+        self.carregar_extratos()  # Recarrega a lista
+        mensagem = ("Extrato adicionado com sucesso!" if len(resumos) == 1
+                    else f"{len(resumos)} extratos adicionados com sucesso!")
+        tk.messagebox.showinfo("Sucesso", mensagem, parent=self)
+
+class LancamentosViewer(tk.Toplevel):
+    def __init__(self, master, plano, lancamentos, estatisticas_cache=None):
+        super().__init__(master)
+        self.title(f"Lançamentos - {plano['empresa']}")
+        self.geometry("1200x600")
+        self.contas = {conta['codigo']: conta for conta in plano['contas']}
+        self.lancamentos = lancamentos
+        self.estatisticas_cache = estatisticas_cache
+        self.setup_ui()
+    
+    def setup_ui(self):
+        tabela = TabelaVirtual(
+            self,
+            colunas=[
+                ("data", "Data", 90),
+                ("debito", "Débito", 220),
+                ("credito", "Crédito", 220),
+                ("valor", "Valor", 90, tk.E),
+                ("historico", "Histórico", 400),
+                ("extrato", "Extrato", 150)
+            ],
+            obter_linhas=self.obter_linhas,
+            total=len(self.lancamentos)
+        )
+        
+        # Resumo
+        pendentes = sum(1 for l in self.lancamentos if not l['debito'] or not l['credito'])
+        texto_resumo = f"{len(self.lancamentos)} lançamentos gerados, {pendentes} sem conta identificada"
+        if self.estatisticas_cache:
+            texto_resumo += (f" | cache: {self.estatisticas_cache['acertos']} acertos, "
+                             f"{self.estatisticas_cache['falhas']} falhas")
+        resumo = ttk.Label(self, text=texto_resumo)
+        btn_totais = ttk.Button(self, text="Totais por Conta", command=self.mostrar_totais)
+        
+        # Exportação para o layout de importação do sistema contábil
+        self.layout_var = tk.StringVar(value=next(iter(LAYOUTS)))
+        layout = ttk.Combobox(self, textvariable=self.layout_var, values=list(LAYOUTS), state='readonly', width=20)
+        btn_exportar = ttk.Button(self, text="Exportar", command=self.exportar)
+        self.painel_tarefas = PainelTarefas(self, titulo="Exportações em andamento")
+        
+        # Layout
+        tabela.grid(row=0, column=0, columnspan=4, sticky=(tk.W, tk.E, tk.N, tk.S))
+        resumo.grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
+        layout.grid(row=1, column=1, sticky=tk.E, padx=5, pady=5)
+        btn_exportar.grid(row=1, column=2, sticky=tk.E, padx=5, pady=5)
+        btn_totais.grid(row=1, column=3, sticky=tk.E, padx=5, pady=5)
+        self.painel_tarefas.grid(row=2, column=0, columnspan=4, sticky=(tk.W, tk.E))
+        
+        # Configurar grid
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+    
+    def obter_linhas(self, inicio, fim):
+        return [(
+            lancamento['data'],
+            self.descrever_conta(lancamento['debito']),
+            self.descrever_conta(lancamento['credito']),
+            f"{lancamento['valor']:.2f}",
+            lancamento['historico'],
+            lancamento['extrato']
+        ) for lancamento in self.lancamentos[inicio:fim]]
+    
+    def mostrar_totais(self):
+        totais = totais_por_conta(self.lancamentos)
+        totais.insert(1, 'nome', totais['conta'].map(
+            lambda codigo: self.contas[codigo]['nome'] if codigo in self.contas else "(sem conta)"
+        ))
+        JanelaTabelas(self, "Totais por Conta", {"Totais por Conta": totais})
+    
+    def exportar(self):
+        layout = LAYOUTS[self.layout_var.get()]
+        caminho = filedialog.asksaveasfilename(
+            title="Exportar lançamentos",
+            defaultextension=layout.extensao,
+            filetypes=[(layout.nome, f"*{layout.extensao}")],
+            parent=self
+        )
+        if not caminho:
+            return
+        
+        # Grava lote a lote em segundo plano
+        tarefa = Tarefa(f"Exportando: {os.path.basename(caminho)}", exportar_lancamentos,
+                        self.lancamentos, caminho, layout)
+        self.painel_tarefas.adicionar(tarefa, ao_concluir=self.lancamentos_exportados, ao_falhar=self.erro_exportacao)
+    
+    def lancamentos_exportados(self, resumo):
+        tk.messagebox.showinfo(
+            "Sucesso",
+            f"{resumo['linhas']} lançamentos exportados em {resumo['layout']}:\n{resumo['caminho']}",
+            parent=self
+        )
+    
+    def erro_exportacao(self, erro):
+        tk.messagebox.showerror("Erro", f"Erro ao exportar os lançamentos:\n{str(erro)}", parent=self)
+    
+    def descrever_conta(self, codigo):
+        conta = self.contas.get(codigo)
+        if not conta:
+            return "(sem conta)"
+        return f"{conta['codigo']} - {conta['nome']}"
 
 class MainWindow:
     def __init__(self, master):
@@ -775,12 +888,23 @@ class MainWindow:
         )
         self.lancamentos_button.grid(row=0, column=2, padx=5)
 
+        # Botão para o painel de diagnóstico (tempos e memória das últimas operações)
+        self.diagnostico_button = ttk.Button(
+            self.btn_frame,
+            text="Diagnóstico",
+            command=self.abrir_diagnostico
+        )
+        self.diagnostico_button.grid(row=0, column=3, padx=5)
+
     def abrir_visualizador(self):
         PlanoContasViewer(self.master)
 
     def abrir_visualizador_extratos(self):
         ExtratoViewer(self.master)
 
+    def abrir_diagnostico(self):
+        JanelaDiagnostico(self.master)
+
     def abrir_selecao_arquivos(self):
         tela_selecao = TelaSelecaoArquivos(self.master)
         tela_selecao.grab_set()  # Torna a janela modal
@@ -789,6 +913,63 @@ class MainWindow:
         # Verificar seleções
         if hasattr(tela_selecao, 'extratos_selecionados') and hasattr(tela_selecao, 'plano_contas_selecionado'):
             if tela_selecao.extratos_selecionados and tela_selecao.plano_contas_selecionado:
-                print("Extratos selecionados:", tela_selecao.extratos_selecionados)
-                print("Plano de contas selecionado:", tela_selecao.plano_contas_selecionado)
-                # Aqui você pode continuar com o processamento dos arquivos selecionados
\ No newline at end of file
+                self.gerar_lancamentos(tela_selecao.extratos_selecionados, tela_selecao.plano_contas_selecionado)
+
+    def gerar_lancamentos(self, extratos_selecionados, plano_selecionado):
+        if len(extratos_selecionados) > 1:
+            # Vários extratos: um trabalho por extrato, distribuídos entre processos
+            try:
+                escalonador = EscalonadorLancamentos([(plano_selecionado, arquivo) for arquivo in extratos_selecionados])
+                JanelaLoteLancamentos(self.master, escalonador, self.lancamentos_gerados)
+            except Exception as e:
+                tk.messagebox.showerror("Erro", f"Erro ao gerar lançamentos:\n{str(e)}", parent=self.master)
+            return
+        
+        try:
+            repositorio = Repositorio.existente()
+            if repositorio is not None:
+                with repositorio:
+                    plano = repositorio.carregar_plano(plano_selecionado)
+                    extratos = {arquivo: repositorio.carregar_extrato(arquivo) for arquivo in extratos_selecionados}
+            else:
+                with open(os.path.join('data', plano_selecionado), 'r', encoding='utf-8') as f:
+                    plano = json.load(f)
+                
+                extratos = {}
+                for arquivo in extratos_selecionados:
+                    with open(os.path.join('extratos', arquivo), 'r', encoding='utf-8') as f:
+                        extratos[arquivo] = json.load(f)
+            
+            with execucao('gerar_lancamentos', extratos_selecionados[0]):
+                cache = CacheClassificacao.para_plano(plano_selecionado)
+                with etapa('indice_trigramas', len(plano['contas'])):
+                    trigramas = IndiceTrigramas(plano['contas'])
+                with etapa('classificacao', sum(len(extrato['dados']) for extrato in extratos.values())):
+                    lancamentos = gerar_lancamentos(plano, extratos, cache=cache, trigramas=trigramas)
+                cache.salvar()
+            LancamentosViewer(self.master, plano, lancamentos, cache.estatisticas())
+            
+        except Exception as e:
+            tk.messagebox.showerror("Erro", f"Erro ao gerar lançamentos:\n{str(e)}", parent=self.master)
+
+    def lancamentos_gerados(self, resultados):
+        erros = [f"{resultado['extrato']}: {resultado['erro']}" for resultado in resultados if 'erro' in resultado]
+        if erros:
+            tk.messagebox.showwarning(
+                "Aviso",
+                f"{len(erros)} de {len(resultados)} extratos não foram processados:\n\n" + "\n".join(erros),
+                parent=self.master
+            )
+        
+        for plano_selecionado, lancamentos in lancamentos_por_plano(resultados).items():
+            try:
+                with open(os.path.join('data', plano_selecionado), 'r', encoding='utf-8') as f:
+                    plano = json.load(f)
+            except Exception as e:
+                tk.messagebox.showerror("Erro", f"Erro ao abrir o plano de contas:\n{str(e)}", parent=self.master)
+                continue
+            estatisticas = {
+                'acertos': sum(r['acertos'] for r in resultados if r.get('plano') == plano_selecionado and 'erro' not in r),
+                'falhas': sum(r['falhas'] for r in resultados if r.get('plano') == plano_selecionado and 'erro' not in r),
+            }
+            LancamentosViewer(self.master, plano, lancamentos, estatisticas)
@@ -0,0 +1,112 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from services.tarefas import TarefaCancelada
+
+INTERVALO_ATUALIZACAO = 100  # ms
+
+
+class PainelTarefas(ttk.LabelFrame):
+    """Lista as importações em andamento com barra de progresso e botão de cancelar.
+
+    As tarefas rodam em threads de trabalho; o painel consulta o estado delas
+    com after() e chama os callbacks de conclusão/erro na thread do Tk.
+    O painel fica oculto enquanto não há tarefas.
+    """
+
+    def __init__(self, master, titulo="Importações em andamento", **kwargs):
+        super().__init__(master, text=titulo, padding="5", **kwargs)
+        self.columnconfigure(1, weight=1)
+        self._linhas = []
+        self._agendado = None
+        self._posicao_grid = None
+        self.bind('<Destroy>', self._ao_destruir)
+
+    def grid(self, **kwargs):
+        # Guarda a posição para reexibir o painel quando surgir uma tarefa
+        self._posicao_grid = kwargs
+        super().grid(**kwargs)
+        if not self._linhas:
+            self.grid_remove()
+
+    def adicionar(self, tarefa, ao_concluir=None, ao_falhar=None):
+        """Inicia a tarefa (se preciso) e acompanha seu progresso"""
+        descricao = ttk.Label(self, text=tarefa.descricao)
+        barra = ttk.Progressbar(self, maximum=1.0, length=250)
+        mensagem = ttk.Label(self, text=tarefa.mensagem, width=30)
+        cancelar = ttk.Button(self, text="Cancelar", command=tarefa.cancelar)
+        self._linhas.append({
+            'tarefa': tarefa,
+            'widgets': (descricao, barra, mensagem, cancelar),
+            'ao_concluir': ao_concluir,
+            'ao_falhar': ao_falhar
+        })
+        self._organizar()
+
+        if tarefa.futuro is None:
+            tarefa.iniciar()
+        if self._agendado is None:
+            self._agendado = self.after(INTERVALO_ATUALIZACAO, self._verificar)
+        return tarefa
+
+    def _organizar(self):
+        for linha, dados in enumerate(self._linhas):
+            descricao, barra, mensagem, cancelar = dados['widgets']
+            descricao.grid(row=linha, column=0, sticky=tk.W, padx=5, pady=2)
+            barra.grid(row=linha, column=1, sticky=(tk.W, tk.E), padx=5, pady=2)
+            mensagem.grid(row=linha, column=2, sticky=tk.W, padx=5, pady=2)
+            cancelar.grid(row=linha, column=3, padx=5, pady=2)
+        if self._linhas and self._posicao_grid is not None:
+            super().grid(**self._posicao_grid)
+        elif not self._linhas:
+            self.grid_remove()
+
+    def _verificar(self):
+        self._agendado = None
+        concluidas = []
+        for dados in self._linhas:
+            tarefa = dados['tarefa']
+            _, barra, mensagem, _ = dados['widgets']
+            barra['value'] = tarefa.fracao
+            mensagem['text'] = "Cancelando..." if tarefa.cancelada and not tarefa.concluida else tarefa.mensagem
+            if tarefa.concluida:
+                concluidas.append(dados)
+
+        for dados in concluidas:
+            self._linhas.remove(dados)
+            for widget in dados['widgets']:
+                widget.destroy()
+        if concluidas:
+            self._organizar()
+
+        if self._linhas:
+            self._agendado = self.after(INTERVALO_ATUALIZACAO, self._verificar)
+
+        # Callbacks por último: podem abrir diálogos ou iniciar novas tarefas
+        for dados in concluidas:
+            self._finalizar(dados)
+
+    def _finalizar(self, dados):
+        futuro = dados['tarefa'].futuro
+        if futuro.cancelled():
+            return
+        erro = futuro.exception()
+        if isinstance(erro, TarefaCancelada):
+            return
+        if erro is not None:
+            if dados['ao_falhar']:
+                dados['ao_falhar'](erro)
+            else:
+                messagebox.showerror("Erro", f"Erro ao processar o arquivo:\n{str(erro)}", parent=self)
+        elif dados['ao_concluir']:
+            dados['ao_concluir'](futuro.result())
+
+    def _ao_destruir(self, evento):
+        # Janela fechada: cancela o que ainda não terminou e para o polling
+        if evento.widget is not self:
+            return
+        for dados in self._linhas:
+            dados['tarefa'].cancelar()
+        if self._agendado is not None:
+            self.after_cancel(self._agendado)
+            self._agendado = None
@@ -0,0 +1,155 @@
+import tkinter as tk
+from tkinter import ttk
+
+ALTURA_LINHA_PADRAO = 20
+ALTURA_CABECALHO_PADRAO = 25
+
+
+class TabelaVirtual(ttk.Frame):
+    """Treeview que só materializa as linhas visíveis.
+
+    Em vez de inserir todas as linhas no Treeview, mantém apenas um item por
+    linha visível e troca os valores desses itens conforme a rolagem. As linhas
+    são pedidas a obter_linhas(inicio, fim) em blocos (janela visível mais um
+    buffer antes e depois), então nem o Tk nem a formatação das linhas crescem
+    com o tamanho do arquivo.
+    """
+
+    def __init__(self, master, colunas, obter_linhas, total, buffer=100, **kwargs):
+        super().__init__(master, **kwargs)
+        self.obter_linhas = obter_linhas
+        self.total = total
+        self.buffer = buffer
+        self.inicio = 0
+        self.selecionada = None
+
+        self._itens = []
+        self._bloco_inicio = 0
+        self._bloco = []
+        self._altura_linha = ALTURA_LINHA_PADRAO
+        self._altura_cabecalho = ALTURA_CABECALHO_PADRAO
+        self._medido = False
+
+        # colunas: lista de (id, título, largura) ou (id, título, largura, alinhamento)
+        self.tree = ttk.Treeview(self, columns=[c[0] for c in colunas], show="headings", selectmode="browse")
+        for coluna, titulo, largura, *alinhamento in colunas:
+            self.tree.heading(coluna, text=titulo)
+            self.tree.column(coluna, width=largura, anchor=alinhamento[0] if alinhamento else tk.W)
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._rolar)
+
+        # Layout
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        # Eventos de rolagem e redimensionamento
+        self.tree.bind('<Configure>', lambda e: self._preencher())
+        self.tree.bind('<MouseWheel>', self._roda_mouse)
+        self.tree.bind('<Button-4>', lambda e: self._rolar('scroll', -3, 'units'))
+        self.tree.bind('<Button-5>', lambda e: self._rolar('scroll', 3, 'units'))
+        self.tree.bind('<Up>', lambda e: self._mover_selecao(-1))
+        self.tree.bind('<Down>', lambda e: self._mover_selecao(1))
+        self.tree.bind('<Prior>', lambda e: self._rolar('scroll', -1, 'pages'))
+        self.tree.bind('<Next>', lambda e: self._rolar('scroll', 1, 'pages'))
+        self.tree.bind('<Home>', lambda e: self._rolar('moveto', 0))
+        self.tree.bind('<End>', lambda e: self._rolar('moveto', 1))
+        self.tree.bind('<<TreeviewSelect>>', self._ao_selecionar)
+
+    @property
+    def visiveis(self):
+        altura = self.tree.winfo_height() - self._altura_cabecalho
+        return max(1, altura // self._altura_linha)
+
+    def atualizar(self, total, obter_linhas=None):
+        """Troca a fonte de dados (ex.: resultado de um filtro) e volta ao topo"""
+        if obter_linhas is not None:
+            self.obter_linhas = obter_linhas
+        self.total = total
+        self.inicio = 0
+        self.selecionada = None
+        self._bloco = []
+        self._preencher()
+
+    def ir_para(self, indice):
+        """Rola até a linha indice e a seleciona"""
+        self.selecionada = indice
+        if indice < self.inicio:
+            self.inicio = indice
+        elif indice >= self.inicio + self.visiveis:
+            self.inicio = indice - self.visiveis + 1
+        self._preencher()
+
+    def _medir(self):
+        """Mede a altura real do cabeçalho e das linhas a partir do primeiro item exibido"""
+        if self._medido or not self._itens:
+            return
+        self.tree.update_idletasks()
+        caixa = self.tree.bbox(self._itens[0])
+        if caixa:
+            self._altura_cabecalho, self._altura_linha = caixa[1], max(1, caixa[3])
+            self._medido = True
+
+    def _linhas(self, inicio, fim):
+        """Linhas [inicio, fim) a partir do bloco em memória, buscando um novo bloco se preciso"""
+        bloco_fim = self._bloco_inicio + len(self._bloco)
+        if not self._bloco or inicio < self._bloco_inicio or fim > bloco_fim:
+            self._bloco_inicio = max(0, inicio - self.buffer)
+            self._bloco = list(self.obter_linhas(self._bloco_inicio, min(self.total, fim + self.buffer)))
+        return self._bloco[inicio - self._bloco_inicio:fim - self._bloco_inicio]
+
+    def _preencher(self):
+        if self.total and not self._itens:
+            self._itens.append(self.tree.insert('', 'end'))
+            self._medir()
+
+        visiveis = self.visiveis
+        self.inicio = max(0, min(self.inicio, self.total - visiveis))
+        linhas = self._linhas(self.inicio, min(self.total, self.inicio + visiveis))
+
+        # Ajusta a quantidade de itens à quantidade de linhas visíveis
+        while len(self._itens) < len(linhas):
+            self._itens.append(self.tree.insert('', 'end'))
+        while len(self._itens) > len(linhas):
+            self.tree.delete(self._itens.pop())
+
+        for item, valores in zip(self._itens, linhas):
+            self.tree.item(item, values=valores)
+
+        posicao = None if self.selecionada is None else self.selecionada - self.inicio
+        if posicao is not None and 0 <= posicao < len(self._itens):
+            self.tree.selection_set(self._itens[posicao])
+        elif self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
+
+        if self.total:
+            self.scrollbar.set(self.inicio / self.total, (self.inicio + len(linhas)) / self.total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _rolar(self, acao, quantidade, unidade='units'):
+        if acao == 'moveto':
+            self.inicio = int(float(quantidade) * self.total)
+        elif unidade == 'pages':
+            self.inicio += int(quantidade) * self.visiveis
+        else:
+            self.inicio += int(quantidade)
+        self._preencher()
+        return 'break'
+
+    def _roda_mouse(self, evento):
+        passos = -1 if evento.delta > 0 else 1
+        if abs(evento.delta) >= 120:
+            passos *= abs(evento.delta) // 120
+        return self._rolar('scroll', passos * 3, 'units')
+
+    def _mover_selecao(self, deslocamento):
+        atual = self.inicio if self.selecionada is None else self.selecionada
+        self.ir_para(max(0, min(self.total - 1, atual + deslocamento)))
+        return 'break'
+
+    def _ao_selecionar(self, evento):
+        selecao = self.tree.selection()
+        if selecao and selecao[0] in self._itens:
+            self.selecionada = self.inicio + self._itens.index(selecao[0])